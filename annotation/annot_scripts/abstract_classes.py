@@ -17,84 +17,513 @@
  * See the License for the specific language governing permissions and
  * limitations under the License.
 """
-from abc import ABC, abstractmethod
-import collections
+from collections import OrderedDict
+from dataclasses import dataclass
+from enum import IntEnum
+from functools import lru_cache
+from types import MappingProxyType
+import numpy as np
+try:
+    from numba import njit
+    _NUMBA_AVAILABLE = True
+except ImportError:
+    _NUMBA_AVAILABLE = False
+
+def _read_only(value):
+    """ Read-only copy of a nested dict/list value: dicts become MappingProxyType views, lists become tuples.
+        Cached KB results are shared by all callers, a caller must not be able to modify them. """
+    if isinstance(value, dict):
+        return MappingProxyType({key: _read_only(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_read_only(item) for item in value)
+    return value
+
+def _intern_id(id_vocab, id2code, entity_id):
+    """ Return the int code of entity_id in the (id_vocab: code -> id, id2code: id -> code) tables, interning it if it is new.
+        Shared by the KB, the candidate stores and the CSR subgraphs, which use the same tables. """
+    code = id2code.get(entity_id)
+    if code is None:
+        code = len(id_vocab)
+        id2code[entity_id] = code
+        id_vocab.append(entity_id)
+    return code
+
+def _check_required_methods(cls, base):
+    """ Raise TypeError if cls does not override all the methods listed in base._required.
+        Checked once when the subclass is created, instead of using ABCMeta. """
+    missing = [name for name in base._required if getattr(cls, name) is getattr(base, name)]
+    if missing:
+        raise TypeError(f"{cls.__name__} must implement {', '.join(missing)}")
 
 ### For definition of KB ###
-class AbstractKnowledgeBase(ABC):
-    """ KB Abstract class """ 
-    @abstractmethod
-    def __init__(self, dump_path):
-        """ Intialize a KB: reading hashmaps... """
-        pass
+class AbstractKnowledgeBase:
+    """ KB Abstract class. 
+        Per-entity lookups are served through LRU caches: a KB implements the "_..._impl" methods, 
+        callers use the public methods. """ 
+    _required = ("is_valid_ID", "prefixing_entity", "_get_subgraph_of_entity_impl", "_get_types_of_entity_impl",
+                    "_get_label_of_entity_impl", "_get_num_edges_impl", "get_names_of_entities")
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        _check_required_methods(cls, AbstractKnowledgeBase)
+
+    def __init__(self, dump_path, cache_size=100000):
+        """ Intialize a KB: reading hashmaps... Subclasses must call it to set up the per-entity caches. """
+        self._cached_subgraph = lru_cache(maxsize=cache_size)(self._read_only_subgraph)
+        self._cached_types = lru_cache(maxsize=cache_size)(self._get_types_of_entity_impl)
+        self._cached_label = lru_cache(maxsize=cache_size)(self._get_label_of_entity_impl)
+        self._cached_num_edges = lru_cache(maxsize=cache_size)(self._get_num_edges_impl)
+        ## dense int codes of the entity ids seen so far (code -> id, id -> code).
+        ##     ids are interned lazily since the KB dump is not loaded in memory.
+        self.id_vocab = []
+        self._id2code = {}
 
-    @abstractmethod
     def is_valid_ID(self, entity_id):
         """ Check whether an id is a valid ID w.r.p the KB """
         pass
 
-    @abstractmethod
     def get_subgraph_of_entity(self, entity_id):
         """ get (subject, predicate, object) edges involving entity_id
-                where object is target entity """
-        pass
+                where object is target entity. The returned mapping is a read-only view of the cache. """
+        return self._cached_subgraph(entity_id)
 
-    @abstractmethod
-    def get_types_of_entity(self, entity_id, num_level):
+    def get_types_of_entity(self, entity_id, num_level=1):
         """ Get the types of an entity in hierachical levels. 
             A list of relevant properties for entity types (for ex. occupation) is also allowed."""
-        pass 
+        ## the cached levels are small, each caller gets its own (picklable) copy.
+        return {level: dict(types) for level, types in self._cached_types(entity_id, num_level).items()}
 
-    @abstractmethod
     def get_label_of_entity(self, entity_id):
         """ Get the labels + aliases of an entity """
-        pass
-        
-    @abstractmethod
+        return self._cached_label(entity_id)
+
     def get_num_edges(self, entity_id):
         """ Get number of incoming edges of an entity in KG """
+        return self._cached_num_edges(entity_id)
+
+    def encode_id(self, entity_id):
+        """ Return the int code of an entity id, interning it if it is new """
+        return _intern_id(self.id_vocab, self._id2code, entity_id)
+
+    def decode_id(self, code):
+        """ Return the entity id of an int code """
+        return self.id_vocab[code]
+
+    def _read_only_subgraph(self, entity_id):
+        """ Read-only subgraph of an entity, as cached by get_subgraph_of_entity """
+        return _read_only(self._get_subgraph_of_entity_impl(entity_id))
+
+    def _get_subgraph_of_entity_impl(self, entity_id):
+        """ Read the subgraph of an entity from the KB (uncached) """
+        pass
+
+    def _get_types_of_entity_impl(self, entity_id, num_level):
+        """ Read the hierachical types of an entity from the KB (uncached) """
+        pass 
+
+    def _get_label_of_entity_impl(self, entity_id):
+        """ Read the labels of an entity from the KB (uncached) """
+        pass
+        
+    def _get_num_edges_impl(self, entity_id):
+        """ Read the number of incoming edges of an entity from the KB (uncached) """
         pass
 
-    @abstractmethod
     def prefixing_entity(self, entity):
         """ Adding prefix to an entity """
         pass
 
+    def prefixing_entities(self, entities):
+        """ Adding prefix to many entities """
+        return [self.prefixing_entity(entity) for entity in entities]
+
+    ## Batched access: a KB backend should override these to fetch many entities in one request,
+    ##     the default implementations fall back to one call per entity.
+    def get_subgraphs_of_entities(self, entity_ids):
+        """ Get the subgraphs of many entities: {entity_id: subgraph} """
+        return {entity_id: self.get_subgraph_of_entity(entity_id) for entity_id in entity_ids}
+
+    def get_types_of_entities(self, entity_ids, num_level):
+        """ Get the hierachical types of many entities: {entity_id: types} """
+        return {entity_id: self.get_types_of_entity(entity_id, num_level) for entity_id in entity_ids}
+
+    def get_labels_of_entities(self, entity_ids):
+        """ Get the labels of many entities: {entity_id: label} """
+        return {entity_id: self.get_label_of_entity(entity_id) for entity_id in entity_ids}
+
+    def get_names_of_entities(self, entity_ids):
+        """ Get the labels and aliases of many entities: {entity_id: {"labels": [...], "aliases": [...]}}
+            Required: there is no per-entity accessor of the aliases to fall back to. """
+        raise NotImplementedError
+
+    def get_num_edges_batch(self, entity_ids):
+        """ Get number of incoming edges of many entities: {entity_id: num_edges} """
+        return {entity_id: self.get_num_edges(entity_id) for entity_id in entity_ids}
+
 ### Table component definition ###
-class Column(collections.namedtuple(
-    "Column", ("col_index"))):
-    """ Definition of table column """
-    pass
+Column = int ## a table column is identified by its index
 
-class Cell(collections.namedtuple(
-    "Cell", ("row_index", "col_index"))):
+@dataclass(slots=True, frozen=True)
+class Cell:
     """ Definition of table cell. """
-    pass
+    row_index: int
+    col_index: int
 
-class Column_Pair(collections.namedtuple(
-    "Column_Pair", ("head_col_index", "tail_col_index"))):
+def cell_key(row_index, col_index):
+    """ Pack the coordinates of a table cell into a single int key (row in the high 32 bits, column in the low 32 bits).
+        Hashing a small int is the identity, which is much cheaper than hashing a Cell record. """
+    return (row_index << 32) | (col_index & 0xFFFFFFFF)
+
+def cell_unkey(key):
+    """ Unpack a cell key into (row_index, col_index) """
+    return key >> 32, key & 0xFFFFFFFF
+
+@dataclass(slots=True, frozen=True)
+class Column_Pair:
     """ Definition of column pair. """
-    pass
+    head_col_index: int
+    tail_col_index: int
 
-class Candidate_Entity(collections.namedtuple(
-    "Candidate_Entity", ("row_index", "col_index", "id"))):
+@dataclass(slots=True, frozen=True)
+class Candidate_Entity:
     """ Definition of a candidate entity for a table cell. """
-    pass
+    row_index: int
+    col_index: int
+    id: str
+
+class CandidateStore:
+    """ 
+    Structure-of-Arrays storage of the candidate entities of a table: three parallel arrays
+    (row index, column index, entity id code) plus the vocabulary decoding the id codes back to entity ids.
+    A Candidate_Entity is only materialized on demand (store[i]).
+    If a KB is given, the store shares its id codes, otherwise it keeps its own vocabulary.
+    """
+    __slots__ = ("row_idx", "col_idx", "id_code", "id_vocab", "_id2code", "_size")
+
+    def __init__(self, capacity=1024, kb=None):
+        self.row_idx = np.empty(capacity, dtype=np.int32)
+        self.col_idx = np.empty(capacity, dtype=np.int32)
+        self.id_code = np.empty(capacity, dtype=np.int32)
+        if kb is not None:
+            self.id_vocab, self._id2code = kb.id_vocab, kb._id2code
+        else:
+            self.id_vocab = [] ## id code -> entity id
+            self._id2code = {} ## entity id -> id code
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, i):
+        if not -self._size <= i < self._size:
+            raise IndexError("candidate index out of range")
+        i %= self._size
+        return Candidate_Entity(row_index=int(self.row_idx[i]), col_index=int(self.col_idx[i]), id=self.id_vocab[self.id_code[i]])
+
+    def __iter__(self):
+        for i in range(self._size):
+            yield Candidate_Entity(row_index=int(self.row_idx[i]), col_index=int(self.col_idx[i]), id=self.id_vocab[self.id_code[i]])
+
+    def encode(self, entity_id):
+        """ Intern an entity id, return its code """
+        return _intern_id(self.id_vocab, self._id2code, entity_id)
+
+    def decode(self, code):
+        """ Return the entity id of a code """
+        return self.id_vocab[code]
+
+    def add(self, row_index, col_index, entity_id):
+        """ Append a candidate, return its position in the store """
+        if self._size == len(self.row_idx):
+            ## grow the arrays geometrically to keep appends amortized O(1)
+            new_capacity = max(2*self._size, 1)
+            for field in ("row_idx", "col_idx", "id_code"):
+                grown = np.empty(new_capacity, dtype=np.int32)
+                grown[:self._size] = getattr(self, field)[:self._size]
+                setattr(self, field, grown)
+        i = self._size
+        self.row_idx[i] = row_index
+        self.col_idx[i] = col_index
+        self.id_code[i] = self.encode(entity_id)
+        self._size += 1
+        return i
+
+    def view(self, col_index):
+        """ Return (row indexes, id codes) of the candidates in a column """
+        mask = self.col_idx[:self._size] == col_index
+        return self.row_idx[:self._size][mask], self.id_code[:self._size][mask]
+
+    def group_by_column(self):
+        """ Return {col_index: positions of its candidates in the store}, grouped with one sort rather than a scan per column """
+        col_idx = self.col_idx[:self._size]
+        order = np.argsort(col_idx, kind="stable")
+        sorted_cols = col_idx[order]
+        cols = np.unique(sorted_cols)
+        starts = np.searchsorted(sorted_cols, cols, side="left")
+        ends = np.searchsorted(sorted_cols, cols, side="right")
+        return {int(c): order[start:end] for c, start, end in zip(cols, starts, ends)}
 
 ### Abstract annotation components ###
-class Relation(collections.namedtuple(
-    "Relation", ("id", "semantic_proximity"))):
+@dataclass(slots=True, frozen=True)
+class Relation:
     """ Definition of a relation candidate"""
-    pass
+    id: str
+    semantic_proximity: float
+
+class EdgeKind(IntEnum):
+    """ Type of the object that an edge points to """
+    ENTITY = 0
+    DATETIME = 1
+    STRING = 2
+    QUANTITY = 3
+    OTHER = 4
+
+    @classmethod
+    def of_literal(cls, obj_type):
+        """ Kind of a literal object from its KG type, e.g. "DateTime-Day", "Quantity-<unit>" """
+        if not isinstance(obj_type, str):
+            return cls.OTHER
+        return _LITERAL_EDGE_KINDS.get(obj_type.split("-", 1)[0], cls.OTHER)
+
+_LITERAL_EDGE_KINDS = {"DateTime": EdgeKind.DATETIME, "String": EdgeKind.STRING, "Quantity": EdgeKind.QUANTITY}
+
+@dataclass(slots=True, frozen=True)
+class Edge:
+    """ Definition of an edge in KG: kind field indicates the type of object that the edge points to: entity, literal value.
+        For literal values, info keeps the full KG type of the object (e.g. "Quantity-<unit>") 
+        and subtype its parsed detail (e.g. "Period" for a period of time, the unit id for a quantity). """
+    pid: str
+    kind: EdgeKind
+    info: str = ""
+    subtype: str = ""
+
+class ColumnKind(IntEnum):
+    """ Category of a literal table column """
+    OTHER = 0
+    DATE = 1
+    TEXTUAL = 2
+    NUMERAL_WITH_UNIT = 3
+    NUMERAL_WITHOUT_UNIT = 4
+
+if _NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _sorted_intersection(codes, a_start, a_end, b_start, b_end):
+        """ Intersect two sorted, duplicate-free slices of codes with two pointers, in O(n+m). 
+            Return the positions of the common codes in each slice (absolute indexes into codes). """
+        size = min(a_end-a_start, b_end-b_start)
+        out_a = np.empty(size, dtype=np.int64)
+        out_b = np.empty(size, dtype=np.int64)
+        i, j, k = a_start, b_start, 0
+        while i < a_end and j < b_end:
+            if codes[i] < codes[j]:
+                i += 1
+            elif codes[i] > codes[j]:
+                j += 1
+            else:
+                out_a[k] = i
+                out_b[k] = j
+                k += 1
+                i += 1
+                j += 1
+        return out_a[:k], out_b[:k]
+else:
+    def _sorted_intersection(codes, a_start, a_end, b_start, b_end):
+        """ Intersect two sorted, duplicate-free slices of codes.
+            Return the positions of the common codes in each slice (absolute indexes into codes). """
+        _, idx_a, idx_b = np.intersect1d(codes[a_start:a_end], codes[b_start:b_end], assume_unique=True, return_indices=True)
+        return idx_a + a_start, idx_b + b_start
+
+class SubgraphCSR:
+    """
+    Structure-of-Arrays storage of the entity subgraphs of candidate entities, in CSR layout:
+    the neighbors of the candidate at row r are the sorted node codes neighbors[indptr[r]:indptr[r+1]],
+    and the predicates linking it to the neighbor at slot s are the pid codes pids[edge_indptr[s]:edge_indptr[s+1]].
+    Node ids share the id codes of the KB. Subgraphs are added with add(), then freeze() builds the arrays.
+    """
+    __slots__ = ("id_vocab", "_id2code", "rows", "pid_edges", "pid_names", "pid_backward", "pid_transitive",
+                 "pid_backward_mask", "pid_transitive_mask", "_pid2code", "_transitive", "_parts", "indptr", "neighbors", "edge_indptr", "pids", "signatures")
+
+    SIGNATURE_BITS = 1024 ## size of the node signature of a row, see freeze()
+
+    def __init__(self, kb):
+        self.id_vocab, self._id2code = kb.id_vocab, kb._id2code
+        self.rows = {} ## candidate id -> row
+        ## pid vocabulary: every pid is interned together with its reverse ("P1" <-> "(-)P1") as an (even, odd) pair of codes,
+        ##     so that the code of the reverse predicate is code ^ 1.
+        self.pid_edges = [] ## pid code -> entity Edge of this pid
+        self.pid_names = [] ## pid code -> pid
+        self.pid_backward = [] ## pid code -> whether pid is a backward ("(-)") predicate
+        self.pid_transitive = [] ## pid code -> whether pid (in any direction) is a transitive property of the KB
+        self._transitive = frozenset(getattr(kb, "transitivePID", ()))
+        self._pid2code = {}
+        self._parts = [] ## per row (node codes, edge counts, pid codes), until freeze()
+        self.indptr = self.edge_indptr = np.zeros(1, dtype=np.int64)
+        self.neighbors = self.pids = np.empty(0, dtype=np.int32)
+        self.pid_backward_mask = self.pid_transitive_mask = np.empty(0, dtype=bool) ## pid_backward, pid_transitive as arrays, see freeze()
+        self.signatures = []
+
+    def __contains__(self, candidate_id):
+        return candidate_id in self.rows
+
+    def _encode(self, entity_id):
+        return _intern_id(self.id_vocab, self._id2code, entity_id)
+
+    def _pid_code(self, pid):
+        code = self._pid2code.get(pid)
+        if code is None:
+            backward = pid.startswith("(-)")
+            base_pid = pid[3:] if backward else pid
+            reverse_pid = base_pid if backward else "(-)" + pid
+            code = len(self.pid_names)
+            for a_pid, is_backward in ((pid, backward), (reverse_pid, not backward)):
+                self._pid2code[a_pid] = len(self.pid_names)
+                self.pid_names.append(a_pid)
+                self.pid_edges.append(Edge(pid=a_pid, kind=EdgeKind.ENTITY))
+                self.pid_backward.append(is_backward)
+                self.pid_transitive.append(base_pid in self._transitive)
+        return code
+
+    def add(self, candidate_id, entity_subgraph):
+        """ Add the entity subgraph {node id: [Edge, ...]} of a candidate """
+        items = sorted((self._encode(node), edges) for node, edges in entity_subgraph.items())
+        self.rows[candidate_id] = len(self._parts)
+        self._parts.append(([code for code, _ in items], [len(edges) for _, edges in items],
+                            [self._pid_code(edge.pid) for _, edges in items for edge in edges]))
+
+    def freeze(self):
+        """ Concatenate the added subgraphs into the CSR arrays """
+        node_codes, edge_counts, pid_codes = [], [], []
+        row_sizes = []
+        for nodes, counts, pids in self._parts:
+            node_codes.extend(nodes)
+            edge_counts.extend(counts)
+            pid_codes.extend(pids)
+            row_sizes.append(len(nodes))
+        self.indptr = np.zeros(len(row_sizes)+1, dtype=np.int64)
+        np.cumsum(row_sizes, out=self.indptr[1:])
+        self.edge_indptr = np.zeros(len(edge_counts)+1, dtype=np.int64)
+        np.cumsum(edge_counts, out=self.edge_indptr[1:])
+        self.neighbors = np.asarray(node_codes, dtype=np.int32)
+        self.pids = np.asarray(pid_codes, dtype=np.int32)
+        self.pid_backward_mask = np.asarray(self.pid_backward, dtype=bool)
+        self.pid_transitive_mask = np.asarray(self.pid_transitive, dtype=bool)
+        self._parts = []
+        ## signature of each row: a one-hash Bloom filter of its node codes, as a SIGNATURE_BITS-bit Python int.
+        ##     rows with disjoint signatures share no node.
+        num_words = self.SIGNATURE_BITS // 64
+        bits = (self.neighbors.astype(np.uint64)*np.uint64(0x9E3779B97F4A7C15)) >> np.uint64(64 - (self.SIGNATURE_BITS.bit_length() - 1))
+        words = np.zeros((len(row_sizes), num_words), dtype=np.uint64)
+        np.bitwise_or.at(words, (np.repeat(np.arange(len(row_sizes)), row_sizes), (bits >> np.uint64(6)).astype(np.intp)), 
+                         np.left_shift(np.uint64(1), bits & np.uint64(63)))
+        self.signatures = [int.from_bytes(row_words.tobytes(), "little") for row_words in words]
+
+    def row(self, candidate_id):
+        """ Dict-like view {node id: [Edge, ...]} on the entity subgraph of a candidate (empty if unknown) """
+        r = self.rows.get(candidate_id)
+        if r is None:
+            return SubgraphRow(self, 0, 0)
+        return SubgraphRow(self, int(self.indptr[r]), int(self.indptr[r+1]))
 
-class Edge(collections.namedtuple(
-    "Edge", ("pid", "info"))):
-    """ Definition of an edge in KG: info field indicates the type of object that the edge points to: entity, literal value """
-    pass
+    def may_share_nodes(self, candidate_a, candidate_b):
+        """ False if the subgraphs of two candidates surely share no node (signature test), True if they may """
+        r_a, r_b = self.rows.get(candidate_a), self.rows.get(candidate_b)
+        if r_a is None or r_b is None:
+            return False
+        return bool(self.signatures[r_a] & self.signatures[r_b])
+
+    def intersect(self, row_a, row_b):
+        """ Node ids shared by two subgraph rows """
+        slots_a, _ = self.intersect_slots(row_a, row_b)
+        return [self.id_vocab[code] for code in self.neighbors[slots_a]]
+
+    def intersect_slots(self, row_a, row_b):
+        """ Neighbor slots of the nodes shared by two subgraph rows: (slots in row_a, slots in row_b) """
+        return _sorted_intersection(self.neighbors, row_a.start, row_a.end, row_b.start, row_b.end)
+
+    def slot_pids(self, slot):
+        """ pid codes of the edges to the neighbor at a slot """
+        return self.pids[self.edge_indptr[slot]:self.edge_indptr[slot+1]].tolist()
+
+class SubgraphRow:
+    """ Read-only mapping view {node id: [Edge, ...]} on one row of a SubgraphCSR. """
+    __slots__ = ("csr", "start", "end")
+
+    def __init__(self, csr, start, end):
+        self.csr, self.start, self.end = csr, start, end
+
+    def __len__(self):
+        return self.end - self.start
+
+    def _slot(self, node):
+        code = self.csr._id2code.get(node)
+        if code is None or self.start == self.end:
+            return -1
+        slot = self.start + int(np.searchsorted(self.csr.neighbors[self.start:self.end], code))
+        if slot < self.end and self.csr.neighbors[slot] == code:
+            return slot
+        return -1
+
+    def __contains__(self, node):
+        return self._slot(node) >= 0
+
+    def __getitem__(self, node):
+        slot = self._slot(node)
+        if slot < 0:
+            raise KeyError(node)
+        pid_edges, pids = self.csr.pid_edges, self.csr.pids
+        return [pid_edges[code] for code in pids[self.csr.edge_indptr[slot]:self.csr.edge_indptr[slot+1]]]
+
+class SubgraphMemory:
+    """
+    LRU-bounded mapping {candidate id: subgraph}: at most capacity subgraphs are kept in memory (no limit if capacity is None),
+    the evicted ones are rebuilt on demand by loader(candidate id). 
+    Membership tells whether a candidate has a subgraph, in memory or not.
+    """
+    __slots__ = ("_loader", "capacity", "_loaded", "_known")
+
+    def __init__(self, loader, capacity=None):
+        self._loader = loader
+        self.capacity = capacity
+        self._loaded = OrderedDict() ## candidate id -> subgraph, least recently used first
+        self._known = set()
+
+    def __contains__(self, candidate_id):
+        return candidate_id in self._known
+
+    def __len__(self):
+        return len(self._known)
+
+    def __setitem__(self, candidate_id, subgraph):
+        self._known.add(candidate_id)
+        self._loaded[candidate_id] = subgraph
+        self._loaded.move_to_end(candidate_id)
+        self._evict()
+
+    def __getitem__(self, candidate_id):
+        subgraph = self._loaded.get(candidate_id)
+        if subgraph is not None:
+            self._loaded.move_to_end(candidate_id)
+            return subgraph
+        if candidate_id not in self._known:
+            raise KeyError(candidate_id)
+        subgraph = self._loaded[candidate_id] = self._loader(candidate_id)
+        self._evict()
+        return subgraph
+
+    def _evict(self):
+        if self.capacity is not None:
+            while len(self._loaded) > self.capacity:
+                self._loaded.popitem(last=False)
 
 ### Abstract annotation model ###
-class AbstractAnnotationModel(ABC):
+class AbstractAnnotationModel:
     """ Table annotation abstract class."""
+    _required = ("preprocessing_task", "lookup_task", "cta_task", "cea_task", "cpa_task")
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        _check_required_methods(cls, AbstractAnnotationModel)
+
     def __init__(self, table, target_kb, preprocessing_backend, lookup_backend):
         """ Initialize the annotation model: KB specified at target_kb, preprocessing using preprocessing_backend, lookup using lookup_backend... """
         pass 
@@ -19,16 +19,156 @@
 """
 import numpy as np
 import time
+from collections import defaultdict, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+from itertools import islice
 import math
-import operator
+import re
 from string import punctuation
 import unidecode
 
-from .abstract_classes import Candidate_Entity, Column, Cell, Column_Pair, Relation, AbstractAnnotationModel, Edge
+from .abstract_classes import Candidate_Entity, CandidateStore, Cell, Column_Pair, AbstractAnnotationModel, Edge, EdgeKind, ColumnKind, SubgraphCSR, SubgraphMemory, cell_key, cell_unkey, _NUMBA_AVAILABLE
 from .knowledge_bases import Wikidata_KB
 from . import utils
 from preprocessing import table_preprocessing
 from lookup import entity_lookup
+if _NUMBA_AVAILABLE:
+    from numba import njit
+
+_PUNCTUATION_SET = frozenset(punctuation)
+_ENTITY_RANKS = frozenset(("NORMAL", "PREFERRED", "DEPRECATED"))
+_PERIOD_BRACKETS_RE = re.compile(r"[\[\]()]") ## brackets around a period of time, e.g. "(1990-1995)"
+
+## rows scored by each worker process at least, below that forking costs more than it saves.
+_MIN_ROWS_PER_CONTEXT_WORKER = 200
+## shared nodes of a candidate pair from which their predicate paths are scored as arrays (see _scored_path_arrays).
+_MIN_NODES_FOR_PATH_ARRAYS = 16
+## model whose rows are scored by the forked workers of _parallel_context_scoring.
+_FORKED_MODEL = None
+
+def _score_context_rows_in_worker(rows):
+    """ Score rows of _FORKED_MODEL in a worker: return the context scores set, with the paths and cpa candidates found """
+    model = _FORKED_MODEL
+    ## only what the rows of this worker find is returned.
+    model.context_paths, model.cached_cpa_candidates, model._pair_score_cache, model._cached_cpa_seen = {}, {}, {}, {}
+    model.cache_stats = {stat: 0 for stat in model.cache_stats}
+    scores = [0.0]*(len(model._cands)*model.num_columns)
+    has_context = [False]*len(scores)
+    model._score_context_rows(rows, scores, has_context)
+    set_ks = np.flatnonzero(np.array(has_context, dtype=bool)).tolist()
+    return ([(k, scores[k]) for k in set_ks], model.context_paths, model.cached_cpa_candidates, model._pair_score_cache, model.cache_stats)
+
+def _annotate_columns_in_worker(task):
+    """ Run a cta_task (col_index, only_one) or a cpa_task (head_col_index, tail_col_index, only_one) of _FORKED_MODEL in a worker:
+        return its annotation (None if not annotated), its time and the types of the candidates it loaded from KB. """
+    model = _FORKED_MODEL
+    num_cached_types = len(model.cached_cta_candidates)
+    model.cta_task_time = model.cpa_task_time = 0.0 ## time of this task only.
+    if len(task) == 2:
+        annotation = model.cta_task(*task) or None
+        task_time = model.cta_task_time
+    else:
+        annotation = model.cpa_task(*task) or None
+        task_time = model.cpa_task_time
+    return annotation, task_time, list(islice(model.cached_cta_candidates.items(), num_cached_types, None))
+
+if _NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _aggregate_column_types(entry_rows, entry_codes, entry_scores, entry_ranks, num_types):
+        """ Aggregate the (row, candidate, type) entries of a column, given in row order, see cta_task:
+            in a row, a type gets the best score and rank of its entries. Return per type code its count of rows, total scores, total ranks,
+            and the type codes in order of first appearance. """
+        counts = np.zeros(num_types, dtype=np.int64)
+        total_scores = np.zeros(num_types, dtype=np.float64)
+        total_ranks = np.zeros(num_types, dtype=np.int64)
+        ## score and rank of the types in current row, indexed by type code.
+        row_scores = np.zeros(num_types, dtype=np.float64)
+        row_ranks = np.zeros(num_types, dtype=np.int64)
+        in_row = np.zeros(num_types, dtype=np.bool_)
+        row_types = np.empty(len(entry_codes), dtype=np.int64)
+        column_types = np.empty(num_types, dtype=np.int64)
+        num_column_types = 0
+        start = 0
+        while start < len(entry_codes):
+            end = start
+            num_row_types = 0
+            while end < len(entry_codes) and entry_rows[end] == entry_rows[start]:
+                t = entry_codes[end]
+                if in_row[t]:
+                    row_scores[t] = max(row_scores[t], entry_scores[end])
+                    row_ranks[t] = max(row_ranks[t], entry_ranks[end])
+                else:
+                    in_row[t] = True
+                    row_scores[t] = entry_scores[end]
+                    row_ranks[t] = entry_ranks[end]
+                    row_types[num_row_types] = t
+                    num_row_types += 1
+                end += 1
+            for i in range(num_row_types):
+                t = row_types[i]
+                if counts[t] == 0:
+                    column_types[num_column_types] = t
+                    num_column_types += 1
+                counts[t] += 1
+                total_scores[t] += row_scores[t]
+                total_ranks[t] += row_ranks[t]
+                in_row[t] = False
+            start = end
+        return counts, total_scores, total_ranks, column_types[:num_column_types]
+else:
+    def _aggregate_column_types(entry_rows, entry_codes, entry_scores, entry_ranks, num_types):
+        """ Aggregate the (row, candidate, type) entries of a column, given in row order, see cta_task:
+            in a row, a type gets the best score and rank of its entries. Return per type code its count of rows, total scores, total ranks,
+            and the type codes in order of first appearance. """
+        ## best score and rank of each (row, type).
+        entry_keys = entry_rows*num_types + entry_codes
+        order = np.argsort(entry_keys, kind="stable")
+        sorted_keys = entry_keys[order]
+        starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+        row_type_codes = sorted_keys[starts] % num_types
+        row_type_scores = np.maximum.reduceat(entry_scores[order], starts)
+        row_type_ranks = np.maximum.reduceat(entry_ranks[order], starts)
+        ## totals over the rows, summed in row order.
+        counts = np.bincount(row_type_codes, minlength=num_types)
+        total_scores = np.bincount(row_type_codes, weights=row_type_scores, minlength=num_types)
+        total_ranks = np.bincount(row_type_codes, weights=row_type_ranks, minlength=num_types).astype(np.int64)
+        first_entries = np.full(num_types, len(entry_codes))
+        np.minimum.at(first_entries, entry_codes, np.arange(len(entry_codes)))
+        column_types = np.flatnonzero(counts)
+        return counts, total_scores, total_ranks, column_types[np.argsort(first_entries[column_types], kind="stable")]
+
+def _aggregate_column_relations(entry_rows, entry_codes, entry_scores, entry_proximities, num_codes):
+    """ Aggregate the (row, candidate pair, relation) entries of a column pair, given in row order, see cpa_task:
+        in a row, a relation gets the best score and the lowest semantic proximity of its entries. Return per relation code its count of rows, 
+        total scores (summed in row order), lowest semantic proximity, and the relation codes in order of first appearance. """
+    ## best score and lowest proximity of each (row, relation).
+    entry_keys = entry_rows*num_codes + entry_codes
+    order = np.argsort(entry_keys, kind="stable")
+    sorted_keys = entry_keys[order]
+    starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+    row_relation_codes = sorted_keys[starts] % num_codes
+    row_relation_scores = np.maximum.reduceat(entry_scores[order], starts)
+    ## totals over the rows.
+    counts = np.bincount(row_relation_codes, minlength=num_codes)
+    total_scores = np.bincount(row_relation_codes, weights=row_relation_scores, minlength=num_codes)
+    proximities = np.full(num_codes, np.inf)
+    np.minimum.at(proximities, entry_codes, entry_proximities)
+    first_entries = np.full(num_codes, len(entry_codes))
+    np.minimum.at(first_entries, entry_codes, np.arange(len(entry_codes)))
+    column_relations = np.flatnonzero(counts)
+    return counts, total_scores, proximities, column_relations[np.argsort(first_entries[column_relations], kind="stable")]
+
+def _literal_edge(pid, obj_type):
+    """ Edge to a literal node, with its type parsed once: e.g. "DateTime-Period" -> (DATETIME, "Period"),
+        "Quantity-http://www.wikidata.org/entity/Q11573" -> (QUANTITY, "Q11573"), "Quantity-1" (no unit) -> (QUANTITY, "1") """
+    kind = EdgeKind.of_literal(obj_type)
+    subtype = ""
+    if kind != EdgeKind.OTHER:
+        subtype = obj_type.split("-")[1] if "-" in obj_type else ""
+        if kind == EdgeKind.QUANTITY:
+            subtype = subtype.replace("http://www.wikidata.org/entity/", "")
+    return Edge(pid=pid, kind=kind, info=obj_type, subtype=subtype)
 
 class Baseline_Model(AbstractAnnotationModel):
     """
@@ -76,26 +216,33 @@ class Baseline_Model(AbstractAnnotationModel):
         self.abnormal_lookup_mentions = [] ## contains abnormal mentions in which the lookup works incorrectly.
   
         ## preprocessing the table.
-        start_time = time.time()
+        start_time = time.perf_counter()
         self.table_infos = self.preprocessing_task(table)["preprocessed"]
-        self.preprocessing_time = round(time.time() - start_time, 2)
+        self.preprocessing_time = time.perf_counter() - start_time
         ## it only makes sense to continue if preprocessing succeed.
         if self.table_infos:
             self.table = self.table_infos["tableDataRevised"]
+            ## normalized cells (lowercased, surrounding spaces removed), computed once: the form used as lookup mentions.
+            self._lower = [[cell.lower().strip() for cell in row] for row in self.table]
             self.num_columns = len(self.table[0])
             self.num_rows = len(self.table)
             if self.table_infos["headerInfo"]["hasHeader"]:
                 self.first_data_row = 1
             else:
                 self.first_data_row = 0
+            ## data cells of each column, as string arrays for vectorized scans.
+            self._col_arrays = [np.array([self.table[row_idx][column_idx] for row_idx in range(self.first_data_row, self.num_rows)], dtype=str)
+                                    for column_idx in range(self.num_columns)]
             ## find semantic columns
             self.entity_cols = self._find_semantic_columns() 
             ## others are literal columns
             self.literal_cols = list(set(range(self.num_columns)) - set(self.entity_cols)) 
+            self._refresh_col_sets()
             ## categorize literal columns
             self.date_cols, self.numeral_cols, self.textual_cols, self.index_col = self._disambiguate_literal_columns()
             ## entity lookup on entity columns
-            self.lookup = {}
+            self.lookup = {} ## cell_key(row, col) -> candidate entity ids
+            self._cand_cache = {} ## (row, col, id) -> interned Candidate_Entity, shared by all score dicts.
             self.lookup_scores = {} ## store score of entity w.r.t target mention exported from lookup API.
             is_lkp_success = self.lookup_task()
             ## it only make sense to initialize the annotation if lookup succeed.
@@ -103,22 +250,34 @@ class Baseline_Model(AbstractAnnotationModel):
                 self.multiHop_context = params["multiHop_context"]
                 self.transitivePropertyOnly_path = params["transitivePropertyOnly_path"] # only consider transitive property: (a) s -> p1 -> p2 -> o or (b) s <- p1 <- p2 <- o
                 self.soft_scoring = params["soft_scoring"]
+                ## stop collecting the predicate paths of a candidate pair once its best semantic proximity is 1.0 and it has this many paths (None: collect all).
+                self.max_context_paths = params.get("max_context_paths")
                 ## initialize the scores
                 ##      literal context is more sensible to noise, due to difficulty in the detection, normalization, comparison of the type 
                 ##          for e.g 5 kg != 5 m/s or 05/06/2021 can also be 06/05/2021 or even 05/06/2021 != 06/05/2021
                 ##      so the weight of literal context in the calculation of context score is 0.15.
                 self.semantic_context_weight = 1.0
                 self.literal_context_weight = 0.3
-                self.entity_context_scores = {} ## context score
-                self.entity_sim_scores = {} ## literal similarity score.
-                self.entity_scores = {} ## final score: f(context_score, literal_similarity_score, potential disambiguation_score)
+                ## context scores of the candidates, as (candidate index, context column) arrays set by _context_scoring, see _reset_context_scores.
+                self.context_scores = None
+                self.entity_sim_scores = None ## literal similarity score, array indexed by candidate index (see _cand_index).
+                self.entity_scores = None ## final score: f(context_score, literal_similarity_score, potential disambiguation_score), same indexing.
                 self._initialize_scores()
                 
                 ## set the entity_subgraph, literal_subgraph for each candidate lookup
-                ## and save to G_memory
-                self.G_memory = {}
+                ## and save to G_memory, which keeps at most params["subgraph_cache_size"] of them in memory (see SubgraphMemory).
+                self.G_memory = SubgraphMemory(self._reload_subgraph, params.get("subgraph_cache_size"))
+                ## entity subgraphs as SoA CSR arrays (see SubgraphCSR), otherwise they stay as dicts in G_memory.
+                self.G_csr = SubgraphCSR(self.KB) if params.get("soa_subgraph", True) else None
+                self._path_names = {} ## path key (see _csr_multihop_paths) -> "head_pid::tail_pid"
+                self._node_popularity = np.empty(0, dtype=np.float64) ## node id code -> popularity, NaN until read (see _node_popularities)
+                ## parsed quantities, see _match_quantity_literal: (KG quantity, unit id) -> (base unit, magnitude), literal cell -> (base unit, magnitude)
+                self._standardized_objs = {}
+                self._standardized_cells = {}
+                self._cell_periods = {} ## literal cell -> its bounds split as a period of time, see _match_date_literal
+                self._cell_years = {} ## literal cell -> its year, see _match_date_literal
                 self.type_graph = {}
-                ## remember popular entities (num_edges > 1000000) on which caching mechanism is applied (see self.unrelated_candidate_pairs)
+                ## remember popular entities (num_edges > 1000000) on which caching mechanism is applied (see self.pair_proximity_memo)
                 ## note: we do not apply caching mechanism on all of entity candidates in order to avoid memory explosion.
                 self.popular_entities = set()
                 self._set_subgraph()
@@ -128,17 +287,33 @@ class Baseline_Model(AbstractAnnotationModel):
                 ## cache relations between pairs of candidate
                 ##    since graph intersection operation's performance depends on number of candidate lookups.
                 ##    caching relations found between entity pairs avoid repeating intersection operation for same entity pairs.
-                self.cached_cpa_candidates = {}
-                self.unrelated_candidate_pairs = set() ## to store entity pairs that do not have any relation.
+                self.cached_cpa_candidates = {} ## (head, tail) -> (cpa id, semantic proximity) pairs
+                self._cached_cpa_seen = {} ## (entity_id, literal_mention) -> set of the pids in its cached_cpa_candidates
+                self._cpa_by_head = {} ## cached_cpa_candidates as head -> tail -> (cpa id, semantic proximity) pairs, see _cpa_candidates_by_head
+                self._cpa_arrays = {} ## same relations as head -> tail -> (cpa codes, semantic proximities) arrays, see _cpa_relation_arrays
+                self._cpa_codes = {} ## cpa id -> cpa code
+                self._cpa_vocab = [] ## cpa code -> cpa id
+                ## LRU memo of (best semantic proximity, (path, proximity) items) of intersected candidate pairs not (yet) in cached_cpa_candidates,
+                ##   including the unconnected ones,
+                ##   bounded to 10x the number of lookup candidates.
+                self.pair_proximity_memo = OrderedDict()
+                self.pair_proximity_memo_capacity = 10*max(1, len(self.candidates))
+                self.cache_stats = {"hits": 0, "misses": 0} ## candidate pair cache hits/misses in context scoring.
+                self._pair_score_cache = {} ## (head_id, tail_id) of cached_cpa_candidates -> (best semantic proximity, (path, proximity) items)
 
                 ## to store unrelated-column pairs (avoid CPA calculation)
                 self.unrelated_col_pairs = set() 
+                self._pair_cache = {} ## (head, tail) -> interned Column_Pair
 
                 ## cache hierarchical types of a candidate entity.
                 self.cached_cta_candidates = {}
+                ## same types as arrays of type codes, ranks and taxonomy weights, see _candidate_type_arrays.
+                self._cta_type_arrays = {}
+                self._type_codes = {} ## type id -> type code
+                self._type_vocab = [] ## type code -> type id
 
                 ## store cells that do not have any valid contexts, for this kind of cell, put more weight on CTA disambiguation.
-                self.contextless_cells = {}
+                self.contextless_cells = {} ## cell_key(row, col) -> best context score
 
                 ## for a contextless cell, apart from CTA disambiguation of higher weight,
                 ## candidates whose neighbor set contains a relation which is indeed a CPA in table should be more considerable 
@@ -149,6 +324,9 @@ class Baseline_Model(AbstractAnnotationModel):
                 ## Annotations
                 ##   in cta taxonomy: ancestor type (second_level, third level) is less preferable (lower weight) than descendant type or direct type
                 self.cta_taxonomy_weights = {"first_level": 1.0, "second_level": 0.7, "third_level": 0.2}
+                ## (level of hierachical types, its weight) from direct types to the most general ones.
+                self.cta_levels = (("level_1", self.cta_taxonomy_weights["first_level"]), ("level_2", self.cta_taxonomy_weights["second_level"]), 
+                                    ("level_3", self.cta_taxonomy_weights["third_level"]))
                 self.cta_annot = {}
                 self.cea_annot = {}
                 self.cpa_annot = {}
@@ -156,24 +334,49 @@ class Baseline_Model(AbstractAnnotationModel):
                 ## until here, all init operations success, set flag to True
                 self.is_model_init_success = True
     
+    def _cand(self, row_index, col_index, entity_id):
+        """ Return the interned Candidate_Entity of (row_index, col_index, entity_id). """
+        key = (row_index, col_index, entity_id)
+        candidate = self._cand_cache.get(key)
+        if candidate is None:
+            candidate = Candidate_Entity(row_index=row_index, col_index=col_index, id=entity_id)
+            self._cand_cache[key] = candidate
+        return candidate
+
+    def _pair(self, head_col_index, tail_col_index):
+        """ Return the interned Column_Pair of (head_col_index, tail_col_index). """
+        key = (head_col_index, tail_col_index)
+        col_pair = self._pair_cache.get(key)
+        if col_pair is None:
+            col_pair = Column_Pair(head_col_index=head_col_index, tail_col_index=tail_col_index)
+            self._pair_cache[key] = col_pair
+        return col_pair
+
+    def _refresh_col_sets(self):
+        """ Rebuild the sets used for O(1) column membership tests, to call whenever entity_cols/literal_cols change. """
+        self._entity_col_set = frozenset(self.entity_cols)
+        self._literal_col_set = frozenset(self.literal_cols)
+        self._min_entity_col = min(self.entity_cols) if self.entity_cols else 0
+        self._df_cols = {} ## (context col, candidate col) -> distance factor, see _df_col
+
+    def _df_col(self, col_idx, cand_col_idx):
+        """ Distance factor of a context column: decreases with the distance of the columns to the first entity column. """
+        key = (col_idx, cand_col_idx)
+        df_col = self._df_cols.get(key)
+        if df_col is None:
+            df_col = self._df_cols[key] = (1+4*min(abs(col_idx - self._min_entity_col), abs(cand_col_idx - self._min_entity_col)))**-1
+        return df_col
+
     def _find_semantic_columns(self):
         """ Find semantic columns in table: they are object columns which may refer to KG entities. """
         semantic_columns = []
         for column_idx in range(self.num_columns):
             object_typing_score = 0.0 ## quantify how much column represents an object.
-            num_long_cellcontent = 0 ## count column cells represented by very long string.
-            num_punctuated_cellcontent = 0
             ## a cell content that is too long or contains too much punctuations is assumed to be unlookupable 
-            for row_idx in range(self.first_data_row, self.num_rows):
-                if len(self.table[row_idx][column_idx]) > 150:
-                    num_long_cellcontent += 1
-                puncs = {}
-                for p in punctuation:
-                    s = self.table[row_idx][column_idx].count(p)
-                    if s > 0:
-                        puncs[p] = s
-                if len(puncs) > 3:
-                    num_punctuated_cellcontent += 1
+            column = self._col_arrays[column_idx]
+            num_long_cellcontent = int((np.char.str_len(column) > 150).sum()) ## count column cells represented by very long string.
+            num_distinct_puncs = np.fromiter((len(_PUNCTUATION_SET.intersection(cell)) for cell in column), dtype=np.int32, count=len(column))
+            num_punctuated_cellcontent = int((num_distinct_puncs > 3).sum())
 
             ## among column's typings, if a typing reprensents an object (e.g. PERSON, ORG, GPE...), 
             ##     then accumulate its corresponding score.
@@ -238,19 +441,24 @@ class Baseline_Model(AbstractAnnotationModel):
         + Do the lookup on those mentions
         Return True is task is succeeded.    
         """
+        rows = range(self.first_data_row, self.num_rows)
+        num_data_rows = self.num_rows - self.first_data_row
+        lower = self._lower
+        K = self.params["K"]
         ## Get all mentions from entity columns for lookup.
         lookup_inputs = set()
         for column_idx in self.entity_cols:
-            for row_idx in range(self.first_data_row, self.num_rows):
-                if len(self.table[row_idx][column_idx].lower()) > 1:
-                    lookup_inputs.add(self.table[row_idx][column_idx].lower())
+            for row_idx in rows:
+                mention = lower[row_idx][column_idx]
+                if len(mention) > 1:
+                    lookup_inputs.add(mention)
         lookup_inputs = list(lookup_inputs)
         ## Lookup
         response = entity_lookup(labels=lookup_inputs, KG=self.target_kb["lookup_index"])
         lookup_results = {}
         for item in response["output"]:
             if "entities" in item:
-                lookup_results[item["label"]] = item["entities"][:self.params["K"]]
+                lookup_results[item["label"]] = item["entities"][:K]
             else: ## erreur in the output
                 self.abnormal_lookup_mentions.append(item["label"])
 
@@ -258,30 +466,34 @@ class Baseline_Model(AbstractAnnotationModel):
         if lookup_results:
             self.lookup_time = response["executionTimeSec"]
             ## Lookup successfully. Distribute the candidates to each table mention.
+            lookup, lookup_scores, cand = self.lookup, self.lookup_scores, self._cand
+            kept_cols, dropped_cols = [], []
             for column_idx in self.entity_cols:
-                col_coverage = 0 ## to track %cells in this column has candidate entities.
-                for row_idx in range(self.first_data_row, self.num_rows):
-                    if self.table[row_idx][column_idx].lower() in lookup_results:
-                        col_coverage += 1/(self.num_rows-self.first_data_row)
-                        cell = Cell(row_index=row_idx, col_index=column_idx)
-                        self.lookup[cell] = []
-                        for a_candidate in lookup_results[self.table[row_idx][column_idx].lower()]:
-                            self.lookup[cell].append(a_candidate["entity"])
-                            candidate_entity = Candidate_Entity(row_index=row_idx, col_index=column_idx, id=a_candidate["entity"]) 
-                            self.lookup_scores[candidate_entity] = a_candidate["score"]
+                num_covered = 0 ## to track how many cells in this column have candidate entities.
+                for row_idx in rows:
+                    candidates = lookup_results.get(lower[row_idx][column_idx])
+                    if candidates is not None:
+                        num_covered += 1
+                        cell_candidates = lookup[cell_key(row_idx, column_idx)] = []
+                        for a_candidate in candidates:
+                            cell_candidates.append(a_candidate["entity"])
+                            lookup_scores[cand(row_idx, column_idx, a_candidate["entity"])] = a_candidate["score"]
                 ## if > 70% cells of column does not have any candidate, 
                 ##        the column is not considered as semantic column, but rather a literal (or textual) column.
-                if col_coverage < 0.3:
-                    self.entity_cols.remove(column_idx)
-                    self.textual_cols.append(column_idx)
-                    self.literal_cols.append(column_idx)
-                    ## delete lookup in invalid column
-                    for row_idx in range(self.first_data_row, self.num_rows):
-                        cell = Cell(row_index=row_idx, col_index=column_idx)
-                        self.lookup.pop(cell, None)
-                        for a_candidate in lookup_results.get(self.table[row_idx][column_idx].lower(), []):
-                            candidate_entity = Candidate_Entity(row_index=row_idx, col_index=column_idx, id=a_candidate["entity"])                         
-                            self.lookup_scores.pop(candidate_entity)
+                if num_covered * 10 < 3 * num_data_rows:
+                    dropped_cols.append(column_idx)
+                else:
+                    kept_cols.append(column_idx)
+            self.entity_cols = kept_cols
+            self.textual_cols.extend(dropped_cols)
+            self.literal_cols.extend(dropped_cols)
+            self._refresh_col_sets()
+            ## delete lookup in invalid columns
+            for column_idx in dropped_cols:
+                for row_idx in rows:
+                    lookup.pop(cell_key(row_idx, column_idx), None)
+                    for a_candidate in lookup_results.get(lower[row_idx][column_idx], []):
+                        lookup_scores.pop(cand(row_idx, column_idx, a_candidate["entity"]), None)
             ## calculate average lookup candidates per mention.
             denom = 0
             for cell in self.lookup:
@@ -296,12 +508,38 @@ class Baseline_Model(AbstractAnnotationModel):
 
     def _initialize_scores(self):
         """ Intializa the scores for each candidate entity: context_score, similarity_score, final_score """
+        ## all candidates of the table, stored column-wise (SoA) for vectorized filtering/grouping.
+        self.candidates = CandidateStore(kb=self.KB)
         for cell, entity_list in self.lookup.items():
+            row_index, col_index = cell_unkey(cell)
             for entity_id in entity_list:
-                candidate = Candidate_Entity(row_index=cell.row_index, col_index=cell.col_index, id=entity_id) 
-                self.entity_context_scores[candidate] = {}
-                self.entity_sim_scores[candidate] = 0.0
-                self.entity_scores[candidate] = 0.0
+                self.candidates.add(row_index, col_index, entity_id)
+        ## dense index of each distinct candidate into the score arrays.
+        self._cands = [] ## candidate index -> Candidate_Entity
+        self._cand_index = {} ## Candidate_Entity -> candidate index
+        for stored in self.candidates:
+            candidate = self._cand(stored.row_index, stored.col_index, stored.id)
+            if candidate not in self._cand_index:
+                self._cand_index[candidate] = len(self._cands)
+                self._cands.append(candidate)
+        self.entity_sim_scores = np.zeros(len(self._cands), dtype=np.float64)
+        self.entity_scores = np.zeros(len(self._cands), dtype=np.float64)
+        self._reset_context_scores()
+
+    def _reset_context_scores(self):
+        """ Context scores are kept per (candidate index, context column):
+            + context_scores: score of the candidate w.r.t. the context cell.
+            + has_context: whether the context column is a context of the candidate (only these entries are meaningful).
+            + context_paths: {(candidate index, context column): relations} from which the score is calculated, only for non-empty ones.
+            + context_col_weights: weight of a context, it only depends on (candidate column, context column).
+        """
+        shape = (len(self._cands), self.num_columns)
+        self.context_scores = np.zeros(shape, dtype=np.float64)
+        self.has_context = np.zeros(shape, dtype=bool)
+        self.context_paths = {}
+        self.context_col_weights = np.zeros((self.num_columns, self.num_columns), dtype=np.float64)
+        self.context_col_weights[:, self.entity_cols] = self.semantic_context_weight
+        self.context_col_weights[:, self.literal_cols] = self.literal_context_weight
 
     def _set_subgraph(self):
         """
@@ -316,38 +554,173 @@ class Baseline_Model(AbstractAnnotationModel):
                 neighbor node "75" relates to target "Q90" via "P395" and it is a "String".
             Note: for neighbors nodes found in reverse direction, we add "(-)" to the predicate.
         """
-        start_time = time.time()
-        for cell, lookups in self.lookup.items():           
+        start_time = time.perf_counter()
+        ## only candidates of columns that survived the coverage check in lookup_task need a subgraph.
+        surviving_lookups = [lookups for cell, lookups in self.lookup.items() if cell_unkey(cell)[1] in self._entity_col_set]
+        ## fetch the subgraphs of all candidates in one batch read.
+        missing = list(dict.fromkeys(candidate_id for lookups in surviving_lookups for candidate_id in lookups 
+                                        if candidate_id not in self.G_memory))
+        ## serially: unpickling the records and building the dicts hold the GIL, threads do not speed it up.
+        fetched_neighbors = self.KB.get_subgraphs_of_entities(missing)
+        for lookups in surviving_lookups:           
             for candidate_id in lookups:
                 if candidate_id not in self.G_memory:
                     ## loading subgraph of candidate entity
-                    subgraph = {"entity": {}, "literal": {}, "pids": set()}
-                    ##  browsing 1-hop forward neighbors
-                    neighbors = self.KB.get_subgraph_of_entity(candidate_id)
-                    date_items = {}
-                    for pid, objs in neighbors.items():
-                        """ deprecated
-                        if "::" in pid: ## pid contains qualifier
-                            new_pid = new_pid.split("::")
-                            ## remove the entity QID in pid.
-                            ## e.g. ElonMusk -> educatedAt PensylvaniaUniv academicDegree -> BachelorOfScience 
-                            ##           becomes ElonMusk -> educatedAt::academicDegree -> BachelorOfScience
-                            new_pid = new_pid[0] + "::" + new_pid[2] 
-                        """ 
-                        subgraph["pids"].add(pid)
-                        if pid[:3] == "(-)": ## backward property, subject is always entity.
-                            edge = Edge(pid=pid, info="entity")
-                            for obj in objs:
-                                subgraph["entity"].setdefault(obj, []).append(edge)
-                        else:
-                            for obj, obj_type in objs.items(): 
-                                if obj_type in ["NORMAL", "PREFERRED", "DEPRECATED"]: ## object is entity (expressed by its rank)
-                                    subgraph["entity"].setdefault(obj, []).append(Edge(pid=pid, info="entity"))
-                                else:
-                                    subgraph["literal"].setdefault(obj, []).append(Edge(pid=pid, info=obj_type))
+                    subgraph = self._build_subgraph(fetched_neighbors[candidate_id])
+                    if self.G_csr is not None:
+                        ## entity subgraph is kept in the CSR arrays only.
+                        self.G_csr.add(candidate_id, subgraph.pop("entity"))
                     self.G_memory[candidate_id] = subgraph
-        end_time = time.time()
-        self.subgraph_construction_time = round(end_time-start_time, 2)
+        if self.G_csr is not None:
+            self.G_csr.freeze()
+        end_time = time.perf_counter()
+        self.subgraph_construction_time = end_time-start_time
+
+    def _build_subgraph(self, neighbors):
+        """ Subgraph {entity subgraph, literal subgraph, list_of_all_predicateds} of a candidate from its KB neighbors (see _set_subgraph) """
+        subgraph = {"entity": defaultdict(list), "literal": defaultdict(list), "pids": set()}
+        ##  browsing 1-hop forward neighbors
+        entity_subgraph, literal_subgraph = subgraph["entity"], subgraph["literal"]
+        for pid, objs in neighbors.items():
+            """ deprecated
+            if "::" in pid: ## pid contains qualifier
+                new_pid = new_pid.split("::")
+                ## remove the entity QID in pid.
+                ## e.g. ElonMusk -> educatedAt PensylvaniaUniv academicDegree -> BachelorOfScience 
+                ##           becomes ElonMusk -> educatedAt::academicDegree -> BachelorOfScience
+                new_pid = new_pid[0] + "::" + new_pid[2] 
+            """ 
+            subgraph["pids"].add(pid)
+            entity_edge = Edge(pid=pid, kind=EdgeKind.ENTITY)
+            if pid.startswith("(-)"): ## backward property, subject is always entity.
+                for obj in objs:
+                    entity_subgraph[obj].append(entity_edge)
+            else:
+                literal_edges = {} ## obj_type -> Edge, one edge per literal type of this pid.
+                for obj, obj_type in objs.items(): 
+                    if obj_type in _ENTITY_RANKS: ## object is entity (expressed by its rank)
+                        entity_subgraph[obj].append(entity_edge)
+                    else:
+                        edge = literal_edges.get(obj_type)
+                        if edge is None:
+                            edge = literal_edges[obj_type] = _literal_edge(pid, obj_type)
+                        literal_subgraph[obj].append(edge)
+        return subgraph
+
+    def _reload_subgraph(self, candidate_id):
+        """ Rebuild the subgraph of a candidate evicted from G_memory """
+        subgraph = self._build_subgraph(self.KB.get_subgraphs_of_entities([candidate_id]).get(candidate_id, {}))
+        if self.G_csr is not None:
+            ## entity subgraph is still in the CSR arrays.
+            subgraph.pop("entity")
+        return subgraph
+
+    def _csr_multihop_paths(self, G_head, G_tail, semantic_proximities):
+        """
+        Multi-hop predicate paths between two candidates through their shared neighbors, on the CSR subgraph rows G_head, G_tail.
+        Same rules as the dict-based path search in _context_scoring, but predicates are handled as int codes (the reverse of a code is code ^ 1)
+        and a path is an int key (a pid code for a transitive path, ((head code + 1) << 32) | tail code otherwise) until it is named at the end.
+        Fill semantic_proximities {path: proximity} and return the best semantic proximity.
+        """
+        csr = self.G_csr
+        pid_names, path_names = csr.pid_names, self._path_names
+        slots_head, slots_tail = csr.intersect_slots(G_head, G_tail)
+        node_popularities = self._node_popularities(csr.neighbors[slots_head])
+        if len(node_popularities) < _MIN_NODES_FOR_PATH_ARRAYS or self.max_context_paths is not None: ## only the node loop can stop early
+            best_semantic_proximity, path_proximities = self._scored_paths(slots_head.tolist(), slots_tail.tolist(), node_popularities.tolist())
+        else:
+            best_semantic_proximity, path_proximities = self._scored_path_arrays(slots_head, slots_tail, node_popularities)
+        ## name the paths: "pid" for a transitive path, "head_pid::tail_pid" otherwise.
+        for path_key, semantic_proximity in path_proximities:
+            if path_key < 1 << 32:
+                a_cpa_candidate = pid_names[path_key]
+            else:
+                a_cpa_candidate = path_names.get(path_key)
+                if a_cpa_candidate is None:
+                    a_cpa_candidate = path_names[path_key] = pid_names[(path_key >> 32) - 1] + "::" + pid_names[path_key & 0xFFFFFFFF]
+            semantic_proximities[a_cpa_candidate] = min(semantic_proximities.get(a_cpa_candidate, semantic_proximity), semantic_proximity)
+        return best_semantic_proximity
+
+    def _node_popularities(self, node_codes):
+        """ Popularity 1/(2 + log10(2 + number of edges)) of nodes given by id codes, 0 for nodes without edge. 
+            The number of edges of a node is read from the KB once per table, in a batch with the other unseen nodes. """
+        popularity = self._node_popularity
+        if len(popularity) < len(self.G_csr.id_vocab):
+            ## new id codes since last call
+            popularity = np.concatenate((popularity, np.full(len(self.G_csr.id_vocab) - len(popularity), np.nan)))
+            self._node_popularity = popularity
+        node_popularities = popularity[node_codes]
+        unseen = np.isnan(node_popularities)
+        if unseen.any():
+            unseen_codes = np.unique(node_codes[unseen]).tolist()
+            num_edges = self.KB.get_num_edges_batch([self.G_csr.id_vocab[code] for code in unseen_codes])
+            for code in unseen_codes:
+                node_num_edges = num_edges[self.G_csr.id_vocab[code]]
+                popularity[code] = 1/(2 + math.log10(2+node_num_edges)) if node_num_edges else 0.0
+            node_popularities = popularity[node_codes]
+        return node_popularities
+
+    def _scored_paths(self, slots_head, slots_tail, node_popularities):
+        """ Best proximity and (path key, min proximity) items of the paths through the shared nodes at the given slots, see _csr_multihop_paths """
+        csr = self.G_csr
+        pid_backward, pid_transitive = csr.pid_backward, csr.pid_transitive
+        best_semantic_proximity = 0.0
+        proximities = {} ## path key -> proximity
+        for slot_head, slot_tail, node_popularity in zip(slots_head, slots_tail, node_popularities):
+            if node_popularity > 0:
+                tail_pids = [pid ^ 1 for pid in csr.slot_pids(slot_tail)] ## reverse the direction of tail predicates
+                for rel_head in csr.slot_pids(slot_head):
+                    head_key = (rel_head + 1) << 32
+                    for rel_tail in tail_pids:
+                        if rel_head == rel_tail and pid_transitive[rel_head]:
+                            path_key = rel_head
+                            semantic_proximity = 1.0 ## transitive path get highest weight
+                        else:
+                            path_key = head_key | rel_tail
+                            if pid_backward[rel_head] != pid_backward[rel_tail]:
+                                semantic_proximity = node_popularity/1.75
+                            else:
+                                semantic_proximity = node_popularity
+                        best_semantic_proximity = max(best_semantic_proximity, semantic_proximity)
+                        proximities[path_key] = min(proximities.get(path_key, semantic_proximity), semantic_proximity)
+                if self._saturated_paths(best_semantic_proximity, proximities):
+                    break
+        return best_semantic_proximity, proximities.items()
+
+    def _saturated_paths(self, best_semantic_proximity, semantic_proximities):
+        """ Whether the paths of a candidate pair can no longer raise its score, nor need more diversity (see params["max_context_paths"]) """
+        return (self.max_context_paths is not None and best_semantic_proximity >= 1.0 
+                    and len(semantic_proximities) >= self.max_context_paths)
+
+    def _scored_path_arrays(self, slots_head, slots_tail, node_popularities):
+        """ Same as _scored_paths, with all (head predicate, tail predicate) pairs of all shared nodes scored at once as arrays,
+            for large intersections. Paths keep the order of their first occurrence. """
+        csr = self.G_csr
+        kept = node_popularities > 0
+        slots_head, slots_tail, node_popularities = slots_head[kept], slots_tail[kept], node_popularities[kept]
+        ## cross product of the head and tail predicates of each node, head predicates first.
+        head_starts, tail_starts = csr.edge_indptr[slots_head], csr.edge_indptr[slots_tail]
+        num_tails = csr.edge_indptr[slots_tail+1] - tail_starts
+        num_pairs = (csr.edge_indptr[slots_head+1] - head_starts)*num_tails
+        total = int(num_pairs.sum())
+        if total == 0:
+            return 0.0, ()
+        pair_node = np.repeat(np.arange(len(num_pairs)), num_pairs)
+        pair_rank = np.arange(total) - np.repeat(np.cumsum(num_pairs) - num_pairs, num_pairs)
+        rel_heads = csr.pids[head_starts[pair_node] + pair_rank // num_tails[pair_node]].astype(np.int64)
+        rel_tails = csr.pids[tail_starts[pair_node] + pair_rank % num_tails[pair_node]].astype(np.int64) ^ 1 ## reverse the direction of tail predicates
+        popularities = node_popularities[pair_node]
+        transitive = (rel_heads == rel_tails) & csr.pid_transitive_mask[rel_heads]
+        proximities = np.where(transitive, 1.0, ## transitive path get highest weight
+                               np.where(csr.pid_backward_mask[rel_heads] != csr.pid_backward_mask[rel_tails], popularities/1.75, popularities))
+        path_keys = np.where(transitive, rel_heads, ((rel_heads + 1) << 32) | rel_tails)
+        ## min proximity per path, paths ordered by first occurrence.
+        order = np.argsort(path_keys, kind="stable")
+        sorted_keys = path_keys[order]
+        group_starts = np.flatnonzero(np.concatenate(([True], sorted_keys[1:] != sorted_keys[:-1])))
+        min_proximities = np.minimum.reduceat(proximities[order], group_starts)
+        by_occurrence = np.argsort(order[group_starts])
+        return float(proximities.max()), zip(sorted_keys[group_starts][by_occurrence].tolist(), min_proximities[by_occurrence].tolist())
 
     def update_context_weight(self, onlyLiteralContext=False):
         """ Update the weight of each context in table according to the CPA of associated column.
@@ -358,33 +731,34 @@ class Baseline_Model(AbstractAnnotationModel):
         """
         # if self.cpa_annot:
         if not onlyLiteralContext:
-            for candidate in self.entity_context_scores:
-                for col_idx, a_context in self.entity_context_scores[candidate].items():
-                    if col_idx < candidate.col_index and col_idx in self.entity_cols:
-                        col_pair = Column_Pair(head_col_index=col_idx, tail_col_index=candidate.col_index)
-                    else:
-                        col_pair = Column_Pair(head_col_index=candidate.col_index, tail_col_index=col_idx)    
+            ## the weight of a context only depends on the (candidate column, context column) pair.
+            for cand_col in self.entity_cols:
+                for col_idx in self._context_cols():
+                    if col_idx == cand_col:
+                        continue
+                    col_pair = self._context_col_pair(cand_col, col_idx)
                     if col_pair in self.cpa_annot:
                         cnt_col = self.cpa_annot[col_pair][0]["coverage"]
-                        df_col = (1+4*min(abs(col_idx - min(self.entity_cols)), abs(candidate.col_index - min(self.entity_cols))))**-1
+                        df_col = self._df_col(col_idx, cand_col)
                         tau_col = self.cpa_annot[col_pair][0]["semantic_proximity"]
-                        if col_idx in self.entity_cols:
-                            a_context["weight"] = max(0.05, self.semantic_context_weight*cnt_col*tau_col*df_col)
+                        if col_idx in self._entity_col_set:
+                            weight = max(0.05, self.semantic_context_weight*cnt_col*tau_col*df_col)
                         else:
-                            a_context["weight"] = max(0.01, self.literal_context_weight*cnt_col*tau_col*df_col)
+                            weight = max(0.01, self.literal_context_weight*cnt_col*tau_col*df_col)
                     else:
-                        if col_idx in self.entity_cols:
-                            a_context["weight"] = 0.05
+                        if col_idx in self._entity_col_set:
+                            weight = 0.05
                         else:
-                            a_context["weight"] = 0.01
+                            weight = 0.01
+                    self.context_col_weights[cand_col, col_idx] = weight
         else:
             ## find entity column that best matches with a literal column.
             for literal_col in self.literal_cols:
                 match_score = 0
                 match_column = None
                 for entity_col in self.entity_cols:
-                    self.unrelated_col_pairs.add(Column_Pair(head_col_index=entity_col, tail_col_index=literal_col)) ## related col pair will be discared later.
-                    col_pair = Column_Pair(head_col_index=entity_col, tail_col_index=literal_col)
+                    col_pair = self._pair(entity_col, literal_col)
+                    self.unrelated_col_pairs.add(col_pair) ## related col pair will be discared later.
                     if col_pair in self.cpa_annot:
                         cnt_col = self.cpa_annot[col_pair][0]["coverage"]
                         if cnt_col > match_score:
@@ -392,7 +766,7 @@ class Baseline_Model(AbstractAnnotationModel):
                             match_column = entity_col
                 if match_column is not None:
                     ## discard related column pair
-                    self.unrelated_col_pairs.remove(Column_Pair(head_col_index=match_column, tail_col_index=literal_col))
+                    self.unrelated_col_pairs.remove(self._pair(match_column, literal_col))
                         
     def _context_scoring(self):
         """
@@ -403,47 +777,118 @@ class Baseline_Model(AbstractAnnotationModel):
         + if context is literal, use "_literal_context_scoring" for the calculation 
             the score is weighted by self.literal_context_weight, normally, this value is small (0.15) as we do not trust much in literal context 
                 since it maybe usually noisy and we lack an effective strategie for detecting, normalizing type, comparing literal value.
+        Rows are scored by params["context_workers"] processes if the table is large enough (see _parallel_context_scoring).
         """
+        self._reset_context_scores()
+        ## flat (candidate index * num_columns + context column) views of context_scores and has_context:
+        ##     plain Python lists for the scalar updates of _score_context_rows, turned into the arrays at the end.
+        ncols = self.num_columns
+        scores = [0.0]*(len(self._cands)*ncols)
+        has_context = [False]*len(scores)
+        rows = range(self.first_data_row, self.num_rows)
+        num_workers = min(self.params.get("context_workers", 1), len(rows) // _MIN_ROWS_PER_CONTEXT_WORKER)
+        if num_workers > 1 and "fork" in multiprocessing.get_all_start_methods():
+            self._parallel_context_scoring(rows, num_workers, scores, has_context)
+        else:
+            self._score_context_rows(rows, scores, has_context)
+        self.context_scores = np.array(scores, dtype=np.float64).reshape(-1, ncols)
+        self.has_context = np.array(has_context, dtype=bool).reshape(-1, ncols)
+
+    def _parallel_context_scoring(self, rows, num_workers, scores, has_context):
+        """
+        Score chunks of consecutive rows in forked worker processes, which share the model state (subgraphs, KB readers) copy-on-write.
+        Rows only write the context scores of their own candidates, so the results of the chunks are merged in row order:
+        the cpa candidates cached by a first chunk are kept, the literal cpa candidates found by each chunk are appended.
+        """
+        global _FORKED_MODEL
+        chunk_size = -(-len(rows) // num_workers)
+        chunks = [rows[i:i+chunk_size] for i in range(0, len(rows), chunk_size)]
+        _FORKED_MODEL = self
+        try:
+            with ProcessPoolExecutor(max_workers=num_workers, mp_context=multiprocessing.get_context("fork")) as executor:
+                results = list(executor.map(_score_context_rows_in_worker, chunks))
+        finally:
+            _FORKED_MODEL = None
+        for chunk_scores, chunk_paths, chunk_cpa_candidates, chunk_pair_scores, chunk_cache_stats in results:
+            for k, score in chunk_scores:
+                scores[k] = score
+                has_context[k] = True
+            self.context_paths.update(chunk_paths)
+            for key, relations in chunk_cpa_candidates.items():
+                if key in chunk_pair_scores: ## entity cpa candidates are the same whichever row found them
+                    self.cached_cpa_candidates.setdefault(key, relations)
+                    continue
+                ## literal cpa candidates
+                seen = self._cached_cpa_seen.setdefault(key, set())
+                cached_relations = self.cached_cpa_candidates.setdefault(key, [])
+                for relation in relations:
+                    if relation[0] not in seen:
+                        seen.add(relation[0])
+                        cached_relations.append(relation)
+            for key, pair_score in chunk_pair_scores.items():
+                self._pair_score_cache.setdefault(key, pair_score)
+            for stat, value in chunk_cache_stats.items():
+                self.cache_stats[stat] += value
+
+    def _score_context_rows(self, rows, scores, has_context):
+        """ Context scores of the candidates of the given rows, see _context_scoring """
+        sim_scores = self.entity_sim_scores.tolist() ## plain floats for scalar reads in the loops below.
+        matchers_by_col = self._literal_matchers_by_column()
+        cand_index = self._cand_index
+        ncols = self.num_columns
+        paths = self.context_paths
         ## browsing all table cells to calculate context scores.
-        for row_idx in range(self.first_data_row, self.num_rows):   
+        for row_idx in rows:   
             # print(f"Entity Scoring step: finished {row_idx+self.first_data_row}/{self.num_rows} table rows.")
             ## semantic context calculation
             for i in range(len(self.entity_cols)-1):
                 head_col = self.entity_cols[i]
                 head_mention = self.table[row_idx][head_col]
-                head_cell = Cell(row_index=row_idx, col_index=head_col)
+                head_cell = cell_key(row_idx, head_col)
                 if not self.lookup.get(head_cell, []):
                     ## tail candidate has no context at head_col, just set its context score at this column to 0.1
                     for j in range(i+1, len(self.entity_cols)):
                         tail_col = self.entity_cols[j]
                         tail_mention = self.table[row_idx][tail_col]
-                        tail_cell = Cell(row_index=row_idx, col_index=tail_col)
+                        tail_cell = cell_key(row_idx, tail_col)
                         for tail_id in self.lookup.get(tail_cell, []):
-                            tail_candidate = Candidate_Entity(row_index=row_idx, col_index=tail_col, id=tail_id) 
+                            tail_candidate = self._cand(row_idx, tail_col, tail_id) 
                             ## initialize the context score of tail_candidate at column "head_col".
-                            ## "context" entry stores relations.
-                            self.entity_context_scores[tail_candidate][head_col] = {"weight": self.semantic_context_weight, "score": 0.1, "context": []}  
+                            tail_k = cand_index[tail_candidate]*ncols + head_col
+                            scores[tail_k] = 0.1
+                            has_context[tail_k] = True
                 else:
+                    ## similarity threshold for the head mention to be a context of tail candidates, fixed for the cell.
+                    head_threshold = 0.7 if len(head_mention) > 5 else 0.9
                     for head_id in self.lookup[head_cell]:
-                        head_candidate = Candidate_Entity(row_index=head_cell.row_index, col_index=head_cell.col_index, id=head_id) 
+                        head_candidate = self._cand(row_idx, head_col, head_id) 
+                        head_idx = cand_index[head_candidate]
+                        head_sim_score = sim_scores[head_idx]
                         ## get entity_subgraph of head candidate entity.
                         G_head = {}      
-                        if head_id in self.G_memory:
+                        if self.G_csr is not None:
+                            G_head = self.G_csr.row(head_id)
+                        elif head_id in self.G_memory:
                             G_head = self.G_memory[head_id]["entity"]
                         for j in range(i+1, len(self.entity_cols)):
                             tail_col = self.entity_cols[j]
                             tail_mention = self.table[row_idx][tail_col]
-                            tail_cell = Cell(row_index=row_idx, col_index=tail_col)
+                            tail_cell = cell_key(row_idx, tail_col)
+                            ## similarity threshold for the tail mention to be a context of head candidates, fixed for the cell.
+                            tail_threshold = 0.7 if len(tail_mention) > 5 else 0.9
                             ## initialize the context score of head_candidate at column "tail_col".
-                            ## "context" entry stores relations.
-                            self.entity_context_scores[head_candidate][tail_col] = {"weight": self.semantic_context_weight, "score": 0.1, "context": []}
+                            head_k = head_idx*ncols + tail_col
+                            scores[head_k] = 0.1
+                            has_context[head_k] = True
                             if tail_cell in self.lookup:
                                 for tail_id in self.lookup[tail_cell]:
-                                    tail_candidate = Candidate_Entity(row_index=tail_cell.row_index, col_index=tail_cell.col_index, id=tail_id) 
-                                    if head_col not in self.entity_context_scores[tail_candidate]:
+                                    tail_candidate = self._cand(row_idx, tail_col, tail_id) 
+                                    tail_idx = cand_index[tail_candidate]
+                                    tail_k = tail_idx*ncols + head_col
+                                    if not has_context[tail_k]:
                                         ## initialize the context score of tail_candidate at column "head_col".
-                                        ## "context" entry stores relations.
-                                        self.entity_context_scores[tail_candidate][head_col] = {"weight": self.semantic_context_weight, "score": 0.1, "context": []}
+                                        scores[tail_k] = 0.1
+                                        has_context[tail_k] = True
 
                                     ## calculate context score of head candidate w.r.t tail column and score of tail candidate w.r.t. head column.
                                     # Since the context score is calculated based (head_candidate, tail_candidate) subgraph intersections, we can, at the same time, update the score for both 
@@ -457,21 +902,29 @@ class Baseline_Model(AbstractAnnotationModel):
                                     #     Ref: Ciampaglia GL, Shiralkar P, Rocha LM, Bollen J, Menczer F, et al. (2015) Correction: Computational Fact Checking from Knowledge Networks. 
                                     if head_id != tail_id:
                                         ## cache predicate paths for CPA along with its semantic proximity
-                                        semantic_proximities = {}
+                                        path_proximities = () ## frozen (path, proximity) items, shared with the pair caches.
                                         # many predicate paths can be found between a candidate pair. 
                                         # The final semantic proximity is max of all semantic proximities of predicate paths existing beetween candidate pair.
                                         best_semantic_proximity = 0.0
-                                        if (head_id, tail_id) in self.cached_cpa_candidates: 
+                                        candidate_pair = (head_id, tail_id)
+                                        if candidate_pair in self.cached_cpa_candidates: 
                                             ## (head_candidate, tail_candidate) is cached
-                                            cpa_candidates = self.cached_cpa_candidates[(head_id, tail_id)]
-                                            for a_cpa_candidate in cpa_candidates:
-                                                best_semantic_proximity = max(best_semantic_proximity, a_cpa_candidate.semantic_proximity)
-                                                semantic_proximities[a_cpa_candidate.id] = a_cpa_candidate.semantic_proximity
+                                            self.cache_stats["hits"] += 1
+                                            best_semantic_proximity, path_proximities = self._pair_score_cache[candidate_pair]
+                                        elif candidate_pair in self.pair_proximity_memo:
+                                            ## intersection already done for this pair, but not (yet) reliable enough to be a cpa candidate.
+                                            self.cache_stats["hits"] += 1
+                                            self.pair_proximity_memo.move_to_end(candidate_pair)
+                                            best_semantic_proximity, path_proximities = self.pair_proximity_memo[candidate_pair]
                                         else:
                                             ## (head_candidate, tail_candidate) is not cached
+                                            self.cache_stats["misses"] += 1
+                                            semantic_proximities = {}
                                             ## get entity_subgraph of tail candidate entity.
                                             G_tail = {}      
-                                            if tail_id in self.G_memory:
+                                            if self.G_csr is not None:
+                                                G_tail = self.G_csr.row(tail_id)
+                                            elif tail_id in self.G_memory:
                                                 G_tail = self.G_memory[tail_id]["entity"]
                                             ##  find the intersection of subgraph of head and tail.
                                             ## do subgraph intersection to see whether head candidate entity and tail candidate entity are connected
@@ -484,49 +937,66 @@ class Baseline_Model(AbstractAnnotationModel):
                                                 best_semantic_proximity = 1.0
                                                 # if (head_candidate.id, tail_candidate.id) not in self.cached_cpa_candidates:
                                                 # self.cached_cpa_candidates[(head_candidate.id, tail_candidate.id)] = []
-                                                for prop in G_head[tail_id]:
+                                                for prop in islice(G_head[tail_id], self.max_context_paths):
                                                     semantic_proximities[prop.pid] = best_semantic_proximity
                                             elif self.multiHop_context:
                                                 ## check whether head candidate and tail candidate are connected via intermediate nodes.
                                                 ##  find the intersection of subgraph of head and tail.     
-                                                G_intersect = G_head.keys() & G_tail.keys()           
-                                                if G_intersect:
-                                                    ## subgraphs of head and tail candidate are overlapping.
-                                                    ## retrieve predicate paths linking head candidate to tail candidate.
-                                                    ## we use "::" to seperate two predicates in the path.
-                                                    ## browsing the subgraph intersection to find the predicate paths.
-                                                    for node in G_intersect:
-                                                        num_edges = self.KB.get_num_edges(node)
-                                                        if num_edges:
-                                                            node_popularity = 1/(2 + math.log10(2+num_edges))
-                                                        else:
-                                                            node_popularity = 0.0
-                                                        if node_popularity > 0:                                
-                                                            for prop_head in G_head[node]:
-                                                                rel_head = prop_head.pid
-                                                                for prop_tail in G_tail[node]:
-                                                                    rel_tail = prop_tail.pid
-                                                                    ## reverse the direction of rel_tail
-                                                                    if rel_tail[:3] == "(-)": ## if rel_tail is a backward relation
-                                                                        rel_tail = rel_tail.replace("(-)","") 
-                                                                    else:
-                                                                        rel_tail = "(-)" + rel_tail        
-                                                                    ## check 
-                                                                    if rel_head == rel_tail:
-                                                                        if rel_head.replace("(-)", "") in self.KB.transitivePID: 
-                                                                            a_cpa_candidate = rel_head
-                                                                            semantic_proximity = 1.0 ## transitive path get highest weight
+                                                if self.G_csr is not None:
+                                                    ## most candidate pairs are unrelated: skip the intersection when the subgraph signatures are disjoint.
+                                                    if self.G_csr.may_share_nodes(head_id, tail_id):
+                                                        best_semantic_proximity = self._csr_multihop_paths(G_head, G_tail, semantic_proximities)
+                                                else:
+                                                    G_intersect = G_head.keys() & G_tail.keys()           
+                                                    if G_intersect:
+                                                        ## subgraphs of head and tail candidate are overlapping.
+                                                        ## retrieve predicate paths linking head candidate to tail candidate.
+                                                        ## we use "::" to seperate two predicates in the path.
+                                                        ## browsing the subgraph intersection to find the predicate paths.
+                                                        ## popularity of all the intersection nodes in one batch read.
+                                                        num_edges_of_nodes = self.KB.get_num_edges_batch(G_intersect)
+                                                        for node in G_intersect:
+                                                            num_edges = num_edges_of_nodes[node]
+                                                            if num_edges:
+                                                                node_popularity = 1/(2 + math.log10(2+num_edges))
+                                                            else:
+                                                                node_popularity = 0.0
+                                                            if node_popularity > 0:                                
+                                                                for prop_head in G_head[node]:
+                                                                    rel_head = prop_head.pid
+                                                                    head_is_backward = rel_head.startswith("(-)")
+                                                                    for prop_tail in G_tail[node]:
+                                                                        rel_tail = prop_tail.pid
+                                                                        ## reverse the direction of rel_tail
+                                                                        reversed_tail_is_backward = not rel_tail.startswith("(-)")
+                                                                        if not reversed_tail_is_backward: ## if rel_tail is a backward relation, its reverse is forward
+                                                                            rel_tail = rel_tail.replace("(-)","") 
                                                                         else:
-                                                                            a_cpa_candidate = rel_head + "::" + rel_tail
-                                                                            semantic_proximity = node_popularity
-                                                                    else:
-                                                                        a_cpa_candidate = rel_head + "::" + rel_tail
-                                                                        if (rel_head[:3] == "(-)" and rel_tail[:3] != "(-)") or (rel_head[:3] != "(-)" and rel_tail[:3] == "(-)"):
-                                                                            semantic_proximity = node_popularity/1.75
+                                                                            rel_tail = "(-)" + rel_tail        
+                                                                        ## check 
+                                                                        if rel_head == rel_tail:
+                                                                            if rel_head.replace("(-)", "") in self.KB.transitivePID: 
+                                                                                a_cpa_candidate = rel_head
+                                                                                semantic_proximity = 1.0 ## transitive path get highest weight
+                                                                            else:
+                                                                                a_cpa_candidate = rel_head + "::" + rel_tail
+                                                                                semantic_proximity = node_popularity
                                                                         else:
-                                                                            semantic_proximity = node_popularity
-                                                                    best_semantic_proximity = max(best_semantic_proximity, semantic_proximity)
-                                                                    semantic_proximities[a_cpa_candidate] = min(semantic_proximities.get(a_cpa_candidate, semantic_proximity), semantic_proximity)
+                                                                            a_cpa_candidate = rel_head + "::" + rel_tail
+                                                                            if head_is_backward != reversed_tail_is_backward:
+                                                                                semantic_proximity = node_popularity/1.75
+                                                                            else:
+                                                                                semantic_proximity = node_popularity
+                                                                        best_semantic_proximity = max(best_semantic_proximity, semantic_proximity)
+                                                                        semantic_proximities[a_cpa_candidate] = min(semantic_proximities.get(a_cpa_candidate, semantic_proximity), semantic_proximity)
+                                                                if self._saturated_paths(best_semantic_proximity, semantic_proximities):
+                                                                    break
+
+                                            path_proximities = tuple(semantic_proximities.items())
+                                            ## unconnected pairs (best semantic proximity 0) are memoized too, within the same bound.
+                                            self.pair_proximity_memo[candidate_pair] = (best_semantic_proximity, path_proximities)
+                                            if len(self.pair_proximity_memo) > self.pair_proximity_memo_capacity:
+                                                self.pair_proximity_memo.popitem(last=False)
 
                                         ## cache predicate paths for CPA.
                                         ## and update the final semantic proximity for (head_candidate, tail_candidate) pair since a candidate pair may have
@@ -535,52 +1005,50 @@ class Baseline_Model(AbstractAnnotationModel):
                                         #    we update their context score.
                                         if best_semantic_proximity > 0.0:
                                             ## context score for head candidate
-                                            if len(tail_mention) > 5:
-                                                threshold = 0.7
-                                            else:
-                                                threshold = 0.9
-                                            if self.entity_sim_scores[tail_candidate] >= threshold:
-                                                head_score = max(0.1, best_semantic_proximity*self.entity_sim_scores[tail_candidate])
+                                            tail_sim_score = sim_scores[tail_idx]
+                                            if tail_sim_score >= tail_threshold:
+                                                head_score = max(0.1, best_semantic_proximity*tail_sim_score)
                                             else:
                                                 head_score = 0.1
-                                            self.entity_context_scores[head_candidate][tail_candidate.col_index]["score"] = max(self.entity_context_scores[head_candidate][tail_candidate.col_index]["score"], head_score)
+                                            scores[head_k] = max(scores[head_k], head_score)
                                             ## context score for tail candidate
-                                            if len(head_mention) > 5:
-                                                threshold = 0.7
-                                            else:
-                                                threshold = 0.9
-                                            if self.entity_sim_scores[head_candidate] >= threshold:
-                                                tail_score = max(0.1, best_semantic_proximity*self.entity_sim_scores[head_candidate])
+                                            if head_sim_score >= head_threshold:
+                                                tail_score = max(0.1, best_semantic_proximity*head_sim_score)
                                             else:
                                                 tail_score = 0.1
-                                            self.entity_context_scores[tail_candidate][head_candidate.col_index]["score"] = max(self.entity_context_scores[tail_candidate][head_candidate.col_index]["score"], tail_score) 
+                                            scores[tail_k] = max(scores[tail_k], tail_score)
                                             if head_score > 0.1 or tail_score > 0.1:
                                                 ## two graphs are considered as reliably connected, cache predicate paths.
                                                 if (head_id, tail_id) not in self.cached_cpa_candidates:
-                                                    self.cached_cpa_candidates[(head_id, tail_id)] = []
-                                                    for a_cpa_candidate, cpa_score in semantic_proximities.items():                            
-                                                        self.cached_cpa_candidates[(head_id, tail_id)].append(Relation(id=a_cpa_candidate, semantic_proximity=cpa_score))   
+                                                    ## the frozen (path, proximity) items are shared, not copied into new relation objects.
+                                                    self.cached_cpa_candidates[(head_id, tail_id)] = path_proximities
+                                                    ## what the cached branch above reads back: best proximity among the cached paths, and the paths.
+                                                    self._pair_score_cache[(head_id, tail_id)] = (max((cpa_score for _, cpa_score in path_proximities), default=0.0), path_proximities)
                                                 ## cache the contexts from which the score is calculated.
-                                                for a_cpa_candidate, cpa_score in semantic_proximities.items():                            
-                                                    self.entity_context_scores[head_candidate][tail_col]["context"].append(a_cpa_candidate)
-                                                    self.entity_context_scores[tail_candidate][head_col]["context"].append(a_cpa_candidate)
+                                                if path_proximities:
+                                                    head_paths = paths.setdefault((head_idx, tail_col), [])
+                                                    tail_paths = paths.setdefault((tail_idx, head_col), [])
+                                                    for a_cpa_candidate, cpa_score in path_proximities:                            
+                                                        head_paths.append(a_cpa_candidate)
+                                                        tail_paths.append(a_cpa_candidate)
 
             ## literal context calculation
             for entity_col in self.entity_cols:
-                entity_cell = Cell(row_index=row_idx, col_index=entity_col)
+                entity_cell = cell_key(row_idx, entity_col)
                 if entity_cell in self.lookup:
                     for entity_id in self.lookup[entity_cell]:
                         ## get the literal subgraph of the entity.
                         G_literal_entity = {}      
                         if entity_id in self.G_memory:
                             G_literal_entity = self.G_memory[entity_id]["literal"]
-                        entity_candidate = Candidate_Entity(row_index=row_idx, col_index=entity_col, id=entity_id)               
+                        entity_idx = cand_index[self._cand(row_idx, entity_col, entity_id)]
                         for literal_col in self.literal_cols:
                             if literal_col < entity_col: ## literal column should stay after entity column
                                 continue
-                            ## initialize the context score of head_candidate at literal column "tail_col".
-                            ## "context" entry stores relations.
-                            self.entity_context_scores[entity_candidate][literal_col] = {"weight": self.literal_context_weight, "score": 0.1, "context": []}
+                            ## initialize the context score of the candidate at literal column "literal_col".
+                            literal_k = entity_idx*ncols + literal_col
+                            scores[literal_k] = 0.1
+                            has_context[literal_k] = True
                             literal_mention = self.table[row_idx][literal_col]
                             ## calculate context score of head candidate w.r.t this literal column
                             # Calculating context score between the literal subgraph of the entity and the literal context cell.
@@ -588,93 +1056,135 @@ class Baseline_Model(AbstractAnnotationModel):
                             #             + quantity comparison (number)
                             #             + string comparison  
                             ## browsing the subgraph and compare each literal node with the literal context cell.
+                            literal_matchers = matchers_by_col[literal_col]
+                            if not literal_matchers:
+                                continue
                             for obj, props in G_literal_entity.items():
                                 for prop in props:
-                                    ## if a literal node is considered to be valid (is_possible_valid_rel is True), we cache its associated property for the CPA task.
-                                    ##  in order to avoid refinding the property from KB.
-                                    # is_possible_valid_rel = False
-                                    matching_score = 0.0
-                                    # if "::" not in prop.pid:
-                                    if True:
-                                        if prop.info.split("-")[0] == "DateTime" and literal_col in self.date_cols:
-                                            if prop.info.split("-")[1] != "Period":
-                                                ## compare two date values.
-                                                if utils.date_similarity(obj, literal_mention, operator.eq):
-                                                    matching_score = 1.0
-                                                else: ## approximately compare two date values by its years (ignoring day, month, others), this case gets lower matching score.
-                                                    year_obj = utils.get_year_from_date(obj)
-                                                    year_cell = utils.get_year_from_date(literal_mention)
-                                                    if utils.date_similarity(year_obj, year_cell, operator.eq):
-                                                        matching_score = 0.8                        
-                                            else:
-                                                ## compare two period of time
-                                                obj_start_date, obj_end_date = obj.split(":")
-                                                new_literal_date = literal_mention.replace("[", "").replace("]", "").replace("(", "").replace(")", "")
-                                                new_literal_date = unidecode.unidecode(new_literal_date).split("-") ## use unidecode to normalize variants of dash splitter to unicode 
-                                                if len(new_literal_date) == 2:
-                                                    if utils.date_similarity(obj_start_date, new_literal_date[0], operator.eq) and \
-                                                                        utils.date_similarity(obj_end_date, new_literal_date[1], operator.eq):
-                                                        matching_score = 1.0
-                                            if matching_score:
-                                                self.entity_context_scores[entity_candidate][literal_col]["score"] = matching_score
-                                                self.entity_context_scores[entity_candidate][literal_col]["context"].append(prop.pid)
-
-                                        elif prop.info.split("-")[0] == "String" and literal_col in self.textual_cols:
-                                            ## compare two string values.
-                                            sim = utils.textual_similarity(obj, literal_mention)
-                                            if sim > 0.9: ## high threshold for the selection, since textual context is not very trustable.
-                                                # is_possible_valid_rel = True
-                                                matching_score = sim
-                                                self.entity_context_scores[entity_candidate][literal_col]["score"] = max(self.entity_context_scores[entity_candidate][literal_col]["score"], sim)    
-                                                self.entity_context_scores[entity_candidate][literal_col]["context"].append(prop.pid)
-                                        ## compare two dimensionless numeral values
-                                        elif prop.info.split("-")[0] == "Quantity": ## "1" indicates property in Wikidata has no unit. 
-                                            prop_unit = prop.info.split("-")[1].replace("http://www.wikidata.org/entity/", "")
-                                            if literal_col in self.numeral_cols["without_unit"]:
-                                                pass
-                                                ## compare two quantity values.
-                                                # sim = utils.dimensionless_quantity_similarity(obj, literal_mention)
-                                                # if sim >= 0.98: ## high threshold for the selection, since numeral context is not very trustable.
-                                                #     matching_score = sim
-                                                #     self.entity_context_scores[entity_candidate][literal_col]["score"] = max(self.entity_context_scores[entity_candidate][literal_col]["score"], sim) 
-                                                #     self.entity_context_scores[entity_candidate][literal_col]["context"].append(prop.pid)
-                                            else:
-                                                if literal_col in self.numeral_cols["with_unit"] and prop_unit != "1" : ## != "1" indicates that property in Wikidata has unit. 
-                                                    ## compare two quantity values
-                                                    ## get the dimension of unit entity in KG.
-                                                    unit_dim_of_obj = self.KB.get_symbol_of_unit_entity(prop_unit)
-                                                    ## standardize measurement in obj to base unit
-                                                    standardized_obj = utils.standardize_to_base_unit({"value": obj, "unit": unit_dim_of_obj})
-                                                    ## parse and standardize the unit form of literal table cell.
-                                                    standardized_literal_cell = utils.standardize_to_base_unit(literal_mention)
-                                                    if standardized_obj:
-                                                        base_unit_of_obj = list(standardized_obj.keys())[0]
-                                                        if len(standardized_literal_cell) == 1:
-                                                            ## only 1 base unit in literal cell
-                                                            if base_unit_of_obj in standardized_literal_cell and len(standardized_literal_cell[base_unit_of_obj]) == 1:
-                                                                ## if literal cell has same base unit as KG obj and has only one measurement.
-                                                                ##  then compare two corresponding measurements.
-                                                                sim = utils.dimensionless_quantity_similarity(standardized_obj[base_unit_of_obj][0], standardized_literal_cell[base_unit_of_obj][0])
-                                                                ##  if the comparison involves currency, it should be more tolerant of dissimilarity since money quantities usually change over times.
-                                                                if base_unit_of_obj == "dollar": ## to check if is is money quantities, look at its base unit (dollar)
-                                                                    matching_threshold = 0.75
-                                                                else:
-                                                                    matching_threshold = 0.95
-                                                                if sim > matching_threshold: ## high threshold for the selection, since numeral context is not very trustable.
-                                                                    matching_score = sim
-                                                                    self.entity_context_scores[entity_candidate][literal_col]["score"] = max(self.entity_context_scores[entity_candidate][literal_col]["score"], sim) 
-                                                                    self.entity_context_scores[entity_candidate][literal_col]["context"].append(prop.pid)
-
-                                        ## if the neighbor node is a valid, we cache the property pointing to it for CPA.
-                                        ##     apart from ID, we also store the its "semantic_proximity" which plays as its level of preference as CPA.
-                                        ##     in literal context, all relations have same preference.
-                                        if matching_score:
-                                            a_cpa_candidate = prop.pid
-                                            if (entity_id, literal_mention) not in self.cached_cpa_candidates:
-                                                self.cached_cpa_candidates[(entity_id, literal_mention)] = []
-                                            if Relation(id=a_cpa_candidate, semantic_proximity=self.literal_context_weight) not in self.cached_cpa_candidates[(entity_id, literal_mention)]:
-                                                self.cached_cpa_candidates[(entity_id, literal_mention)].append(Relation(id=a_cpa_candidate, semantic_proximity=1.0))
-                            
+                                    matcher = literal_matchers.get(prop.kind)
+                                    if matcher is None:
+                                        continue
+                                    matching_score = matcher(obj, literal_mention, prop)
+                                    ## if the neighbor node is a valid, we cache the property pointing to it for CPA.
+                                    ##     apart from ID, we also store the its "semantic_proximity" which plays as its level of preference as CPA.
+                                    ##     in literal context, all relations have same preference.
+                                    if matching_score:
+                                        if prop.kind == EdgeKind.DATETIME: ## a matching date sets the score, the others only raise it.
+                                            scores[literal_k] = matching_score
+                                        else:
+                                            scores[literal_k] = max(scores[literal_k], matching_score)
+                                        paths.setdefault((entity_idx, literal_col), []).append(prop.pid)
+                                        a_cpa_candidate = prop.pid
+                                        seen = self._cached_cpa_seen.setdefault((entity_id, literal_mention), set())
+                                        if a_cpa_candidate not in seen:
+                                            seen.add(a_cpa_candidate)
+                                            self.cached_cpa_candidates.setdefault((entity_id, literal_mention), []).append((a_cpa_candidate, 1.0))
+
+    def _literal_column_kind(self, col_idx):
+        """ Kind of a literal column, as found by _disambiguate_literal_columns (or lookup_task for demoted entity columns) """
+        if col_idx in self.date_cols:
+            return ColumnKind.DATE
+        if col_idx in self.textual_cols:
+            return ColumnKind.TEXTUAL
+        if col_idx in self.numeral_cols["without_unit"]:
+            return ColumnKind.NUMERAL_WITHOUT_UNIT
+        if col_idx in self.numeral_cols["with_unit"]:
+            return ColumnKind.NUMERAL_WITH_UNIT
+        return ColumnKind.OTHER
+
+    ## literal matcher per (edge kind, literal column kind), other combinations are never compared.
+    ##     dimensionless numerals (NUMERAL_WITHOUT_UNIT) are not compared since numeral context is not very trustable.
+    _LITERAL_MATCHERS = {
+        (EdgeKind.DATETIME, ColumnKind.DATE): "_match_date_literal",
+        (EdgeKind.STRING, ColumnKind.TEXTUAL): "_match_string_literal",
+        (EdgeKind.QUANTITY, ColumnKind.NUMERAL_WITH_UNIT): "_match_quantity_literal",
+    }
+
+    def _literal_matchers_by_column(self):
+        """ {literal col: {edge kind: bound matcher}} for the literal columns of the table """
+        matchers_by_col = {}
+        for col_idx in self.literal_cols:
+            col_kind = self._literal_column_kind(col_idx)
+            matchers_by_col[col_idx] = {edge_kind: getattr(self, name) for (edge_kind, a_col_kind), name in self._LITERAL_MATCHERS.items() 
+                                            if a_col_kind == col_kind}
+        return matchers_by_col
+
+    def _match_date_literal(self, obj, literal_mention, prop):
+        """ Compare a date (or period of time) node with a date cell, return the matching score """
+        matching_score = 0.0
+        if prop.subtype != "Period":
+            ## compare two date values.
+            if utils.date_equal(obj, literal_mention):
+                matching_score = 1.0
+            else: ## approximately compare two date values by its years (ignoring day, month, others), this case gets lower matching score.
+                year_obj = utils.get_year_from_date(obj)
+                year_cell = self._cell_years.get(literal_mention)
+                if year_cell is None:
+                    year_cell = self._cell_years[literal_mention] = utils.get_year_from_date(literal_mention)
+                if utils.date_equal(year_obj, year_cell):
+                    matching_score = 0.8                        
+        else:
+            ## compare two period of time
+            obj_start_date, obj_end_date = obj.split(":")
+            new_literal_date = self._cell_periods.get(literal_mention)
+            if new_literal_date is None:
+                new_literal_date = _PERIOD_BRACKETS_RE.sub("", literal_mention)
+                new_literal_date = self._cell_periods[literal_mention] = unidecode.unidecode(new_literal_date).split("-") ## use unidecode to normalize variants of dash splitter to unicode 
+            if len(new_literal_date) == 2:
+                if utils.date_equal(obj_start_date, new_literal_date[0]) and utils.date_equal(obj_end_date, new_literal_date[1]):
+                    matching_score = 1.0
+        return matching_score
+
+    def _match_string_literal(self, obj, literal_mention, prop):
+        """ Compare a string node with a textual cell, return the matching score """
+        ## compare two string values.
+        sim = utils.textual_similarity(obj, literal_mention)
+        if sim > 0.9: ## high threshold for the selection, since textual context is not very trustable.
+            return sim
+        return 0.0
+
+    def _match_quantity_literal(self, obj, literal_mention, prop):
+        """ Compare a quantity node with a numeral-with-unit cell, return the matching score """
+        prop_unit = prop.subtype
+        if prop_unit == "1": ## "1" indicates property in Wikidata has no unit. 
+            return 0.0
+        ## compare two quantity values
+        ## both sides are parsed (quantulum, pint) once, then only their magnitudes are compared.
+        obj_key = (obj, prop_unit)
+        if obj_key not in self._standardized_objs:
+            ## get the dimension of unit entity in KG.
+            unit_dim_of_obj = self.KB.get_symbol_of_unit_entity(prop_unit)
+            ## standardize measurement in obj to base unit
+            standardized_obj = utils.standardize_to_base_unit({"value": obj, "unit": unit_dim_of_obj})
+            self._standardized_objs[obj_key] = next(((unit, magnitudes[0]) for unit, magnitudes in standardized_obj.items()), None)
+        if literal_mention not in self._standardized_cells:
+            ## parse and standardize the unit form of literal table cell.
+            ##     only a cell with 1 base unit and 1 measurement can be compared.
+            standardized_literal_cell = utils.standardize_to_base_unit(literal_mention)
+            measure = None
+            if len(standardized_literal_cell) == 1:
+                unit, magnitudes = next(iter(standardized_literal_cell.items()))
+                if len(magnitudes) == 1:
+                    measure = (unit, magnitudes[0])
+            self._standardized_cells[literal_mention] = measure
+        obj_measure = self._standardized_objs[obj_key]
+        cell_measure = self._standardized_cells[literal_mention]
+        if obj_measure is not None:
+            base_unit_of_obj = obj_measure[0]
+            if cell_measure is not None:
+                if cell_measure[0] == base_unit_of_obj:
+                    ## if literal cell has same base unit as KG obj and has only one measurement.
+                    ##  then compare two corresponding measurements.
+                    sim = utils.dimensionless_quantity_similarity(obj_measure[1], cell_measure[1])
+                    ##  if the comparison involves currency, it should be more tolerant of dissimilarity since money quantities usually change over times.
+                    if base_unit_of_obj == "dollar": ## to check if is is money quantities, look at its base unit (dollar)
+                        matching_threshold = 0.75
+                    else:
+                        matching_threshold = 0.95
+                    if sim > matching_threshold: ## high threshold for the selection, since numeral context is not very trustable.
+                        return sim
+        return 0.0
+
     def _literal_similarity_scoring(self):
         """
         Calculate the literal similarity scores w.r.t target mention for all candidate entities of all semantic cells 
@@ -682,20 +1192,118 @@ class Baseline_Model(AbstractAnnotationModel):
         """
         if self.lookup_scores:
             ## if scores are already calculated in lookup API, no need to recalculate.
-            for candidate in self.entity_sim_scores:
-                self.entity_sim_scores[candidate] = self.lookup_scores[candidate]
+            self.entity_sim_scores = np.fromiter((self.lookup_scores[candidate] for candidate in self._cands), dtype=np.float64, count=len(self._cands))
             ## lookup_scores is not needed anymore, clear it to save memory
             self.lookup_scores = {}
 
         else:
-            for candidate in self.entity_sim_scores:
-                mention = self.table[candidate.row_index][candidate.col_index]
-                candidate_labels_and_aliases = self.KB.get_label_of_entity(candidate.id)
-                candidate_labels, candidate_aliases = candidate_labels_and_aliases["labels"], candidate_labels_and_aliases["aliases"]
-                score_wrt_labels = max([utils.textual_similarity(mention, label) for label in candidate_labels], default=0.0)
-                score_wrt_aliases = max([utils.textual_similarity(mention, aliase) for aliase in candidate_aliases], default=0.0)
-                sim_score = max(score_wrt_labels, 0.9*score_wrt_aliases)
-                self.entity_sim_scores[candidate] = sim_score
+            ## candidates of a same mention are scored together: one batch comparison per mention against all their labels and aliases.
+            cands_by_mention = defaultdict(list)
+            for cand_idx, candidate in enumerate(self._cands):
+                cands_by_mention[self.table[candidate.row_index][candidate.col_index]].append(cand_idx)
+            names = self.KB.get_names_of_entities(list({candidate.id for candidate in self._cands}))
+            for mention, cand_idxs in cands_by_mention.items():
+                label_idxs, alias_idxs, flat_names = [], [], []
+                for cand_idx in cand_idxs:
+                    entity_names = names[self._cands[cand_idx].id]
+                    label_idxs.append(len(flat_names))
+                    flat_names.extend(entity_names["labels"])
+                    alias_idxs.append(len(flat_names))
+                    flat_names.extend(entity_names["aliases"])
+                label_idxs.append(len(flat_names))
+                sims = utils.textual_similarities(mention, flat_names)
+                for i, cand_idx in enumerate(cand_idxs):
+                    ## labels of the i-th candidate are sims[label_idxs[i]:alias_idxs[i]], its aliases sims[alias_idxs[i]:label_idxs[i+1]].
+                    score_wrt_labels = sims[label_idxs[i]:alias_idxs[i]].max(initial=0.0)
+                    score_wrt_aliases = sims[alias_idxs[i]:label_idxs[i+1]].max(initial=0.0)
+                    self.entity_sim_scores[cand_idx] = max(score_wrt_labels, 0.9*score_wrt_aliases)
+
+    def _context_cols(self):
+        """ Context columns, in the order in which the contexts of a candidate are scored: entity columns then literal columns """
+        return self.entity_cols + self.literal_cols
+
+    def _context_col_pair(self, cand_col, col_idx):
+        """ Column pair linking a candidate column to one of its context columns, as keyed in cpa_annot """
+        if col_idx < cand_col and col_idx in self._entity_col_set:
+            return self._pair(col_idx, cand_col)
+        return self._pair(cand_col, col_idx)
+
+    def _related_context_cols(self):
+        """ (candidate column, context column) -> whether the column pair has a CPA and is not discarded as unrelated """
+        related = np.zeros((self.num_columns, self.num_columns), dtype=bool)
+        for cand_col in self.entity_cols:
+            for col_idx in self._context_cols():
+                col_pair = self._context_col_pair(cand_col, col_idx)
+                related[cand_col, col_idx] = col_pair not in self.unrelated_col_pairs and col_pair in self.cpa_annot
+        return related
+
+    def _column_pair_cpas(self, cand_col, col_idx):
+        """ CPAs of the column pair linking a candidate column to a context column, as 
+            (CPA id, scale factor: coverage * semantic proximity, pid the subgraph of a candidate must contain, CPA) 
+            the pid is reversed when the candidate is the tail of the column pair. """
+        cpas = []
+        for a_cpa in self.cpa_annot[self._context_col_pair(cand_col, col_idx)]:
+            if col_idx < cand_col and col_idx in self._entity_col_set:
+                if "(-)" in a_cpa["id"]:
+                    candidate_pid = a_cpa["id"].replace("(-)", "")
+                else:
+                    candidate_pid = "(-)"+a_cpa["id"]
+            else:
+                candidate_pid = a_cpa["id"]
+            cpas.append((a_cpa["id"], a_cpa["coverage"]*a_cpa["semantic_proximity"], candidate_pid, a_cpa))
+        return cpas
+
+    def _cpa_scale_factors(self, active, cand_cols, potential_candidates=None):
+        """ 
+        Scale factor of the active contexts: coverage * semantic proximity of the first CPA of the column pair found in the context, 0 if none.
+        If potential_candidates is given, the candidates whose subgraph contains a CPA of their active contexts are added to it in the same pass.
+        """
+        scale_factors = np.zeros(active.shape, dtype=np.float64)
+        column_pair_cpas = {} ## (candidate column, context column) -> _column_pair_cpas
+        if potential_candidates is None:
+            ## only contexts with relations can contain a CPA.
+            contexts = ((key, context) for key, context in self.context_paths.items() if active[key])
+        else:
+            contexts = (((cand_idx, col_idx), self.context_paths.get((cand_idx, col_idx), ())) 
+                            for cand_idx, col_idx in zip(*(idx.tolist() for idx in np.nonzero(active))))
+        for (cand_idx, col_idx), context in contexts:
+            cand_col = int(cand_cols[cand_idx])
+            cpas = column_pair_cpas.get((cand_col, col_idx))
+            if cpas is None:
+                cpas = column_pair_cpas[(cand_col, col_idx)] = self._column_pair_cpas(cand_col, col_idx)
+            if potential_candidates is None:
+                for cpa_id, scale_factor, _, _ in cpas:
+                    if cpa_id in context:
+                        scale_factors[cand_idx, col_idx] = scale_factor
+                        break
+                continue
+            candidate = self._cands[cand_idx]
+            candidate_pids = self.G_memory[candidate.id]["pids"]
+            has_scale_factor = False
+            for cpa_id, scale_factor, candidate_pid, a_cpa in cpas:
+                if not has_scale_factor and cpa_id in context:
+                    scale_factors[cand_idx, col_idx] = scale_factor
+                    has_scale_factor = True
+                ## cache the potential candidate
+                if candidate_pid in candidate_pids:
+                    potential_candidates.setdefault(candidate, []).append({"cpa_coeff": a_cpa["coverage"], "cpa_score": a_cpa["score"], "cpa_id": a_cpa["id"]})
+        return scale_factors
+
+    def _cache_contextless_cells(self, active, scaled_scores):
+        """ Keep the best scaled context score of each cell """
+        ## best scaled score of each candidate among its active contexts.
+        best_scaled_scores = np.where(active, scaled_scores, -np.inf).max(axis=1, initial=-np.inf).tolist()
+        for candidate, has_context, has_active_context, best_scaled_score in zip(self._cands, self.has_context.any(axis=1).tolist(), 
+                                                                                    active.any(axis=1).tolist(), best_scaled_scores):
+            cell = cell_key(candidate.row_index, candidate.col_index)
+            if not has_context:
+                if cell not in self.contextless_cells:
+                    self.contextless_cells[cell] = 0.1                        
+            elif has_active_context:
+                if cell not in self.contextless_cells:
+                    self.contextless_cells[cell] = best_scaled_score
+                else:
+                    self.contextless_cells[cell] = max(self.contextless_cells[cell], best_scaled_score)
 
     def entity_scoring_task(self, first_step=True, last_step=False):
         """
@@ -705,98 +1313,105 @@ class Baseline_Model(AbstractAnnotationModel):
         """
         if first_step:
             ## calculate component score: context score and literal similarity score
-            start_time = time.time()
+            start_time = time.perf_counter()
             self._literal_similarity_scoring()
             self._context_scoring()
-            end_time = time.time()
-            self.entity_scoring_time = round(end_time-start_time, 2)
-        ## browsing all candidate.
-        for candidate in self.entity_scores:
-            cell = Cell(row_index=candidate.row_index, col_index=candidate.col_index)
-            if self.num_columns > 1 and (self.entity_cols or self.literal_cols):
-                ## table contexts exist.
-                ## weighted aggregate all columnar component of context scores into an unique score
-                ## semetic context's weight is higher than literal context's weight.
-                context_score = 0.0
-                context_weight = 0.0
-                max_context_weight = 0.0
-                if self.entity_context_scores[candidate]:
-                    for col_idx, a_context in self.entity_context_scores[candidate].items():
-                        if col_idx < candidate.col_index and col_idx in self.entity_cols:
-                            col_pair = Column_Pair(head_col_index=col_idx, tail_col_index=candidate.col_index)
-                        else:
-                            col_pair = Column_Pair(head_col_index=candidate.col_index, tail_col_index=col_idx)  
-                        if col_pair not in self.unrelated_col_pairs and col_pair in self.cpa_annot:
-                            if first_step:
-                                scale_factor = 1.0
-                            else:
-                                ## CPA disambiguation
-                                ## context score updated by CPAs
-                                scale_factor = 0.0
-                                if col_pair in self.cpa_annot:
-                                    for a_cpa in self.cpa_annot[col_pair]:
-                                        if a_cpa["id"] in a_context["context"]:
-                                            scale_factor = a_cpa["coverage"]*a_cpa["semantic_proximity"]
-                                            break
-                            scaled_score = max(0.1, scale_factor*a_context["score"])
-                            context_score += a_context["weight"]*scaled_score
-                            if last_step: ## only store contextless cells at the last stage of annotation to reduce the noise.
-                                if cell not in self.contextless_cells:
-                                    self.contextless_cells[cell] = scaled_score
-                                else:
-                                    self.contextless_cells[cell] = max(self.contextless_cells[cell], scaled_score)
-                                for a_cpa in self.cpa_annot[col_pair]:
-                                    is_candidate_contain_cpa = False
-                                    if col_idx < candidate.col_index and col_idx in self.entity_cols:
-                                        if "(-)" in a_cpa["id"]:
-                                            if a_cpa["id"].replace("(-)", "") in self.G_memory[candidate.id]["pids"]:
-                                                is_candidate_contain_cpa = True
-                                        else:
-                                            if "(-)"+a_cpa["id"] in self.G_memory[candidate.id]["pids"]:
-                                                is_candidate_contain_cpa = True
-                                    else:
-                                        if a_cpa["id"] in self.G_memory[candidate.id]["pids"]:
-                                            is_candidate_contain_cpa = True
-                                    ## cache the potential candidate
-                                    if is_candidate_contain_cpa:
-                                        if candidate not in self.potential_candidates:
-                                            self.potential_candidates[candidate] = [{"cpa_coeff": a_cpa["coverage"], "cpa_score": a_cpa["score"], "cpa_id": a_cpa["id"]}]
-                                        else:
-                                            self.potential_candidates[candidate].append({"cpa_coeff": a_cpa["coverage"], "cpa_score": a_cpa["score"], "cpa_id": a_cpa["id"]})
-    
-                            max_context_weight = max(max_context_weight, a_context["weight"])
-                            if col_idx in self.entity_cols:
-                                context_weight += self.semantic_context_weight
-                            elif col_idx in self.literal_cols:
-                                context_weight += self.literal_context_weight
-                    if context_weight:
-                        context_score = context_score/context_weight
-                    else:
-                        context_score = 0.01
-                else:
-                    context_score = 0.01
-                    if last_step:
-                        if cell not in self.contextless_cells:
-                            self.contextless_cells[cell] = 0.1                        
-                ## if table context is clear,
-                if max_context_weight > 0.1:
-                    if (self.num_rows-self.first_data_row) > 3:
-                        ampli_factor = 2
-                    else: # if is very short, put more importance on textual similarity
-                        ampli_factor = 5.0
-                    ## calculate final score for this candidate as a combination of context score and literal similarity score.
-                    # self.entity_scores[candidate] = context_score * math.exp(ampli_factor*(self.entity_sim_scores[candidate]-1.0))
-                    self.entity_scores[candidate] = context_score * 1/(1+math.exp(-(self.entity_sim_scores[candidate]**2.5/0.5-1.0)/0.2))
-                else:
-                    ## if table context has ambigous, only consider textual similarity
-                    self.entity_scores[candidate] = 0.1*self.entity_sim_scores[candidate]
+            end_time = time.perf_counter()
+            self.entity_scoring_time = end_time-start_time
+        ## context score and max context weight of each candidate, combined with the similarity score below.
+        num_candidates = len(self._cands)
+        has_table_context = self.num_columns > 1 and bool(self.entity_cols or self.literal_cols)
+        if has_table_context:
+            ## table contexts exist.
+            ## weighted aggregate all columnar component of context scores into an unique score
+            ## semetic context's weight is higher than literal context's weight.
+            cand_cols = np.fromiter((candidate.col_index for candidate in self._cands), dtype=np.intp, count=num_candidates)
+            ## contexts that count: the ones at a column related to the candidate column.
+            active = self.has_context & self._related_context_cols()[cand_cols]
+            weights = self.context_col_weights[cand_cols]
+            ## only store potential candidates at the last stage of annotation to reduce the noise.
+            potential_candidates = self.potential_candidates if last_step else None
+            if first_step:
+                if potential_candidates is not None:
+                    self._cpa_scale_factors(active, cand_cols, potential_candidates)
+                scaled_scores = np.maximum(0.1, self.context_scores)
+            else:
+                ## CPA disambiguation
+                ## context score updated by CPAs
+                scaled_scores = np.maximum(0.1, self._cpa_scale_factors(active, cand_cols, potential_candidates)*self.context_scores)
+            ## accumulate column by column, in the order in which contexts are scored (semantic ones, then literal ones).
+            context_scores = np.zeros(num_candidates, dtype=np.float64)
+            context_weights = np.zeros(num_candidates, dtype=np.float64)
+            max_context_weights = np.zeros(num_candidates, dtype=np.float64)
+            for col_idx in self._context_cols():
+                col_active = active[:, col_idx]
+                col_weight = self.semantic_context_weight if col_idx in self._entity_col_set else self.literal_context_weight
+                context_scores += np.where(col_active, weights[:, col_idx]*scaled_scores[:, col_idx], 0.0)
+                context_weights += np.where(col_active, col_weight, 0.0)
+                max_context_weights = np.maximum(max_context_weights, np.where(col_active, weights[:, col_idx], 0.0))
+            context_scores = np.divide(context_scores, context_weights, out=np.full(num_candidates, 0.01), where=context_weights != 0.0)
+        if last_step: ## only store contextless cells at the last stage of annotation to reduce the noise.
+            if has_table_context:
+                self._cache_contextless_cells(active, scaled_scores)
             else:
-                ## if table has only 1 column or has neither entity columns nor literal column, it has no context score.
-                self.entity_scores[candidate] = self.entity_sim_scores[candidate] 
-                if last_step:
+                for candidate in self._cands:
+                    cell = cell_key(candidate.row_index, candidate.col_index)
                     if cell not in self.contextless_cells:
                         self.contextless_cells[cell] = 0.1
 
+        if has_table_context:
+            ## if table context is clear,
+            ##     calculate final score as a combination of context score and literal similarity score.
+            # if (self.num_rows-self.first_data_row) > 3: ampli_factor = 2 else: ampli_factor = 5.0 (very short table, put more importance on textual similarity)
+            # self.entity_scores = context_scores * np.exp(ampli_factor*(self.entity_sim_scores-1.0))
+            with_context = context_scores / (1+np.exp(-(self.entity_sim_scores**2.5/0.5-1.0)/0.2))
+            ## if table context has ambigous, only consider textual similarity
+            self.entity_scores = np.where(max_context_weights > 0.1, with_context, 0.1*self.entity_sim_scores)
+        else:
+            ## if table has only 1 column or has neither entity columns nor literal column, it has no context score.
+            self.entity_scores = self.entity_sim_scores.copy()
+
+    def _annotate_columns(self, tasks):
+        """
+        Run cta tasks (col_index, only_one) or cpa tasks (head_col_index, tail_col_index, only_one) of distinct columns or column pairs.
+        Tasks only write the annotation of their own column (pair), so they are run by params["annotation_workers"] forked processes if given,
+        their annotations are stored in task order and the candidate types loaded by the workers are cached.
+        """
+        num_workers = min(self.params.get("annotation_workers", 1), len(tasks))
+        if num_workers <= 1 or "fork" not in multiprocessing.get_all_start_methods():
+            for task in tasks:
+                if len(task) == 2:
+                    self.cta_task(*task)
+                else:
+                    self.cpa_task(*task)
+            return
+        global _FORKED_MODEL
+        _FORKED_MODEL = self
+        try:
+            with ProcessPoolExecutor(max_workers=num_workers, mp_context=multiprocessing.get_context("fork")) as executor:
+                results = list(executor.map(_annotate_columns_in_worker, tasks))
+        finally:
+            _FORKED_MODEL = None
+        for task, (annotation, task_time, candidate_types) in zip(tasks, results):
+            if len(task) == 2:
+                self.cta_task_time += task_time
+                if annotation is not None:
+                    self.cta_annot[task[0]] = annotation
+            else:
+                self.cpa_task_time += task_time
+                if annotation is not None:
+                    self.cpa_annot[self._pair(task[0], task[1])] = annotation
+            for candidate_id, hierachical_types in candidate_types:
+                self.cached_cta_candidates.setdefault(candidate_id, hierachical_types)
+
+    def cta_tasks(self, col_indexes, only_one=True):
+        """ cta_task of each column of col_indexes, see _annotate_columns """
+        self._annotate_columns([(col_index, only_one) for col_index in col_indexes])
+
+    def cpa_tasks(self, col_pairs, only_one=True):
+        """ cpa_task of each (head_col_index, tail_col_index) column pair of col_pairs, see _annotate_columns """
+        self._annotate_columns([(head_col_index, tail_col_index, only_one) for head_col_index, tail_col_index in col_pairs])
+
     def cta_task(self, col_index, only_one=True):
         """
         This task identifies the representative types for target column "col_index".
@@ -810,97 +1425,100 @@ class Baseline_Model(AbstractAnnotationModel):
         Return:
             column types (CTA): ID, score, coverage.
         """
-        start_time = time.time()
-        candidate_types = {} 
+        start_time = time.perf_counter()
+        num_data_rows = self.num_rows-self.first_data_row
         ## browsing all candidates in target column.
+        ## we cache the types of seen candidates, in order to avoid reloading its types from KB.
+        col_ceas = []
         for row_index in range(self.first_data_row, self.num_rows):
-            cell = Cell(row_index=row_index, col_index=col_index)
-            if cell in self.cea_annot:
-                types_in_current_row = {}
-                for cea in self.cea_annot[cell]:
-                    candidate_id, candidate_score = cea["id"], cea["score"]                  
-                    ## update candidate types
-                    ## we cache the types of seen candidates, in order to avoid reloading its types from KB.
-                    if candidate_id not in self.cached_cta_candidates:   
-                        ## get hierachical types of this candidate   
-                        hierachical_types = self.KB.get_types_of_entity(entity_id=candidate_id, num_level=3)
-                        ## cache candidate types
-                        self.cached_cta_candidates[candidate_id] = hierachical_types  
-                    else:
-                        ## get candidate types from cache rather reloading from KB.
-                        hierachical_types = self.cached_cta_candidates[candidate_id]
-                    
-                    ## browsing candidate types and update their score, their rank.
-                    ## type at lower level has higher weight.
-                    for t1, rank in hierachical_types["level_1"].items():
-                        if t1 in types_in_current_row:
-                            types_in_current_row[t1] = {"score": max(types_in_current_row[t1].get("score", 0.0), self.cta_taxonomy_weights["first_level"]*candidate_score),
-                                                "rank": max(types_in_current_row[t1].get("rank", 0), self.KB.map_rank(rank[0]))}
-                        else:
-                            types_in_current_row[t1] = {"rank": self.KB.map_rank(rank[0]), "score": self.cta_taxonomy_weights["first_level"]*candidate_score}                          
-                    for t2, rank in hierachical_types["level_2"].items():
-                        if t2 in types_in_current_row:
-                            types_in_current_row[t2] = {"score": max(types_in_current_row[t2].get("score", 0.0), self.cta_taxonomy_weights["second_level"]*candidate_score),
-                                                "rank": max(types_in_current_row[t1].get("rank", 0), self.KB.map_rank(rank[0]))}
-                        else:
-                            types_in_current_row[t2] = {"rank": self.KB.map_rank(rank[0]), "score": self.cta_taxonomy_weights["second_level"]*candidate_score}
-                    for t3, rank in hierachical_types["level_3"].items():
-                        if t3 in types_in_current_row:
-                            types_in_current_row[t3] = {"score": max(types_in_current_row[t3].get("score", 0.0), self.cta_taxonomy_weights["third_level"]*candidate_score),
-                                                "rank": max(types_in_current_row[t3].get("rank", 0), self.KB.map_rank(rank[0]))}
-                        else:
-                            types_in_current_row[t3] = {"rank": self.KB.map_rank(rank[0]), "score": self.cta_taxonomy_weights["third_level"]*candidate_score}
-
-                ## update final candidate_types for target column by candidate type just found from current row_index.                                                                                                  ""
-                for t in types_in_current_row:
-                    if t in candidate_types:
-                        candidate_types[t]["count"] += 1
-                        candidate_types[t]["total_scores"] += types_in_current_row[t]["score"]
-                        candidate_types[t]["total_ranks"] += types_in_current_row[t]["rank"]                           
-                    else:
-                        candidate_types[t] = {"count": 1, "total_scores": types_in_current_row[t]["score"],
-                                                 "total_ranks": types_in_current_row[t]["rank"]}
+            ceas = self.cea_annot.get(Cell(row_index=row_index, col_index=col_index))
+            if ceas is not None:
+                col_ceas.append((row_index, ceas))
+        ## get hierachical types of the candidates not seen yet in one batch.
+        missing = {cea["id"]: None for _, ceas in col_ceas for cea in ceas if cea["id"] not in self.cached_cta_candidates}
+        if missing:
+            self.cached_cta_candidates.update(self.KB.get_types_of_entities(list(missing), num_level=3))
+        candidate_arrays, candidate_rows, candidate_scores = [], [], []
+        for row_index, ceas in col_ceas:
+            for cea in ceas:
+                candidate_arrays.append(self._candidate_type_arrays(cea["id"]))
+                candidate_rows.append(row_index)
+                candidate_scores.append(cea["score"])
+        def sorted_types(types):
+            """ Sort type codes by total_scores*count, then total_rank (if types have same score, higher rank type is more preferable), then first appearance """
+            return types[np.lexsort((-total_ranks[types], -type_scores[types]))]
+        def annotations(types):
+            """ Reformat the cta annotations of type codes with "id", average "score", "coverage". """
+            return [{"id": self._type_vocab[t], "score": total_score/num_data_rows, "coverage": count/num_data_rows}
+                        for t, total_score, count in zip(types.tolist(), total_scores[types].tolist(), counts[types].tolist())]
+        column_types = np.empty(0, dtype=np.int64)
+        num_entries = [len(codes) for codes, _, _ in candidate_arrays]
+        if sum(num_entries):
+            ## one entry per (row, candidate, type) in browsing order.
+            num_types = len(self._type_vocab)
+            entry_codes = np.concatenate([codes for codes, _, _ in candidate_arrays])
+            entry_ranks = np.concatenate([ranks for _, ranks, _ in candidate_arrays])
+            ## type at lower level has higher weight.
+            entry_scores = np.concatenate([weights for _, _, weights in candidate_arrays])*np.repeat(candidate_scores, num_entries)
+            entry_rows = np.repeat(np.asarray(candidate_rows, dtype=np.int64), num_entries)
+            ## candidate types for target column: count, total scores, total ranks over the rows, indexed by type code.
+            counts, total_scores, total_ranks, column_types = _aggregate_column_types(entry_rows, entry_codes, entry_scores, entry_ranks, num_types)
         ## After scanning all rows, we have a final list of candidate types.
-        if candidate_types:
-            ## Sort the list of candidate types and find the best types
-            ## Order: total_scores*count, total_rank (if types have same score, higher rank type is more preferable)                  
-            sorted_candidate_types = sorted(candidate_types.items(), 
-                                                key=lambda it: (it[1]["count"]*it[1]["total_scores"], it[1]["total_ranks"]), reverse=True)
+        if len(column_types):
+            ## Find the best types, only the retained ones are sorted.
+            type_scores = counts*total_scores
+            best_score = type_scores[column_types].max()
+            best_types = sorted_types(column_types[type_scores[column_types] == best_score])
             ## retain some best candidate types of highest scores or highest coverage.
-            threshold = sorted_candidate_types[0][1] 
-            column = Column(col_index=col_index)
-            self.cta_annot[column] = []
+            threshold = best_types[0]
             if only_one:
                 ## for final annotation, return the most relevant CTAs of same score. 
                 supertypes = set() ## also take super types into account.
-                for candidate_type in sorted_candidate_types:
-                    if candidate_type[1]["count"]*candidate_type[1]["total_scores"] == threshold["count"]*threshold["total_scores"]:
-                        ## reformat the cta annotation with "id", average "score", "coverage".
-                        self.cta_annot[column].append({"id": candidate_type[0], "score": candidate_type[1]["total_scores"]/(self.num_rows-self.first_data_row),
-                                        "coverage": candidate_type[1]["count"]/(self.num_rows-self.first_data_row)})
-                        supertypes.update(list(self.KB.get_supertypes_of_type(candidate_type[0])))
+                for t in best_types.tolist():
+                    supertypes.update(self.KB.get_supertypes_of_type(self._type_vocab[t]))
                 ## get the super types of relevant types.
-                for candidate_type in sorted_candidate_types:
-                    if candidate_type[0] in supertypes and candidate_type[0] not in [t["id"] for t in self.cta_annot[column]]:
-                        self.cta_annot[column].append({"id": candidate_type[0], "score": candidate_type[1]["total_scores"]/(self.num_rows-self.first_data_row),
-                                        "coverage": candidate_type[1]["count"]/(self.num_rows-self.first_data_row)})  
+                supertypes.difference_update(self._type_vocab[t] for t in best_types.tolist())
+                is_supertype = np.fromiter((self._type_vocab[t] in supertypes for t in column_types.tolist()), dtype=bool, count=len(column_types))
+                self.cta_annot[col_index] = annotations(best_types) + annotations(sorted_types(column_types[is_supertype]))
             else:
                 ## for intermediate disambiguation steps (CEA disambiguation), return many CTAs of highest score or highest coverage which maybe useful for disambiguation.
-                for candidate_type in sorted_candidate_types:
-                    if candidate_type[1]["count"] >= threshold["count"]:
-                        ## reformat the cta annotation with "id", average "score", "coverage".
-                        self.cta_annot[column].append({"id": candidate_type[0], "score": candidate_type[1]["total_scores"]/(self.num_rows-self.first_data_row),
-                                        "coverage": candidate_type[1]["count"]/(self.num_rows-self.first_data_row)})
-
-            end_time = time.time()
-            self.cta_task_time += round(end_time-start_time, 2)
-            return self.cta_annot[column]
+                self.cta_annot[col_index] = annotations(sorted_types(column_types[counts[column_types] >= counts[threshold]]))
+
+            end_time = time.perf_counter()
+            self.cta_task_time += end_time-start_time
+            return self.cta_annot[col_index]
         else:
             ## no type returned
-            end_time = time.time()
-            self.cta_task_time += round(end_time-start_time, 2)
+            end_time = time.perf_counter()
+            self.cta_task_time += end_time-start_time
             return ""
 
+    def _candidate_type_arrays(self, candidate_id):
+        """ Hierarchical types of a candidate (level_1, level_2, level_3) as arrays (type codes, ranks, taxonomy weights). Type codes index self._type_vocab. """
+        type_arrays = self._cta_type_arrays.get(candidate_id)
+        if type_arrays is None:
+            if candidate_id not in self.cached_cta_candidates:
+                ## get hierachical types of this candidate   
+                self.cached_cta_candidates[candidate_id] = self.KB.get_types_of_entity(entity_id=candidate_id, num_level=3)
+            hierachical_types = self.cached_cta_candidates[candidate_id]
+            map_rank, type_code = self.KB.map_rank, self._type_code
+            codes, ranks, weights = [], [], []
+            for level, weight in self.cta_levels:
+                types = hierachical_types[level]
+                codes.extend(type_code(t) for t in types)
+                ranks.extend(map_rank(rank[0]) for rank in types.values())
+                weights.extend([weight]*len(types))
+            type_arrays = self._cta_type_arrays[candidate_id] = (np.array(codes, dtype=np.int64), np.array(ranks, dtype=np.int64), np.array(weights, dtype=np.float64))
+        return type_arrays
+
+    def _type_code(self, type_id):
+        """ Dense int code of a type id """
+        code = self._type_codes.get(type_id)
+        if code is None:
+            code = self._type_codes[type_id] = len(self._type_vocab)
+            self._type_vocab.append(type_id)
+        return code
+
     def cea_task(self, col_index, row_index, only_one=True):
         """
         This task annotates the tables cells with KG entities. 
@@ -918,86 +1536,88 @@ class Baseline_Model(AbstractAnnotationModel):
         Return:
             cell annotation (CEA): ID, score, coverage.
         """
-        def is_neighbor_of_entity(target_graph, query_entity_ids):
-            """ Verify whether a query_entity or a list of query_entities is a neighbor of tartget_entity """
-            for query_e in query_entity_ids:
-                if query_e in target_graph:
-                    return True
-            return False
-        start_time = time.time()
+        start_time = time.perf_counter()
         cea_candidates = []
         cell = Cell(row_index=row_index, col_index=col_index)
+        lookup_cell = cell_key(row_index, col_index)
+        lookup_candidates = self.lookup.get(lookup_cell)
         ## browsing all lookup candidates of current cell.
-        if cell in self.lookup:
+        if lookup_candidates is not None:
             ## get the before-cta,cpa-disambiguation score for each cea candidate
-            for candidate_id in self.lookup[cell]:
-                candidate = Candidate_Entity(row_index=row_index, col_index=col_index, id=candidate_id)
-                if candidate in self.entity_scores:
+            ##  and its potential cpas (see entity_scoring_task).
+            potential_cpas = {}
+            for candidate_id in lookup_candidates:
+                candidate = self._cand(row_index, col_index, candidate_id)
+                cand_idx = self._cand_index.get(candidate)
+                if cand_idx is not None:
                     cea_candidates.append({"id": candidate_id, 
-                                        "score": self.entity_scores[candidate]})
+                                        "score": float(self.entity_scores[cand_idx])})
+                    potential_cpas[candidate_id] = self.potential_candidates.get(candidate, [])
             if cea_candidates:                         
                 ## update cea candidate scores by the CTAs
                 ## in other word, the score of CTA at the column containing current cea candidate will participate in the score of this cea.
                 cta_disabg_applied = False ## flag indicates whether cta disambiguation was applied.
                 if self.cta_annot:
+                    ## type at lower level has higher weight.
+                    (_, first_level_weight), (_, second_level_weight), (_, third_level_weight) = self.cta_levels
                     ## store scores of CTA attached to current cea candidate.
                     cta_disambiguation_scores = {}
                     ## store the coverage of CTA attached to current cea, they will used to weight the cta score in the update of cea score.
                     cta_disambiguation_weights = []
-                    ## browsing all CTA results.
-                    for col, cta in self.cta_annot.items():
-                        ## only consider CTA which is attached to target column.
-                        if col.col_index == col_index:
-                            cta_disabg_applied = True
-                            for a_cta in cta:
-                                cta_type = a_cta["id"]
-                                if cta_type not in self.type_graph:
-                                    self.type_graph[cta_type] = {}
-                                    graph_tmp = self.KB.get_subgraph_of_entity(cta_type)
-                                    graph_tmp.pop("(-)P31", None)
-                                    for pid, objs in graph_tmp.items():
-                                        if pid[:3] == "(-)":
-                                            for obj in objs:
-                                                self.type_graph[cta_type][obj] = ''
-                                        else:
-                                            for obj, obj_type in objs.items(): 
-                                                if obj_type in ["NORMAL", "PREFERRED", "DEPRECATED"]: #    
-                                                    self.type_graph[cta_type][obj] = ''
-                                cta_score = a_cta["score"]
-                                cta_coverage = a_cta["coverage"]
-                                ## store the coverage (weight) of CTA at target column.
-                                cta_disambiguation_weights.append(cta_coverage)
-                                ## browsing cea candidates to find ones that have type CTA.
-                                ##  the score of those cea candidates will be updated by current CTA score. 
-                                for cea in cea_candidates:
-                                    if cea["id"] not in cta_disambiguation_scores:
-                                        cta_disambiguation_scores[cea["id"]] = 0.0
-                                    hierachical_types = self.cached_cta_candidates[cea["id"]]
-                                    if cta_type in hierachical_types["level_1"]:
-                                        ## direct type of current cea is indeed CTA.
-                                        ## then remember this CTA score for the score update of cea candidate.
-                                        cta_disambiguation_scores[cea["id"]]= max(cta_disambiguation_scores[cea["id"]], self.cta_taxonomy_weights["first_level"]*cta_score)
-                                    elif cta_type in hierachical_types["level_2"] or is_neighbor_of_entity(self.type_graph[cta_type], list(hierachical_types["level_1"])):
-                                    # elif cta_type in hierachical_types["level_2"]:
-                                        ## super type of current cea is indeed CTA.
-                                        ## then remember this CTA score for the score update of cea candidate.
-                                        cta_disambiguation_scores[cea["id"]]= max(cta_disambiguation_scores[cea["id"]], self.cta_taxonomy_weights["second_level"]*cta_score)
-                                    elif cta_type in hierachical_types["level_3"] or is_neighbor_of_entity(self.type_graph[cta_type], list(hierachical_types["level_2"])):
-                                    # elif cta_type in hierachical_types["level_3"]:
-                                        ## super type of current cea is indeed CTA.
-                                        ## then remember this CTA score for the score update of cea candidate.
-                                        cta_disambiguation_scores[cea["id"]]= max(cta_disambiguation_scores[cea["id"]], self.cta_taxonomy_weights["third_level"]*cta_score)        
+                    ## only consider CTA which is attached to target column.
+                    col_ctas = self.cta_annot.get(col_index)
+                    if col_ctas is not None:
+                        cta_disabg_applied = True
+                        ## (CTA, its neighbors, its score weighted for a direct type, a super type, a super type of super type) 
+                        ctas = []
+                        for a_cta in col_ctas:
+                            cta_type = a_cta["id"]
+                            neighbors = self.type_graph.get(cta_type)
+                            if neighbors is None:
+                                neighbors = self.type_graph[cta_type] = set()
+                                for pid, objs in self.KB.get_subgraph_of_entity(cta_type).items():
+                                    if pid == "(-)P31":
+                                        continue
+                                    if pid.startswith("(-)"):
+                                        neighbors.update(objs)
+                                    else:
+                                        neighbors.update(obj for obj, obj_type in objs.items() if obj_type in _ENTITY_RANKS)
+                            cta_score = a_cta["score"]
+                            ctas.append((cta_type, neighbors, first_level_weight*cta_score, second_level_weight*cta_score, third_level_weight*cta_score))
+                            ## store the coverage (weight) of CTA at target column.
+                            cta_disambiguation_weights.append(a_cta["coverage"])
+                        ## browsing cea candidates to find ones that have type CTA (if any).
+                        ##  the score of those cea candidates will be updated by the CTA scores. 
+                        for cea in (cea_candidates if ctas else ()):
+                            cta_disambiguation_score = cta_disambiguation_scores.get(cea["id"], 0.0)
+                            hierachical_types = self.cached_cta_candidates[cea["id"]]
+                            level_1_types, level_2_types, level_3_types = hierachical_types["level_1"], hierachical_types["level_2"], hierachical_types["level_3"]
+                            ## cta_neighbors: neighbors of the CTA in the KB, its sub types and super types.
+                            for cta_type, cta_neighbors, first_level_score, second_level_score, third_level_score in ctas:
+                                if cta_type in level_1_types:
+                                    ## direct type of current cea is indeed CTA.
+                                    ## then remember this CTA score for the score update of cea candidate.
+                                    cta_disambiguation_score = max(cta_disambiguation_score, first_level_score)
+                                elif cta_type in level_2_types or not cta_neighbors.isdisjoint(level_1_types):
+                                    ## super type of current cea is indeed CTA.
+                                    ## then remember this CTA score for the score update of cea candidate.
+                                    cta_disambiguation_score = max(cta_disambiguation_score, second_level_score)
+                                elif cta_type in level_3_types or not cta_neighbors.isdisjoint(level_2_types):
+                                    ## super type of current cea is indeed CTA.
+                                    ## then remember this CTA score for the score update of cea candidate.
+                                    cta_disambiguation_score = max(cta_disambiguation_score, third_level_score)        
+                            cta_disambiguation_scores[cea["id"]] = cta_disambiguation_score
                 if cta_disabg_applied:
                     ## cta_coeff in cea score update function is the coverage of the CTA at current column.
                     if self.soft_scoring:
-                        if self.contextless_cells and self.contextless_cells.get(cell, 0.1) == 0.1: ## in case a cell has no valid context, cta disambiguation receives more weight.
-                            cta_coeff = np.mean(cta_disambiguation_weights)
+                        if self.contextless_cells and self.contextless_cells.get(lookup_cell, 0.1) == 0.1: ## in case a cell has no valid context, cta disambiguation receives more weight.
+                            cta_coeff = sum(cta_disambiguation_weights)/len(cta_disambiguation_weights)
                             for cea in cea_candidates: ## in case a candidate has a cpa as its predicates, its score is augemented.
-                                if Candidate_Entity(row_index=row_index, col_index=col_index, id=cea["id"])  in self.potential_candidates:
-                                    cpa_coeff = max([it["cpa_coeff"] for it in self.potential_candidates[Candidate_Entity(row_index=row_index, col_index=col_index, id=cea["id"])]])
+                                if potential_cpas[cea["id"]]:
+                                    cpa_coeff = max([it["cpa_coeff"] for it in potential_cpas[cea["id"]]])
                                     cea["score"] = min(1.0, cea["score"]*(1+cpa_coeff))
                         else:
-                            cta_coeff = np.mean(cta_disambiguation_weights)/2
+                            cta_coeff = sum(cta_disambiguation_weights)/len(cta_disambiguation_weights)/2
                     else:
                         cta_coeff = 0.25
 
@@ -1009,27 +1629,48 @@ class Baseline_Model(AbstractAnnotationModel):
                         total_coeff += cta_coeff
                         cea["score"] += cta_coeff*cta_disambiguation_scores[cea["id"]]
                     cea["score"] = cea["score"]/total_coeff
-                    candidate = Candidate_Entity(row_index=row_index, col_index=col_index, id=cea["id"])
-                    # self.entity_scores[candidate] = cea["score"] 
 
                 ## Sort the list of cea candidates and find the best ceas
-                ## if there are many best ceas of same score 
-                sorted_cea_candidates = sorted(cea_candidates, key=lambda t: (t["score"], len(self.potential_candidates.get(Candidate_Entity(row_index=row_index, col_index=col_index, id=t["id"]), []))), reverse=True)
-                self.cea_annot[cell] = []
+                ## if there are many best ceas of same score, the ones with more potential cpas come first.
+                cea_order = lambda t: (t["score"], len(potential_cpas[t["id"]]))
                 if only_one:
-                    for candidate_cea in sorted_cea_candidates:
-                        if candidate_cea["score"] == sorted_cea_candidates[0]["score"]:
-                            self.cea_annot[cell].append(candidate_cea)
+                    ## only the best ceas are sorted.
+                    best_score = max(cea["score"] for cea in cea_candidates)
+                    self.cea_annot[cell] = sorted((cea for cea in cea_candidates if cea["score"] == best_score), key=cea_order, reverse=True)
                 else:
-                    self.cea_annot[cell] = sorted_cea_candidates
-                end_time = time.time()
-                self.cea_task_time += round(end_time-start_time, 2)
+                    self.cea_annot[cell] = sorted(cea_candidates, key=cea_order, reverse=True)
+                end_time = time.perf_counter()
+                self.cea_task_time += end_time-start_time
                 return self.cea_annot[cell]
         else:
-            end_time = time.time()
-            self.cea_task_time += round(end_time-start_time, 2)
+            end_time = time.perf_counter()
+            self.cea_task_time += end_time-start_time
             return ""
                                                             
+    def _cpa_candidates_by_head(self):
+        """ cached_cpa_candidates as {head: {tail: (cpa id, semantic proximity) pairs}}, re-indexed when pairs were added since last call
+            (the relations of a cached pair are shared, not copied). """
+        if sum(len(tails) for tails in self._cpa_by_head.values()) != len(self.cached_cpa_candidates):
+            self._cpa_by_head = {}
+            for (head_id, tail_id), relations in self.cached_cpa_candidates.items():
+                self._cpa_by_head.setdefault(head_id, {})[tail_id] = relations
+        return self._cpa_by_head
+
+    def _cpa_relation_arrays(self, tail_cpa_arrays, tail_id, relations):
+        """ (cpa id, semantic proximity) relations of a cached candidate pair as arrays (cpa codes, semantic proximities), kept in tail_cpa_arrays.
+            Cpa codes index self._cpa_vocab. """
+        arrays = tail_cpa_arrays.get(tail_id)
+        if arrays is None or len(arrays[0]) != len(relations): ## relations of a literal are extended by later rows
+            codes = []
+            for cpa_id, _ in relations:
+                code = self._cpa_codes.get(cpa_id)
+                if code is None:
+                    code = self._cpa_codes[cpa_id] = len(self._cpa_vocab)
+                    self._cpa_vocab.append(cpa_id)
+                codes.append(code)
+            arrays = tail_cpa_arrays[tail_id] = (np.array(codes, dtype=np.int64), np.array([proximity for _, proximity in relations], dtype=np.float64))
+        return arrays
+
     def cpa_task(self, head_col_index, tail_col_index, only_one=True):
         """
         This task finds a semantic relation between an ordered pair of column (head_column, tail_column)
@@ -1042,60 +1683,68 @@ class Baseline_Model(AbstractAnnotationModel):
         Return:
             column pair relations (CPA): ID, score, coverage.
         """
-        start_time = time.time()
+        start_time = time.perf_counter()
         cpa_candidates = {}
         head_cells = {}
         tail_cells = {}
-        if Column_Pair(head_col_index=head_col_index, tail_col_index=tail_col_index) in self.unrelated_col_pairs or (tail_col_index in self.literal_cols and tail_col_index < head_col_index):
+        if self._pair(head_col_index, tail_col_index) in self.unrelated_col_pairs or (tail_col_index in self._literal_col_set and tail_col_index < head_col_index):
             ## no need to calculate CPA for 2 unrelated columns.
-            end_time = time.time()
-            self.cpa_task_time += round(end_time-start_time, 2)
+            end_time = time.perf_counter()
+            self.cpa_task_time += end_time-start_time
             return ""
 
         ## get CEAs for head column and tail column. a CEA has its ID and its score.
         for row_index in range(self.first_data_row,self.num_rows):
             ## get CEAs for head entity column.
-            cell = Cell(row_index=row_index, col_index=head_col_index)
-            if cell in self.cea_annot:
-                head_cells[row_index] = self.cea_annot[cell]
+            ceas = self.cea_annot.get(Cell(row_index=row_index, col_index=head_col_index))
+            if ceas is not None:
+                head_cells[row_index] = ceas
 
             ## tail column can be entity column or literal column.
-            if tail_col_index in self.entity_cols:
+            if tail_col_index in self._entity_col_set:
                 ## get CEAs for entity tail column
-                cell = Cell(row_index=row_index, col_index=tail_col_index)
-                if cell in self.cea_annot:
-                    tail_cells[row_index] = self.cea_annot[cell]
+                ceas = self.cea_annot.get(Cell(row_index=row_index, col_index=tail_col_index))
+                if ceas is not None:
+                    tail_cells[row_index] = ceas
             else:
                 ## get mentions for literal column. a CEA is supposed to be the cell's mention and its score is 0.0
                 tail_cells[row_index] = [{"id": self.table[row_index][tail_col_index], "score": 0.0}]
 
         ## browsing all row to find the CPA candidates.
-        for row_index in set(head_cells.keys()) & set(tail_cells.keys()):
-            relation_in_current_row = {}
+        cpa_by_head = self._cpa_candidates_by_head()
+        ## one entry per (row, candidate pair, relation), gathered as arrays per candidate pair.
+        pair_codes, pair_proximities, pair_confs, pair_rows = [], [], [], []
+        for row_position, row_index in enumerate(set(head_cells.keys()) & set(tail_cells.keys())):
             for head_candidate in head_cells[row_index]:
-                head_id = head_candidate["id"]
-                head_conf = head_candidate["score"]        
+                tail_cpa_candidates = cpa_by_head.get(head_candidate["id"])
+                if tail_cpa_candidates is None:
+                    ## head candidate is not related to any candidate.
+                    continue
+                head_conf = head_candidate["score"]
+                tail_cpa_arrays = self._cpa_arrays.setdefault(head_candidate["id"], {})
                 for tail_candidate in tail_cells[row_index]:
-                    tail_id = tail_candidate["id"]
-                    tail_conf = tail_candidate["score"]
-                    col_cpa_candidates = self.cached_cpa_candidates.get((head_id, tail_id), {})
-                    for a_cpa_candidate in col_cpa_candidates:
-                        ## a cpa candidate is found between a head candidate entity and a tail candidate entity in current row.
-                        ## we update the score of this cpa candidate: score = max(head_candidate_entity_score, tail_candidate_entity_score)
-                        ##     the score is weighted by the semantic proximity of involved relation.
-                        if a_cpa_candidate.id in relation_in_current_row:
-                            relation_in_current_row[a_cpa_candidate.id]["score"] = max(relation_in_current_row[a_cpa_candidate.id]["score"], a_cpa_candidate.semantic_proximity*max(head_conf,tail_conf))
-                            relation_in_current_row[a_cpa_candidate.id]["semantic_proximity"] = min(relation_in_current_row[a_cpa_candidate.id]["semantic_proximity"], a_cpa_candidate.semantic_proximity)
-                        else:
-                            relation_in_current_row[a_cpa_candidate.id] =  {"semantic_proximity": a_cpa_candidate.semantic_proximity, "score": a_cpa_candidate.semantic_proximity*max(head_conf,tail_conf)}                                        
-            ## update the final list of cpa candidates with ones found in current row.                                                                   
-            for prop, score_info in relation_in_current_row.items():
-                if prop not in cpa_candidates:
-                    cpa_candidates[prop] = {"count": 1, "total_scores": score_info["score"], "semantic_proximity": score_info["semantic_proximity"]}
-                else:
-                    cpa_candidates[prop]["count"] = cpa_candidates[prop]["count"] + 1
-                    cpa_candidates[prop]["total_scores"] = cpa_candidates[prop]["total_scores"] + score_info["score"]
-                    cpa_candidates[prop]["semantic_proximity"] = min(cpa_candidates[prop]["semantic_proximity"], score_info["semantic_proximity"]) 
+                    col_cpa_candidates = tail_cpa_candidates.get(tail_candidate["id"], ())
+                    if not col_cpa_candidates:
+                        continue
+                    ## a cpa candidate is found between a head candidate entity and a tail candidate entity in current row.
+                    codes, proximities = self._cpa_relation_arrays(tail_cpa_arrays, tail_candidate["id"], col_cpa_candidates)
+                    pair_codes.append(codes)
+                    pair_proximities.append(proximities)
+                    ## score of a candidate pair: max(head_candidate_entity_score, tail_candidate_entity_score)
+                    pair_confs.append(max(head_conf, tail_candidate["score"]))
+                    pair_rows.append(row_position)
+        if pair_codes:
+            num_entries = [len(codes) for codes in pair_codes]
+            entry_codes = np.concatenate(pair_codes)
+            entry_proximities = np.concatenate(pair_proximities)
+            ## we update the score of a cpa candidate with the score of the candidate pair, weighted by the semantic proximity of involved relation.
+            entry_scores = entry_proximities*np.repeat(pair_confs, num_entries)
+            entry_rows = np.repeat(np.asarray(pair_rows, dtype=np.int64), num_entries)
+            ## update the final list of cpa candidates with the ones found in each row.
+            counts, total_scores, proximities, column_relations = _aggregate_column_relations(entry_rows, entry_codes, entry_scores, entry_proximities, len(self._cpa_vocab))
+            for code, count, total_score, proximity in zip(column_relations.tolist(), counts[column_relations].tolist(), 
+                                                            total_scores[column_relations].tolist(), proximities[column_relations].tolist()):
+                cpa_candidates[self._cpa_vocab[code]] = {"count": count, "total_scores": total_score, "semantic_proximity": proximity}
 
         ## After scanning all rows, we have a final list of candidate cpas.          
         if cpa_candidates :      
@@ -1106,28 +1755,29 @@ class Baseline_Model(AbstractAnnotationModel):
 
             ## get best candidate cpas (there maybe many of same score)
             threshold = sorted_cpa_candidates[0][1]
-            col_pair = Column_Pair(head_col_index=head_col_index, tail_col_index=tail_col_index)
+            num_data_rows = self.num_rows-self.first_data_row
+            col_pair = self._pair(head_col_index, tail_col_index)
             self.cpa_annot[col_pair] = []
             if only_one:
                 ## for final annotation, return the most relevant CPAs of same score. 
                 for a_cpa_candidate in sorted_cpa_candidates:
                     if a_cpa_candidate[1]["count"]*a_cpa_candidate[1]["total_scores"] >= threshold["count"]*threshold["total_scores"]:
                         ## reformat the cpa annotation with "id", average "score", "coverage", "semantic_proximity"
-                        self.cpa_annot[col_pair].append({"id": a_cpa_candidate[0], "score": a_cpa_candidate[1]["total_scores"]/(self.num_rows-self.first_data_row), 
-                                    "semantic_proximity": a_cpa_candidate[1]["semantic_proximity"], "coverage": a_cpa_candidate[1]["count"]/(self.num_rows-self.first_data_row) })    
+                        self.cpa_annot[col_pair].append({"id": a_cpa_candidate[0], "score": a_cpa_candidate[1]["total_scores"]/num_data_rows, 
+                                    "semantic_proximity": a_cpa_candidate[1]["semantic_proximity"], "coverage": a_cpa_candidate[1]["count"]/num_data_rows })    
             else:
                 ## for intermediate disambiguation steps (CEA disambiguation), return many CPAs of highest score or highest coverage which maybe useful for disambiguation.
                 for a_cpa_candidate in sorted_cpa_candidates:
                     if a_cpa_candidate[1]["count"] >= threshold["count"]:
                         ## reformat the cpa annotation with "id", average "score", "coverage", "semantic_proximity"
-                        self.cpa_annot[col_pair].append({"id": a_cpa_candidate[0], "score": a_cpa_candidate[1]["total_scores"]/(self.num_rows-self.first_data_row), 
-                                    "semantic_proximity": a_cpa_candidate[1]["semantic_proximity"], "coverage": a_cpa_candidate[1]["count"]/(self.num_rows-self.first_data_row) })  
-            end_time = time.time()
-            self.cpa_task_time += round(end_time-start_time, 2)
+                        self.cpa_annot[col_pair].append({"id": a_cpa_candidate[0], "score": a_cpa_candidate[1]["total_scores"]/num_data_rows, 
+                                    "semantic_proximity": a_cpa_candidate[1]["semantic_proximity"], "coverage": a_cpa_candidate[1]["count"]/num_data_rows })  
+            end_time = time.perf_counter()
+            self.cpa_task_time += end_time-start_time
             return self.cpa_annot[col_pair]
         else:
-            end_time = time.time()
-            self.cpa_task_time += round(end_time-start_time, 2)
+            end_time = time.perf_counter()
+            self.cpa_task_time += end_time-start_time
             return ""
 
 if __name__ == '__main__':
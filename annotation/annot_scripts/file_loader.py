@@ -27,14 +27,27 @@ to tables
 
 '''
 import csv
+import io
 import pandas as pd
 import numpy as np
 import chardet
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 import datetime
 import openpyxl
 from openpyxl.utils import range_boundaries
+## the fast excel reader uses private openpyxl internals (WorkSheetParser, ReadOnlyWorksheet._get_source, 
+##     Workbook._cell_styles/_borders/_fills), written against the pinned openpyxl==3.0.9.
+##     if they are missing or changed, the public (slower) reader is used instead, see _read_excel_sheets.
+try:
+    from openpyxl.worksheet._reader import WorkSheetParser
+except ImportError:
+    WorkSheetParser = None
 from scipy import ndimage as ndi
 
+## number of first bytes of a text file from which its encoding and delimiter are detected.
+SNIFF_SAMPLE_SIZE = 65536
+
 def txt_to_table(filepath: str):
     """
     Read table from text file (txt, tsv,csv..). Currently, only 1 table per file supported 
@@ -42,27 +55,41 @@ def txt_to_table(filepath: str):
     """
     list_tables = []
     try:
-        f =  open(filepath, 'rb')
-        en_scheme = chardet.detect(f.read())  # detect encoding scheme
-        f.close()
-        f = open(filepath, 'r', encoding=en_scheme['encoding'])
-        possible_sep = [',', '\t', ';', ':']
-        dialect = csv.Sniffer().sniff(f.read(), possible_sep)
-        f.close()
-        f = open(filepath, 'r', encoding=en_scheme['encoding'])
+        f = open(filepath, 'rb')
     except FileNotFoundError:
         print(" File not found !!")
         return []
     except Exception as e:
         print(e)
         return []
-    reader = csv.reader(f, delimiter=dialect.delimiter, skipinitialspace=True)
-    table = []
-    for item in reader:
-        table.append(item)
+    with f:
+        try:
+            ## encoding and delimiter are detected on the first bytes of the file only.
+            sample = f.read(SNIFF_SAMPLE_SIZE)
+            is_truncated = len(sample) == SNIFF_SAMPLE_SIZE
+            en_scheme = chardet.detect(sample)  # detect encoding scheme
+            if is_truncated and en_scheme['encoding'] == 'ascii':
+                ## non-ascii chars may come after the sample, utf-8 decodes the ascii sample the same way.
+                en_scheme['encoding'] = 'utf-8'
+            sample = sample.decode(en_scheme['encoding'] or 'utf-8', errors='ignore')
+            if is_truncated and '\n' in sample:
+                sample = sample[:sample.rindex('\n')] ## do not sniff a truncated last line.
+            possible_sep = [',', '\t', ';', ':']
+            dialect = csv.Sniffer().sniff(sample, possible_sep)
+        except Exception as e:
+            print(e)
+            return []
+        ## the rows are decoded from the same file, read again from its start.
+        ##     bytes after the sample that do not fit the detected encoding are replaced.
+        try:
+            f.seek(0)
+            table = list(csv.reader(io.TextIOWrapper(f, encoding=en_scheme['encoding'], errors='replace', newline=''), 
+                                    delimiter=dialect.delimiter, skipinitialspace=True))
+        except Exception as e:
+            print(e)
+            return []
     if table:
         list_tables.append(table)
-    f.close()
     return {"tableFromTextFile": list_tables}
 
 """
@@ -76,89 +103,152 @@ def json_to_table(filepath: str) -> List[List[List[str]]]:
     return list_tables
 """
 
-def excel_to_table(filepath):
+def _foreground_styles(wb_obj):
+    """
+    For each cell style of a workbook, whether it makes a cell without value a foreground cell (filled, or with left/right border).
+    """
+    foreground_styles = []
+    for style in wb_obj._cell_styles:
+        border = wb_obj._borders[style.borderId]
+        foreground_styles.append(bool(wb_obj._fills[style.fillId].patternType
+                                    or (border.left and border.left.style) or (border.right and border.right.style)))
+    return foreground_styles
+
+def _read_sheet_cells(wb_obj, w_sheet):
+    """
+    Stream the cells of a read-only worksheet as (row, column, value, style_id), without building styled cell objects.
+    Return them with the ranges of merged cells (min_col, min_row, max_col, max_row), which are only known at the end of the sheet.
+    """
+    with w_sheet._get_source() as src:
+        parser = WorkSheetParser(src, w_sheet._shared_strings, data_only=True, epoch=wb_obj.epoch, 
+                                 date_formats=wb_obj._date_formats, timedelta_formats=wb_obj._timedelta_formats)
+        cells = [(cell["row"], cell["column"], cell["value"], cell["style_id"]) for _, row in parser.parse() for cell in row]
+        merged_ranges = [range_boundaries(merged_cell.ref) for merged_cell in parser.merged_cells.mergeCell] if parser.merged_cells else []
+    return cells, merged_ranges
+
+def _read_sheet_cells_public(w_sheet):
+    """
+    Public API counterpart of _read_sheet_cells for a worksheet of a workbook not opened read-only.
+    The style_id of a cell is 1 if it makes a cell without value a foreground cell, otherwise 0 (see _PUBLIC_FOREGROUND_STYLES).
+    """
+    cells = []
+    for row in w_sheet.iter_rows():
+        for cell in row:
+            border = cell.border
+            is_foreground = cell.fill.patternType or (border.left and border.left.style) or (border.right and border.right.style)
+            cells.append((cell.row, cell.column, cell.value, 1 if is_foreground else 0))
+    merged_ranges = [range_boundaries(str(merged_range)) for merged_range in w_sheet.merged_cells.ranges]
+    return cells, merged_ranges
+
+## foreground styles of the cells read by _read_sheet_cells_public.
+_PUBLIC_FOREGROUND_STYLES = [False, True]
+## errors of the fast reader when the private openpyxl internals differ from openpyxl==3.0.9.
+_PRIVATE_READER_ERRORS = (AttributeError, TypeError)
+
+def _read_excel_sheets(filepath, sheetnames=None):
+    """
+    Yield (sheet_name, cells, merged_ranges, foreground_styles) for the worksheets of an excel file (all of them if sheetnames is None), 
+    see _read_sheet_cells. Worksheets are streamed by the fast reader, or read with the public openpyxl API if the fast reader fails.
+    """
+    wb_obj = openpyxl.load_workbook(filepath, data_only=True, read_only=True)
+    public_wb_obj = None
+    try:
+        if sheetnames is None:
+            sheetnames = wb_obj.sheetnames
+        foreground_styles = None
+        if WorkSheetParser is not None:
+            try:
+                foreground_styles = _foreground_styles(wb_obj)
+            except _PRIVATE_READER_ERRORS:
+                pass
+        for sheet_name in sheetnames:
+            sheet_cells = None
+            if foreground_styles is not None:
+                try:
+                    sheet_cells = _read_sheet_cells(wb_obj, wb_obj[sheet_name])
+                except _PRIVATE_READER_ERRORS:
+                    foreground_styles = None ## the fast reader does not work with this openpyxl, nor for the next worksheets.
+            if sheet_cells is not None:
+                yield (sheet_name, *sheet_cells, foreground_styles)
+            else:
+                if public_wb_obj is None:
+                    public_wb_obj = openpyxl.load_workbook(filepath, data_only=True)
+                yield (sheet_name, *_read_sheet_cells_public(public_wb_obj[sheet_name]), _PUBLIC_FOREGROUND_STYLES)
+    finally:
+        wb_obj.close()
+
+def _sheet_to_tables(cells, merged_ranges, foreground_styles):
+    """
+    Find the tables of a worksheet given its cells and merged cell ranges (see _read_excel_sheets), see excel_to_table.
+    """
+    rows = np.fromiter((cell[0] for cell in cells), dtype=np.int64, count=len(cells)) - 1
+    cols = np.fromiter((cell[1] for cell in cells), dtype=np.int64, count=len(cells)) - 1
+    has_value = np.fromiter((bool(cell[2]) for cell in cells), dtype=bool, count=len(cells))
+    has_style = np.asarray(foreground_styles, dtype=bool)[np.fromiter((cell[3] for cell in cells), dtype=np.int64, count=len(cells))]
+    ## sheet size covers all written cells and merged cells.
+    num_sheet_row = max([int(rows.max())+1 if len(cells) else 1] + [max_row for _, _, _, max_row in merged_ranges])
+    num_sheet_col = max([int(cols.max())+1 if len(cells) else 1] + [max_col for _, _, max_col, _ in merged_ranges])
+
+    ## clustering tables in a worksheet by connected components.
+    raw_sheet = [[""]*num_sheet_col for _ in range(num_sheet_row)] ## read value of all cells.
+    for row, col, value, _ in cells:
+        ## read raw value, take care of reading datetime properly.
+        if value:
+            if isinstance(value, datetime.datetime):
+                raw_sheet[row-1][col-1] = value.strftime('%m/%d/%Y')
+            else:
+                raw_sheet[row-1][col-1] = value
+    ## 1 (foreground) if cell contains value, is filled or has a left/right border, otherwise 0 (background)
+    cnt_components = np.zeros((num_sheet_row, num_sheet_col), dtype=bool)
+    cnt_components[rows, cols] = has_value | has_style
+
+    ## unmerge cells: the cells of a merged range take the value of its top left cell, they have no style.
+    for min_col, min_row, max_col, max_row in merged_ranges:
+        top_left_cell_value = raw_sheet[min_row-1][min_col-1]
+        top_left_cell_foreground = cnt_components[min_row-1, min_col-1]
+        for row in range(min_row-1, max_row):
+            raw_sheet[row][min_col-1:max_col] = [top_left_cell_value]*(max_col-min_col+1)
+        cnt_components[min_row-1:max_row, min_col-1:max_col] = top_left_cell_value != ""
+        cnt_components[min_row-1, min_col-1] = top_left_cell_foreground
+
+    ## find connected components
+    cnt_component_labels, n_cnt_component = ndi.label(cnt_components)
+
+    ## each connected component can be a potential independent table.
+    raw_sheet = np.array(raw_sheet)
+    tables = []
+    ## the rectangle that may contain a table: bounding box of each component, found in one pass.
+    for component_slices in ndi.find_objects(cnt_component_labels):
+        if component_slices is None:
+            continue
+        ## check if there exist potentially a table in the rectangle.
+        table = raw_sheet[component_slices]
+        if table.shape[0] > 1 and table.shape[1] > 1:
+            tables.append(table.tolist())
+    return tables
+
+def _excel_sheet_to_tables(filepath, sheet_name):
+    """
+    Read the tables of a worksheet in a worker process, which opens its own workbook.
+    """
+    for _, cells, merged_ranges, foreground_styles in _read_excel_sheets(filepath, [sheet_name]):
+        return _sheet_to_tables(cells, merged_ranges, foreground_styles)
+
+def excel_to_table(filepath, num_workers=1):
     """
     Read multiple tables per worksheet in excel file. Only .xlsx supported. Old .xls not supported.
+    Worksheets are independent, with num_workers > 1 they are read in parallel worker processes.
     """
-    wb_obj = openpyxl.load_workbook(filepath, data_only=True)
-    sheetnames = wb_obj.sheetnames
-    tables_per_sheet = {}
-    for sheet_name in sheetnames:
-        w_sheet = wb_obj[sheet_name]
-        num_sheet_col = w_sheet.max_column
-        num_sheet_row = w_sheet.max_row
-        ## unmerge cells
-        groups = w_sheet.merged_cells
-        for group in list(groups):
-            w_sheet.unmerge_cells(range_string=str(group))
-            min_col, min_row, max_col, max_row = range_boundaries(str(group))
-            top_left_cell_value = w_sheet.cell(row=min_row, column=min_col).value
-            for row in w_sheet.iter_rows(min_col=min_col, min_row=min_row, max_col=max_col, max_row=max_row):
-                for cell in row:
-                    cell.value = top_left_cell_value
-
-        ## clustering tables in a worksheet by connected components.
-        raw_sheet = [] ## read value of all cells.
-        binary_sheet = []  ## 1 (foreground) if cell contains value, otherwise 0 (background)
-        for row in w_sheet.iter_rows(min_col=1, min_row=1, max_col=num_sheet_col, max_row=num_sheet_row):
-            binary_row = []
-            value_row = []
-            for cell in row:
-                ## read raw value, take care of reading datetime properly.
-                if cell.value:
-                    if isinstance(cell.value, datetime.datetime):
-                        value_row.append(cell.value.strftime('%m/%d/%Y'))
-                    else:
-                        value_row.append(cell.value)
-                else:
-                    value_row.append("")
-                    
-                ## decide if a cell contains a value (hence a foreground cell)
-                if cell.value:
-                    binary_row.append(True)
-                elif cell.fill.patternType:
-                    binary_row.append(True)
-                elif cell.border.left.style or cell.border.right.style:
-                    binary_row.append(True)
-                else:
-                    binary_row.append(False)
-            raw_sheet.append(value_row)
-            binary_sheet.append(binary_row)
-
-        ## find connected components
-        cnt_components = np.array(binary_sheet)
-        cnt_component_labels, n_cnt_component = ndi.label(cnt_components)
-
-        ## each connected component can be a potential independent table.
-        tables = []
-        for i_label in range(1, n_cnt_component + 1):
-            ## define the rectangle that may contain a table
-            min_row = 0
-            max_row = 0
-            min_col = 0
-            max_col = 0
-            for i_line, line in enumerate(cnt_component_labels):
-                if i_label in line:
-                    min_row = i_line
-                    break
-            for i_line, line in enumerate(list(map(list, zip(*cnt_component_labels)))):
-                if i_label in line:
-                    min_col = i_line
-                    break
-            for i_line, line in enumerate(cnt_component_labels[::-1]):
-                if i_label in line:
-                    max_row = len(cnt_component_labels) - 1 - i_line
-                    break
-            for i_line, line in enumerate(list(map(list, zip(*cnt_component_labels)))[::-1]):
-                if i_label in line:
-                    max_col = num_sheet_col - 1 - i_line
-                    break 
-            ## check if there exist potentially a table in the rectangle.
-            table = np.array(raw_sheet)[min_row:max_row+1,min_col:max_col+1]
-            if table.shape[0] > 1 and table.shape[1] > 1:
-                tables.append(table.tolist())
-        tables_per_sheet[f"tableFromExcelSheet_{sheet_name}"] = tables
-    return tables_per_sheet
+    if num_workers > 1:
+        wb_obj = openpyxl.load_workbook(filepath, read_only=True)
+        sheetnames = wb_obj.sheetnames
+        wb_obj.close()
+        if len(sheetnames) > 1:
+            with ProcessPoolExecutor(max_workers=min(num_workers, len(sheetnames))) as executor:
+                tables_of_sheets = list(executor.map(partial(_excel_sheet_to_tables, filepath), sheetnames))
+            return {f"tableFromExcelSheet_{sheet_name}": tables for sheet_name, tables in zip(sheetnames, tables_of_sheets)}
+    return {f"tableFromExcelSheet_{sheet_name}": _sheet_to_tables(cells, merged_ranges, foreground_styles)
+                for sheet_name, cells, merged_ranges, foreground_styles in _read_excel_sheets(filepath)}
 
 def deprecated_excel_to_table(filepath):
     """
@@ -179,24 +269,13 @@ def deprecated_excel_to_table(filepath):
         return []
     sheet_names = xl.sheet_names
     for i_sheet in range(len(sheet_names)):
-        excel_sheet = pd.read_excel(filepath, header=None, sheet_name=i_sheet)
-        excel_sheet = excel_sheet.values.tolist()  
+        excel_sheet = pd.read_excel(filepath, header=None, sheet_name=i_sheet).values
+        has_value = ~pd.isna(excel_sheet)
+        ## a line ends after its last non NaN cell, trailing NaN are trimmed and inner ones become "".
+        ends_of_line = (has_value*np.arange(1, has_value.shape[1] + 1)).max(axis=1, initial=0)
         single_table = []
-        for line in excel_sheet:
-            i_element = len(line) - 1
-            end_of_line = len(line) - 1
-            is_eol = False
-            while i_element >= 0:
-                if pd.isna(line[i_element]):
-                    if not is_eol:
-                        end_of_line -= 1
-                    else:
-                        line[i_element] = ""
-                else:
-                    is_eol = True
-                i_element -= 1
-            line = line[:end_of_line+1]
-            line = [str(s) for s in line]
+        for line, line_has_value, end_of_line in zip(excel_sheet.tolist(), has_value, ends_of_line):
+            line = [str(s) if is_value else "" for s, is_value in zip(line[:end_of_line], line_has_value)]
             if line == []:
                 if single_table != []:
                     list_tables.append(single_table)
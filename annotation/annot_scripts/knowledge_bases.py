@@ -20,19 +20,45 @@
 import lmdb
 import json
 import pickle
+from functools import lru_cache
+from types import MappingProxyType
+import numpy as np
 from .abstract_classes import AbstractKnowledgeBase
 
+## LMDB sub-database of the entity names (labels, aliases, descriptions), see data/hashmap/wd_hashmap_indexing.py
+NAMES_DB = b"names"
+## field of an edge record holding its number of edges, see data/hashmap/wd_hashmap_indexing.py
+NUM_EDGES_FIELD = "_num_edges"
+## fields of an edge record which are not edges: the names in older dumps, the number of edges in recent ones.
+_NAME_FIELDS = frozenset(("labels", "aliases", "descriptions"))
+_NON_EDGE_FIELDS = _NAME_FIELDS | {NUM_EDGES_FIELD}
+
+def _num_edges(record):
+    """ Number of edges of an edge record: stored by recent dumps, counted otherwise. """
+    num_edges = record.get(NUM_EDGES_FIELD)
+    if num_edges is None:
+        num_edges = sum(len(obj_dict) for prop, obj_dict in record.items() if prop not in _NAME_FIELDS)
+    return num_edges
+
 class Wikidata_KB(AbstractKnowledgeBase):
     """ Wikidata KB Interface """
-    def __init__(self, dump_path):
+    def __init__(self, dump_path, cache_size=100000):
         """ Initialize the Wikidata KB """
+        super().__init__(dump_path, cache_size)
+        ## unpickled records of the entities, shared by the per-entity getters (see _load).
+        self._load = lru_cache(maxsize=cache_size)(self._read_record)
         ## list of properties to be considered in CTA
         self.type_properties =  ["P31", "P106", "P39", "P105"]
         ## PID of subclass property in Wikidata KB.
         self.instanceOfPID = "P31"
         self.subClassPID = "P279"
+        ## URI prefix by first char of an id: entity (Q...) or property (P...)
+        ##     "https://www.wikidata.org/wiki/" and "https://www.wikidata.org/wiki/Property:" would be wiki redirects.
+        self.id_prefixes = {"Q": "http://www.wikidata.org/entity/", "P": "http://www.wikidata.org/prop/direct/"}
         ## PID of unit symbol in Wikidata KB
         self.unitSymbolPID = "P5061"
+        ## unit entity -> its symbol (see get_symbol_of_unit_entity), units are few and often repeated.
+        self._unit_symbols = {}
         ## pairs of time periods
         self.timePeriodPID = [
             ("P571", "P576"), ("P571", "P2699"), ("P571", "P730"), ("P571", "P3999"),
@@ -51,7 +77,13 @@ class Wikidata_KB(AbstractKnowledgeBase):
             ## load the unit_entity dictionary
             self.unit_entity_mapping = json.load(open(dump_path + "/units.json", "r"))
             ## wikidata edges reader
-            self.edge_reader = lmdb.open(dump_path + "/edges", readonly=True, readahead=False, lock=False)
+            self.edge_reader = lmdb.open(dump_path + "/edges", readonly=True, readahead=False, lock=False, max_dbs=1)
+            ## recent dumps store the names of an entity apart from its edges, so that edge reads do not unpickle them.
+            ##     older dumps keep the names in the edge records.
+            try:
+                self.names_db = self.edge_reader.open_db(NAMES_DB, create=False)
+            except lmdb.NotFoundError:
+                self.names_db = None
             self.edge_txn = self.edge_reader.begin()
         except Exception as e:
             print(f" Error loading knowledge dumps. Details: {e} !! ")
@@ -66,50 +98,55 @@ class Wikidata_KB(AbstractKnowledgeBase):
             return True
         return False
 
-    def get_subgraph_of_entity(self, entity_id):
-        """ Get forward nodes (predicate->object) and backward nodes (subject->predicate) of an entity in KG. """
+    def _read_record(self, entity_id):
+        """ Read and unpickle the edge record of an entity: {prop: objs}, with its "labels", "aliases", "descriptions" in older dumps. 
+            {} if the entity is unknown. """
         key = self.edge_txn.get(entity_id.encode("ascii"))
-        if key:
-            prop_obj_dict = pickle.loads(key)   
-            del prop_obj_dict["labels"], prop_obj_dict["aliases"],  prop_obj_dict["descriptions"]  
-        else:
-            prop_obj_dict = {}
-        return prop_obj_dict
+        return pickle.loads(key) if key else {}
+
+    def _read_names(self, entity_id):
+        """ Read the names of an entity: {"labels": [...], "aliases": [...], "descriptions": [...]}. {} if the entity is unknown. """
+        if self.names_db is None:
+            return self._load(entity_id)
+        key = self.edge_txn.get(entity_id.encode("ascii"), db=self.names_db)
+        return pickle.loads(key) if key else {}
+
+    def _get_subgraph_of_entity_impl(self, entity_id):
+        """ Get forward nodes (predicate->object) and backward nodes (subject->predicate) of an entity in KG. """
+        ## the cached record is shared, its edges are copied without the names.
+        return {prop: objs for prop, objs in self._load(entity_id).items() if prop not in _NON_EDGE_FIELDS}
     
-    def get_label_of_entity(self, entity_id):
+    def _get_label_of_entity_impl(self, entity_id):
         """ Get the labels and aliases of an entity. Language info is not returned 
             If only_one = True, return the default en label """
         en_label = ""
-        key = self.edge_txn.get(entity_id.encode("ascii"))
-        if key:
-            prop_obj_dict = pickle.loads(key)
+        prop_obj_dict = self._read_names(entity_id)
+        if prop_obj_dict:
             if prop_obj_dict["labels"]:
                 en_label = prop_obj_dict["labels"][0]
             else:
                 en_label = "No English Label"
         return en_label
 
-    def get_num_edges(self, entity_id):
+    def _get_num_edges_impl(self, entity_id):
         """ Get number of incoming edges of an entity in KG """
-        key = self.edge_txn.get(entity_id.encode("ascii"))
-        num_edges = 0
-        if key:
-            prop_obj_dict = pickle.loads(key)
-            for prop, obj_dict in prop_obj_dict.items():
-                if prop not in ["descriptions", "labels", "aliases"]:
-                    num_edges += len(obj_dict)
-        return num_edges
+        return _num_edges(self._load(entity_id))
             
     def get_symbol_of_unit_entity(self, unit_entity_id):
         """ get the unit symbol of an unit entity. E.g. unit symbol of Q11573 (metre) is m """
-        key = self.edge_txn.get(unit_entity_id.encode("ascii"))
-        if key:
-            prop_obj_dict = pickle.loads(key)
+        if unit_entity_id not in self._unit_symbols:
+            self._unit_symbols[unit_entity_id] = self._read_symbol_of_unit_entity(unit_entity_id)
+        return self._unit_symbols[unit_entity_id]
+
+    def _read_symbol_of_unit_entity(self, unit_entity_id):
+        """ Read the unit symbol of an unit entity from the KB (see get_symbol_of_unit_entity) """
+        prop_obj_dict = self._load(unit_entity_id)
+        if prop_obj_dict:
             ## since Pint does not support officially currency, we should handle it ourself by defining Currency in Pint. First, convert currency symbol to name (e.g. € to euro)
             ##     since Pint does not accept special symbols like currency symbols. 
             ## Currently, we only support: dollar, euro, japanese_yen, chinese_yuan, pound_sterling, south_korean_won, russian_ruble, australian_dollar"
             if "Q8142" in prop_obj_dict.get(self.instanceOfPID, {}): ## if unit indicates currency (Q8142)
-                return "_".join(self.get_label_of_entity(unit_entity_id, only_one=True).lower().split(" "))
+                return self.get_label_of_entity(unit_entity_id).lower().replace(" ", "_")
             else:
                 if self.unitSymbolPID in prop_obj_dict:
                     return list(prop_obj_dict[self.unitSymbolPID].keys())[0]
@@ -124,61 +161,108 @@ class Wikidata_KB(AbstractKnowledgeBase):
         return self.unit_entity_mapping.get(unit_dim, {}).get("wikidataID", None).replace("http://www.wikidata.org/entity/", "")
 
     def get_supertypes_of_type(self, type_id):
-        """ return supertype of an entity type """
-        key = self.edge_txn.get(type_id.encode("ascii"))
-        if key:
-            prop_obj_dict = pickle.loads(key)
-        else:
-            prop_obj_dict = {}    
-        super_type = prop_obj_dict.get(self.subClassPID, {})
-        return super_type
+        """ return supertype of an entity type, as a read-only view of the cached record """
+        super_type = self._load(type_id).get(self.subClassPID, {})
+        return MappingProxyType(super_type)
 
-    def get_types_of_entity(self, entity_id, num_level=1):
+    def _get_types_of_entity_impl(self, entity_id, num_level=1):
         """ get the hierachical types of an entity upto num_level. (Level 0 is direct types).
             If muti_properties is True, other properties in self.type_properties, 
                                                         apart from P31, are also considered."""
-        hierachical_types = {}
+        return self.get_types_of_entities([entity_id], num_level)[entity_id]
+
+    def get_types_of_entities(self, entity_ids, num_level=1):
+        """ get the hierachical types of many entities upto num_level (see get_types_of_entity). 
+            Records of each hierarchy level are read in a single batch for all entities. """
+        hierachical_types = {entity_id: {} for entity_id in entity_ids}
         if num_level > 0:
-            key = self.edge_txn.get(entity_id.encode("ascii"))
-            if key:
-                prop_obj_dict = pickle.loads(key)
-            else:
-                prop_obj_dict = {}
-
-            instanceOf_types = {}
-            others_types = {}
-            for prop in self.type_properties:
-                a_type = prop_obj_dict.get(prop, None)
-                if a_type:
-                    if prop == self.instanceOfPID:
-                        instanceOf_types.update(a_type)
-                    else:
-                        others_types.update(a_type)
-            if others_types:
-                hierachical_types[f"level_1"] = others_types 
-                # hierachical_types[f"level_2"] = instanceOf_types 
-            else:
-                hierachical_types[f"level_1"] = instanceOf_types 
+            records = self._load_many(hierachical_types)
+            for entity_id, entity_types in hierachical_types.items():
+                prop_obj_dict = records.get(entity_id, {})
+                instanceOf_types = {}
+                others_types = {}
+                for prop in self.type_properties:
+                    a_type = prop_obj_dict.get(prop, None)
+                    if a_type:
+                        if prop == self.instanceOfPID:
+                            instanceOf_types.update(a_type)
+                        else:
+                            others_types.update(a_type)
+                if others_types:
+                    entity_types[f"level_1"] = others_types 
+                    # entity_types[f"level_2"] = instanceOf_types 
+                else:
+                    entity_types[f"level_1"] = instanceOf_types 
 
             if num_level > 1:
-                inter_types = hierachical_types[f"level_1"]
+                inter_types = {entity_id: entity_types[f"level_1"] for entity_id, entity_types in hierachical_types.items()}
+                super_types = {} ## type -> its super types, shared by all entities.
                 for i in range(2, num_level+1):
-                    if f"level_{i}" not in hierachical_types:
-                        hierachical_types[f"level_{i}"] = {}
-                    types = {}
-                    for t in inter_types:
-                        key = self.edge_txn.get(t.encode("ascii"))
-                        if key:
-                            prop_obj_dict = pickle.loads(key)
-                        else:
-                            prop_obj_dict = {}
-                        super_type = prop_obj_dict.get(self.subClassPID, None)
-                        if super_type:
-                            types.update(super_type)                    
-                    hierachical_types[f"level_{i}"].update(types)
-                    inter_types = types
+                    ## fetch the records of all types at this level in one batch.
+                    missing_types = {t for types in inter_types.values() for t in types if t not in super_types}
+                    type_records = self._load_many(missing_types)
+                    for t in missing_types:
+                        super_types[t] = type_records.get(t, {}).get(self.subClassPID, None)
+                    for entity_id, entity_types in hierachical_types.items():
+                        if f"level_{i}" not in entity_types:
+                            entity_types[f"level_{i}"] = {}
+                        types = {}
+                        for t in inter_types[entity_id]:
+                            super_type = super_types[t]
+                            if super_type:
+                                types.update(super_type)                    
+                        entity_types[f"level_{i}"].update(types)
+                        inter_types[entity_id] = types
         return hierachical_types
 
+    def get_subgraphs_of_entities(self, entity_ids):
+        """ Get the subgraphs of many entities (see get_subgraph_of_entity) in a single batch read. """
+        records = self._load_many(entity_ids)
+        subgraphs = {}
+        for entity_id in entity_ids:
+            prop_obj_dict = records.get(entity_id, {})
+            for field in _NON_EDGE_FIELDS:
+                prop_obj_dict.pop(field, None)
+            subgraphs[entity_id] = prop_obj_dict
+        return subgraphs
+
+    def get_labels_of_entities(self, entity_ids):
+        """ Get the default en labels of many entities (see get_label_of_entity) in a single batch read. """
+        records = self._load_many(entity_ids, names=True)
+        labels = {}
+        for entity_id in entity_ids:
+            en_label = ""
+            if entity_id in records:
+                if records[entity_id]["labels"]:
+                    en_label = records[entity_id]["labels"][0]
+                else:
+                    en_label = "No English Label"
+            labels[entity_id] = en_label
+        return labels
+
+    def get_names_of_entities(self, entity_ids):
+        """ Get the labels and aliases of many entities in a single batch read: {entity_id: {"labels": [...], "aliases": [...]}} """
+        records = self._load_many(entity_ids, names=True)
+        names = {}
+        for entity_id in entity_ids:
+            prop_obj_dict = records.get(entity_id, {})
+            names[entity_id] = {"labels": prop_obj_dict.get("labels", []), "aliases": prop_obj_dict.get("aliases", [])}
+        return names
+
+    def get_num_edges_batch(self, entity_ids):
+        """ Get number of incoming edges of many entities in a single batch read. """
+        records = self._load_many(entity_ids)
+        return {entity_id: _num_edges(records.get(entity_id, {})) for entity_id in entity_ids}
+
+    def _load_many(self, entity_ids, names=False):
+        """ Read the edge records (or the names if names is True) of many entities with one LMDB cursor pass: {entity_id: record}. 
+            Missing entities are omitted. Safe to call from several threads. """
+        keys = sorted({entity_id.encode("ascii") for entity_id in entity_ids}) ## sorted keys walk the B-tree in order.
+        db = self.names_db if names else None ## names are in the edge records of older dumps.
+        ## a short-lived read transaction per call: LMDB transactions must not be shared between threads.
+        with self.edge_reader.begin() as txn, txn.cursor(db) as cursor:
+            return {key.decode("ascii"): pickle.loads(value) for key, value in cursor.getmulti(keys)}
+
     def map_rank(self, rank):
         """ 
             Each wikidata attribute has a rank {"PREFERRED", "NORMAL", "DEPRECATED"}.
@@ -193,12 +277,14 @@ class Wikidata_KB(AbstractKnowledgeBase):
 
     def prefixing_entity(self, entity):
         """ Appending prefix to entity """
-        if entity[0] == "Q": ## entity
-            # return "https://www.wikidata.org/wiki/" + entity
-            return "http://www.wikidata.org/entity/" + entity ## avoid wiki redirect, use real identifier of property
-        elif entity[0] == "P": ## property
-            # return "https://www.wikidata.org/wiki/Property:" + entity
-            return "http://www.wikidata.org/prop/direct/" + entity ## avoid wiki redirect, use real identifier of entity
-        else:
-            return entity
+        ## entity (Q...) and property (P...) use their real identifier to avoid wiki redirect, other ids are returned as is.
+        return self.id_prefixes.get(entity[:1], "") + entity
 
+    def prefixing_entities(self, entities):
+        """ Appending prefix to many entities at once """
+        entities = np.asarray(entities, dtype=str)
+        first_chars = entities.astype("<U1")
+        prefixes = np.full(entities.shape, "", dtype=f"<U{max(len(p) for p in self.id_prefixes.values())}")
+        for first_char, prefix in self.id_prefixes.items():
+            prefixes[first_chars == first_char] = prefix
+        return np.char.add(prefixes, entities).tolist()
@@ -17,8 +17,13 @@
  * See the License for the specific language governing permissions and
  * limitations under the License.
 """
+import re
+from functools import lru_cache
+from datetime import datetime
 from dateutil.parser import parse
-from rapidfuzz import fuzz
+from rapidfuzz import fuzz, process
+from rapidfuzz.utils import default_process
+import numpy as np
 from quantulum3 import parser as qt_unit_parser
 import pint
 ureg = pint.UnitRegistry()
@@ -36,37 +41,75 @@ ureg.load_definitions("""
     australian_dollar = 0.75 dollar
 """.splitlines())
 
+## only letters that may start a string accepted by float(): inf, infinity, nan.
+_FLOAT_FIRST_LETTERS = frozenset("iInN")
+
 def float_parse(value):
     """ Check whether an input str is a float, if yes, return the float"""
     if isinstance(value, float) or isinstance(value, int):
         return value
     elif isinstance(value, str):
+        if "," in value:
+            value = value.replace(",", "")
+        ## textual cells are rejected by their first letter, without raising an exception in float().
+        first_char = value[:1]
+        if first_char.isalpha() and first_char not in _FLOAT_FIRST_LETTERS:
+            return None
         try:
-            return float(value.replace(",", ""))
+            return float(value)
         except:
             return None
 
+@lru_cache(maxsize=65536)
+def parse_date(s):
+    """ Parse a date str, memoized since the same KG dates and table cells are compared many times. None if s is not a date. """
+    try:
+        if len(s) == 10 and s[4] == "-" and s[7] == "-":
+            ## Plain ISO days (most KG dates) skip dateutil, invalid ones still fall back to it.
+            try:
+                return datetime.fromisoformat(s)
+            except ValueError:
+                pass
+        return parse(s)
+    except:
+        return None
+
 def date_similarity(s1, s2, operator):
     """ Check whether an 2 input str is 2 possible equal datetimes """
     try:
-        if operator(parse(s1), parse(s2)):
+        d1, d2 = parse_date(s1), parse_date(s2)
+        if d1 is not None and d2 is not None and operator(d1, d2):
             return True
         return False
     except:
         return False 
 
+def date_equal(s1, s2):
+    """ Check whether an 2 input str is 2 possible equal datetimes, i.e. date_similarity(s1, s2, operator.eq) """
+    try:
+        d1 = parse_date(s1)
+        return d1 is not None and d1 == parse_date(s2)
+    except:
+        return False
+
 def get_year_from_date(d):
     " return year from date"
     try:
-        return str(parse(d).year)
+        return str(parse_date(d).year)
     except:
         return False      
 
+## the ratios of textual_similarity(ies) and their processors: token based ratios ignore punctuation. 
+##     these are the defaults of the pinned rapidfuzz 1.9.1, they are explicit since process.cdist and rapidfuzz >= 2 apply no processor by default.
+_TEXTUAL_SCORERS = ((fuzz.ratio, None), (fuzz.token_sort_ratio, default_process), (fuzz.token_set_ratio, default_process))
+
 def textual_similarity(s1, s2):
-    """ Calculate the simliarity score between two textual values using three levenstein distances. """
-    char_based_ratio = fuzz.ratio(s1.lower(), s2.lower())/100
-    token_sort_based_ratio = fuzz.token_sort_ratio(s1.lower(), s2.lower())/100
-    token_set_based_ratio = fuzz.token_set_ratio(s1.lower(), s2.lower())/100
+    """ Calculate the simliarity score between two textual values using three levenstein distances. 
+        Many strings are compared at once with textual_similarities. """
+    s1, s2 = s1.lower(), s2.lower()
+    char_based_ratio = fuzz.ratio(s1, s2, processor=None)/100
+    token_sort_based_ratio = fuzz.token_sort_ratio(s1, s2, processor=default_process)/100
+    token_set_based_ratio = fuzz.token_set_ratio(s1, s2, processor=default_process)/100
     ## the final ratio is the mean of two maximum ratios among three ratios. 
     ## to avoid that 2 ratios of same values dominate the other.
     ## e.g. char_based_ratio("universal", "universal picture") = token_sort_based_ratio("universal", "universal picture") = 0.66
@@ -75,6 +118,18 @@ def textual_similarity(s1, s2):
     return final_ratio
     # return (fuzz.ratio(s1.lower(), s2.lower())/100 + fuzz.token_sort_ratio(s1.lower(), s2.lower())/100 + fuzz.token_set_ratio(s1.lower(), s2.lower())/100)/3
 
+def textual_similarities(s, choices):
+    """ textual_similarity of s with every string of choices, computed in one batch: returns a float64 array aligned with choices. """
+    if not choices:
+        return np.zeros(0, dtype=np.float64)
+    query = [s.lower()]
+    choices = [choice.lower() for choice in choices]
+    ratios = np.vstack([process.cdist(query, choices, scorer=scorer, processor=processor, dtype=np.float64)[0]/100
+                        for scorer, processor in _TEXTUAL_SCORERS])
+    ## same as textual_similarity: mean of the two maximum ratios among three ratios.
+    ratios.sort(axis=0)
+    return (ratios[2] + ratios[1])/2
+
 def dimensionless_quantity_similarity(s1, s2):
     """ Calculate the similarity score between two dimensionless (quantity) values. """
     s1_float = float_parse(s1)
@@ -85,31 +140,47 @@ def dimensionless_quantity_similarity(s1, s2):
     else:
         return 0.0
 
+## plain numbers, e.g. "1994" or "-3.5", that quantulum can only parse as dimensionless.
+_PLAIN_NUMBER_RE = re.compile(r"[-+]?\d+(?:\.\d+)?")
+
+@lru_cache(maxsize=4096)
+def _base_unit_of(unit_name):
+    """ Base unit and multiplier of a Pint unit name, memoized since Pint parsing dominates standardize_to_base_unit. 
+        None if Pint cannot convert it or if it is not multiplicative. """
+    try:
+        if ureg.Quantity(0, unit_name).to_base_units().magnitude != 0:
+            ## offset units, e.g. degree Celsius (0 °C is 273.15 K), are not multiplicative.
+            return None
+        base_measure = ureg(unit_name).to_base_units()
+        return base_measure.units, base_measure.magnitude
+    except:
+        return None
+
 def standardize_to_base_unit(measure):
     """ standardize a measurement with unit to base unit. E.g. 5 km -> 5000 m given that metre is base unit of length """
     standardized_measure = {}
     if isinstance(measure, str): ## if inuput measure is plain text, e.g. "5 km"
+        if _PLAIN_NUMBER_RE.fullmatch(measure):
+            ## no unit to standardize, skip the quantulum parsing.
+            return standardized_measure
         parsed_measure = qt_unit_parser.parse(measure)
         for a_unit in parsed_measure:
             if a_unit.unit.name != "dimensionless":
                 try:
-                    transformed_measure = float(a_unit.value)*ureg("_".join(a_unit.unit.name.lower().split(" "))).to_base_units()
-                    if transformed_measure.units not in standardized_measure:
-                        standardized_measure[transformed_measure.units] = [transformed_measure.magnitude]
-                    else:
-                        for magnitude in standardized_measure[transformed_measure.units]:
-                            if 0.98 < magnitude/transformed_measure.magnitude < 0.98**-1:
-                                ## this indicates that single measure has different units, hence, we dont need to append 
-                                ##           duplicated measure into result
-                                pass
-                            else:
-                                standardized_measure[transformed_measure.units].append(transformed_measure.magnitude)
+                    base_unit, multiplier = _base_unit_of("_".join(a_unit.unit.name.lower().split(" ")))
+                    transformed_magnitude = float(a_unit.value)*multiplier
+                    if base_unit not in standardized_measure:
+                        standardized_measure[base_unit] = [transformed_magnitude]
+                    elif not any(0.98 < magnitude/transformed_magnitude < 0.98**-1 for magnitude in standardized_measure[base_unit]):
+                        ## a magnitude close to a previous one indicates that single measure has different units, 
+                        ##           hence, we only append measures that are not duplicated in the result.
+                        standardized_measure[base_unit].append(transformed_magnitude)
                 except:
                     pass
     elif isinstance(measure, dict) and "value" in measure and "unit" in measure:
         try:
-            transformed_measure = float(measure["value"])*ureg(measure["unit"]).to_base_units()
-            standardized_measure[transformed_measure.units] = [transformed_measure.magnitude]
+            base_unit, multiplier = _base_unit_of(measure["unit"])
+            standardized_measure[base_unit] = [float(measure["value"])*multiplier]
         except:
             pass
 
@@ -134,26 +205,11 @@ def standardize_to_base_unit(measure):
 #     else:
 #         return 0.0
 
-def named_entity_related_typing(t):
-    """ Verify whether a type t talks about an entity. """
-    named_entity_list = ["UNKNOWN", "PERSON", "ORG", "FAC", "GPE", "LANGUAGE", "LAW", "LOC", "NORP", "ORG", "PRODUCT", "WORK_OF_ART", "EVENT"]
-    if t in named_entity_list:
-        return True 
-    else:
-        return False
-    
-def date_related_typing(t):
-    """ Verify whether a type t talks about a date. """
-    if t == "DATE":
-        return True 
-    else:
-        return False    
-
-def numerical_typing_with_unit(t):
-    """ Verify whether a type t talks about numerial entity that has an unit. """
-    with_unit_list = ['PERCENT', 'DISTANCE', 'MASS', 'MONEY', 'DURATION',
-                         'TEMPERATURE', 'CHARGE', 'ANGLE', 'DATA STORAGE',
-                         'AMOUNT OF SUBSTANCE', 'CATALYTIC ACTIVITY', 'AREA',
+## column typings of entities, numerical values with an unit, numerical values without unit.
+_NAMED_ENTITY_TYPINGS = frozenset(["UNKNOWN", "PERSON", "ORG", "FAC", "GPE", "LANGUAGE", "LAW", "LOC", "NORP", "ORG", "PRODUCT", "WORK_OF_ART", "EVENT"])
+_WITH_UNIT_TYPINGS = frozenset(['PERCENT', 'DISTANCE', 'MASS', 'MONEY', 'DURATION',
+                        'TEMPERATURE', 'CHARGE', 'ANGLE', 'DATA STORAGE',
+                        'AMOUNT OF SUBSTANCE', 'CATALYTIC ACTIVITY', 'AREA',
                         'VOLUME','VOLUME (LUMBER)', 'FORCE', 'PRESSURE',
                         'ENERGY', 'POWER', 'SPEED', 'ACCELERATION',
                         'FUEL ECONOMY', 'FUEL CONSUMPTION', 'ANGULAR SPEED', 'ANGULAR ACCELERATION',
@@ -169,19 +225,27 @@ def numerical_typing_with_unit(t):
                         'ELECTRICAL CONDUCTANCE', 'ELECTRICAL CONDUCTIVITY', 'CAPACITANCE', 'INDUCTANCE',
                         'MAGNETIC FLUX', 'RELUCTANCE', 'MAGNETOMOTIVE FORCE', 'MAGNETIC FIELD',
                         'IRRADIANCE', 'RADIATION ABSORBED DOSE', 'RADIOACTIVITY', 'RADIATION EXPOSURE',
-                        'RADIATION', 'DATA TRANSFER RATE']
-    if t in with_unit_list:
-        return True
+                        'RADIATION', 'DATA TRANSFER RATE'])
+_WITHOUT_UNIT_TYPINGS = frozenset(["CARDINAL", "QUANTITY", "ORDINAL"])
+
+def named_entity_related_typing(t):
+    """ Verify whether a type t talks about an entity. """
+    return t in _NAMED_ENTITY_TYPINGS
+    
+def date_related_typing(t):
+    """ Verify whether a type t talks about a date. """
+    if t == "DATE":
+        return True 
     else:
-        return False
+        return False    
+
+def numerical_typing_with_unit(t):
+    """ Verify whether a type t talks about numerial entity that has an unit. """
+    return t in _WITH_UNIT_TYPINGS
 
 def numerical_typing_without_unit(t):
     """ Verify whether a type t talks about numerical entity that doesn't have an unit. """
-    without_unit_list = ["CARDINAL", "QUANTITY", "ORDINAL"]
-    if t in without_unit_list:
-        return True
-    else:
-        return False
+    return t in _WITHOUT_UNIT_TYPINGS
 
 
 
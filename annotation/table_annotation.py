@@ -43,7 +43,7 @@ def table_annotation(raw_table, K=20, kb_path="./data/hashmap", lookup_index="da
 						"cpaTaskTime": 0.0,
 						"avgLookupCandidate": 0.0}	
 
-	params = {"multiHop_context": True, "transitivePropertyOnly_path": False, "soft_scoring": True, "K": K}
+	params = {"multiHop_context": True, "transitivePropertyOnly_path": False, "soft_scoring": True, "soa_subgraph": True, "subgraph_cache_size": 100000, "context_workers": 1, "max_context_paths": None, "annotation_workers": 1, "K": K}
 	baseline_model = Baseline_Model(table=raw_table, target_kb=target_kb, params=params)
 	## record the size of subgraphs. Disabled in production due to time consuming.
 	if baseline_model.is_model_init_success:
@@ -55,14 +55,10 @@ def table_annotation(raw_table, K=20, kb_path="./data/hashmap", lookup_index="da
 			for row_idx in range(baseline_model.first_data_row, baseline_model.num_rows):
 				baseline_model.cea_task(col_index=col_idx, row_index=row_idx, only_one=False)
 		# CPA
-		for i in range(len(baseline_model.entity_cols)-1):
-			head_col = baseline_model.entity_cols[i]
-			for j in range(i+1, len(baseline_model.entity_cols)):
-				tail_col = baseline_model.entity_cols[j]
-				baseline_model.cpa_task(head_col_index=head_col,tail_col_index=tail_col, only_one=False)
-		for head_col in baseline_model.entity_cols:
-			for tail_col in baseline_model.literal_cols:
-				baseline_model.cpa_task(head_col_index=head_col,tail_col_index=tail_col, only_one=False)  
+		entity_cols = baseline_model.entity_cols
+		col_pairs = [(entity_cols[i], entity_cols[j]) for i in range(len(entity_cols)-1) for j in range(i+1, len(entity_cols))] + \
+					[(head_col, tail_col) for head_col in entity_cols for tail_col in baseline_model.literal_cols]
+		baseline_model.cpa_tasks(col_pairs, only_one=False)
 		# Weight update: soft scoring
 		baseline_model.update_context_weight()
 		baseline_model.entity_scoring_task(first_step=False)
@@ -71,25 +67,16 @@ def table_annotation(raw_table, K=20, kb_path="./data/hashmap", lookup_index="da
 		for col_idx in baseline_model.entity_cols:
 			for row_idx in range(baseline_model.first_data_row, baseline_model.num_rows):
 				baseline_model.cea_task(col_index=col_idx, row_index=row_idx, only_one=False)
-		for col_idx in baseline_model.entity_cols:
-			baseline_model.cta_task(col_index=col_idx, only_one=False)
+		baseline_model.cta_tasks(baseline_model.entity_cols, only_one=False)
 		## Third annotation loop: disambiguation.
 		baseline_model.cea_annot = {}
 		for col_idx in baseline_model.entity_cols:
 			for row_idx in range(baseline_model.first_data_row, baseline_model.num_rows):
 				baseline_model.cea_task(col_index=col_idx, row_index=row_idx, only_one=True)
 		baseline_model.cta_annot = {}
-		for col_idx in baseline_model.entity_cols:
-			baseline_model.cta_task(col_index=col_idx, only_one=True)
+		baseline_model.cta_tasks(baseline_model.entity_cols, only_one=True)
 		baseline_model.cpa_annot = {}
-		for i in range(len(baseline_model.entity_cols)-1):
-			head_col = baseline_model.entity_cols[i]
-			for j in range(i+1, len(baseline_model.entity_cols)):
-				tail_col = baseline_model.entity_cols[j]
-				baseline_model.cpa_task(head_col_index=head_col,tail_col_index=tail_col, only_one=False)
-		for head_col in baseline_model.entity_cols:
-			for tail_col in baseline_model.literal_cols:
-				baseline_model.cpa_task(head_col_index=head_col,tail_col_index=tail_col, only_one=False)
+		baseline_model.cpa_tasks(col_pairs, only_one=False)
 	
 		# Fourth annotation loop: reinforced disambiguation
 		baseline_model.update_context_weight(onlyLiteralContext=True)
@@ -99,47 +86,46 @@ def table_annotation(raw_table, K=20, kb_path="./data/hashmap", lookup_index="da
 			for row_idx in range(baseline_model.first_data_row, baseline_model.num_rows):
 				baseline_model.cea_task(col_index=col_idx, row_index=row_idx, only_one=True)
 		baseline_model.cta_annot = {}
-		for col_idx in baseline_model.entity_cols:
-			baseline_model.cta_task(col_index=col_idx, only_one=True)
+		baseline_model.cta_tasks(baseline_model.entity_cols, only_one=True)
 		baseline_model.cpa_annot = {}
-		for i in range(len(baseline_model.entity_cols)-1):
-			head_col = baseline_model.entity_cols[i]
-			for j in range(i+1, len(baseline_model.entity_cols)):
-				tail_col = baseline_model.entity_cols[j]
-				baseline_model.cpa_task(head_col_index=head_col,tail_col_index=tail_col, only_one=True)
-		for head_col in baseline_model.entity_cols:
-			for tail_col in baseline_model.literal_cols:
-				baseline_model.cpa_task(head_col_index=head_col,tail_col_index=tail_col, only_one=True)
+		baseline_model.cpa_tasks(col_pairs, only_one=True)
 
 		annotation_output["annotated"]["tableDataRevised"] = revised_table
-		annotation_output["annotated"]["CEA"] = [{"row": cell.row_index, "column": cell.col_index, "annotation": {"label": baseline_model.KB.get_label_of_entity(cea[0]["id"]), 
-														"uri": baseline_model.KB.prefixing_entity(cea[0]["id"]),
+		## fetch the labels and uris of all annotated entities, types and properties in one batch.
+		cpa_id_components = {}
+		for col_pair, cpa in baseline_model.cpa_annot.items():
+			rel_id = cpa[0]["id"]
+			cpa_id_components[col_pair] = [a_id for a_id in set(rel_id.replace("(-)", "").replace("(", "").replace(")", "").split("::")) if baseline_model.KB.is_valid_ID(a_id)]
+		labels = baseline_model.KB.get_labels_of_entities({cea[0]["id"] for cea in baseline_model.cea_annot.values()} | 
+													{cta["id"] for cta_list in baseline_model.cta_annot.values() for cta in cta_list} |
+													{a_id for id_components in cpa_id_components.values() for a_id in id_components})
+		uris = dict(zip(labels, baseline_model.KB.prefixing_entities(list(labels))))
+		annotation_output["annotated"]["CEA"] = [{"row": cell.row_index, "column": cell.col_index, "annotation": {"label": labels[cea[0]["id"]], 
+														"uri": uris[cea[0]["id"]],
 															"score": round(cea[0]["score"],2)}} for cell, cea in baseline_model.cea_annot.items()]
-		annotation_output["annotated"]["CTA"] = [{"column": col.col_index, "annotation": [{"label": baseline_model.KB.get_label_of_entity(cta["id"]), 
-													"uri":  baseline_model.KB.prefixing_entity(cta["id"]), "score": round(cta["score"],2), 
+		annotation_output["annotated"]["CTA"] = [{"column": col, "annotation": [{"label": labels[cta["id"]], 
+													"uri":  uris[cta["id"]], "score": round(cta["score"],2), 
 													"coverage": round(cta["coverage"],2)} for cta in cta_list]} for col, cta_list in baseline_model.cta_annot.items()]
 		annotation_output["annotated"]["CPA"] = []
 		for col_pair, cpa in baseline_model.cpa_annot.items():
 			rel_id =  cpa[0]["id"]
-			id_components = set(rel_id.replace("(-)", "").replace("(", "").replace(")", "").split("::"))
 			rel_uri = rel_id
 			rel_label = rel_id
-			for a_id in id_components:
-				if baseline_model.KB.is_valid_ID(a_id):
-					rel_uri = rel_uri.replace(a_id, baseline_model.KB.prefixing_entity(a_id))
-					rel_label = rel_label.replace(a_id,baseline_model.KB.get_label_of_entity(a_id))	
+			for a_id in cpa_id_components[col_pair]:
+				rel_uri = rel_uri.replace(a_id, uris[a_id])
+				rel_label = rel_label.replace(a_id, labels[a_id])	
 			annotation_output["annotated"]["CPA"].append({"headColumn": col_pair.head_col_index, "tailColumn": col_pair.tail_col_index, 
 													"annotation": {"label": rel_label, "uri": rel_uri, "score": round(cpa[0]["score"],2), "coverage": round(cpa[0]["coverage"],2)}})
 
 		annotation_output["preprocessed"] = baseline_model.table_infos
 		annotation_output["preprocessed"].pop("tableDataRevised", None)
-		annotation_output["preprocessingTime"] = baseline_model.preprocessing_time
+		annotation_output["preprocessingTime"] = round(baseline_model.preprocessing_time, 2)
 		annotation_output["lookupTime"] = baseline_model.lookup_time
-		annotation_output["entityScoringTime"] = baseline_model.entity_scoring_time
-		annotation_output["subgraphConstructionTime"] = baseline_model.subgraph_construction_time
-		annotation_output["ctaTaskTime"] = baseline_model.cta_task_time
-		annotation_output["ceaTaskTime"] = baseline_model.cea_task_time
-		annotation_output["cpaTaskTime"] = baseline_model.cpa_task_time
+		annotation_output["entityScoringTime"] = round(baseline_model.entity_scoring_time, 2)
+		annotation_output["subgraphConstructionTime"] = round(baseline_model.subgraph_construction_time, 2)
+		annotation_output["ctaTaskTime"] = round(baseline_model.cta_task_time, 2)
+		annotation_output["ceaTaskTime"] = round(baseline_model.cea_task_time, 2)
+		annotation_output["cpaTaskTime"] = round(baseline_model.cpa_task_time, 2)
 		annotation_output["avgLookupCandidate"] = baseline_model.avg_lookup_candidate
 
 		## close graph readers
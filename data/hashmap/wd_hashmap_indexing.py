@@ -42,7 +42,9 @@ logging.info("BEGIN")
 if os.listdir(index_name):
     logging.info("Index exists, Skpipping this step.")
 else:
-    edge_lmdb_writer = lmdb.open(index_name, map_size=248000000000)
+    edge_lmdb_writer = lmdb.open(index_name, map_size=248000000000, max_dbs=1)
+    ## names (labels, descriptions, aliases) are stored in their own sub-database, so that reading the edges of an entity does not unpickle them.
+    names_db = edge_lmdb_writer.open_db(b"names")
     count_item = 0
     with edge_lmdb_writer.begin(write=True) as e_txn:
         with gzip.open(dump_file, "r") as f:
@@ -57,9 +59,10 @@ else:
                 item_infos = json_line[item_QID]
                 # print(item_infos)
                 new_item_infos = {}
+                new_item_names = {}
                 for pid, qid_list in item_infos.items(): 
                     if pid in ["labels", "descriptions", "aliases"]:
-                        new_item_infos[pid] = qid_list.get("en-us", [])
+                        new_item_names[pid] = qid_list.get("en-us", [])
                     else:
                         if "P1889" not in pid:
                             if "(-)" not in pid:
@@ -72,7 +75,10 @@ else:
                                         new_item_infos[pid][qid] = qtype
                             else:
                                 new_item_infos[pid] = qid_list
+                ## number of edges, read without counting them.
+                new_item_infos["_num_edges"] = sum(len(objs) for objs in new_item_infos.values())
                 e_txn.put(item_QID.encode("ascii"), pickle.dumps(new_item_infos))
+                e_txn.put(item_QID.encode("ascii"), pickle.dumps(new_item_names), db=names_db)
                 if (count_item%100000 == 0):
                     logging.info("... Processed " + str(count_item) + " wikidata items.")
     edge_lmdb_writer.close()
@@ -35,7 +35,9 @@ class LookupManager:
         if isinstance(labels, str):
             labels = [labels]
         nb = len(labels)
-        if nb > settings.PARALLEL_MIN and settings.PARALLEL_MODE:
+        ## labels that fit in one _msearch batch are sent in a single round trip, 
+        ##   larger lists are split in 4 tasks sending their batches concurrently.
+        if nb > max(settings.PARALLEL_MIN, settings.MSEARCH_BATCH_SIZE) and settings.PARALLEL_MODE:
             #Split list in 2 and execute lookup in half labels in different tasks
             half = int(nb/2)
             threads = []
@@ -65,15 +67,19 @@ class LookupThread(threading.Thread):
         self.result = []
 
     def run(self):
-        for label in self.labels:
-            self.result.append(self.es_lookup.flat_search_item(self.index_name, label))
+        self.result = self.es_lookup.flat_msearch(self.index_name, self.labels)
 
     def get_result(self):
         return self.result
 
+## one lookup manager per process: its ES connection and lookup cache are reused by all the calls.
+_LOOKUP_MANAGER = None
+
 def entity_lookup(labels, KG):
-    lkp_manager = LookupManager()
-    return lkp_manager.search(labels, KG)
+    global _LOOKUP_MANAGER
+    if _LOOKUP_MANAGER is None:
+        _LOOKUP_MANAGER = LookupManager()
+    return _LOOKUP_MANAGER.search(labels, KG)
 
 if __name__ == "__main__":
     print(entity_lookup(labels=["belgium"], KG="dagobah_lookup"))
\ No newline at end of file
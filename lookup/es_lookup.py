@@ -19,8 +19,11 @@
 """
 from elasticsearch import Elasticsearch
 from rapidfuzz import fuzz
+from rapidfuzz.utils import default_process
 import copy
 import math
+import threading
+from collections import OrderedDict
 from . import settings
 
 class LookupES:
@@ -77,6 +80,10 @@ class LookupES:
         }
     def __init__(self):
         self.es = None
+        ## results of labels already looked up: (index_name, label) -> result, least recently used first.
+        ##     shared by the lookup threads, hence the lock.
+        self.cache = OrderedDict()
+        self.cache_lock = threading.Lock()
  
     def connect(self):
         """Connect to ElasticSearch cluster"""
@@ -92,126 +99,181 @@ class LookupES:
         # connect to ES cluster 
         self.es.cluster.health()
 
+    def _build_flat_request(self, label):
+        """Build the flat index query for a label, return (request, new_label, label_lower)"""
+        request = copy.deepcopy(self.FLAT_QUERY_STRING)
+        new_label = label.replace('"', '').strip() ## only vital preprocessing on input label: replace '"" by '' since ES does not accept double quote and remove last spaces.
+        new_label = " ".join(new_label.split()) # remove multiple space in string
+        label_lower = new_label.lower()
+        request["query"]["function_score"]["query"]["bool"]["should"][0]["bool"]["must"][0]["match"]["label"]["query"] = new_label
+        request["query"]["function_score"]["query"]["bool"]["should"][1]["bool"]["must"][0]["match"]["label.keyword"]["query"] = new_label
+        request["query"]["function_score"]["query"]["bool"]["should"][0]["bool"]["filter"]["range"]["length"]["gte"] = int(len(new_label) * settings.LABEL_LENGTH_MIN_FACTOR)
+        request["query"]["function_score"]["query"]["bool"]["should"][0]["bool"]["filter"]["range"]["length"]["lte"] = int(len(new_label) * settings.LABEL_LENGTH_MAX_FACTOR)
+        request["query"]["function_score"]["query"]["bool"]["should"][1]["bool"]["filter"]["range"]["length"]["gte"] = int(max(0, len(new_label) - settings.LABEL_TOKEN_DIFF))
+        request["query"]["function_score"]["query"]["bool"]["should"][1]["bool"]["filter"]["range"]["length"]["lte"] = int(len(new_label) + settings.LABEL_TOKEN_DIFF)
+        return request, new_label, label_lower
+
+    def _filter_result(self, label, new_label, label_lower, result):
+        """Rank and filter ES hits of a label"""
+        entities_result = []
+        total = result["hits"]["total"]["value"]
+        bm25_max = result["hits"]["max_score"] ## tdidf score max             
+        if (total > 0):
+            #Calculate max ratio for all entities returned by ES
+            entities_set = set()
+            entity_fuzzy_ratio = {} ## store fuzzy matching score
+            entity_bm25_ratio = {} ## store keyword matching (tfidf) score (retrieved from ES)
+            entity_pr_ratio = {}
+            entity_partial_matching = set() ## since partial exact matching sometimes not fit well with levenshtein, 
+                                            ## we do not use levenshtein distances to evaluate the partial matching entity.
+                                            ## for e.g. "YANKEES" vs. "NEW YORK YANKEES"
+            entity_best_label = {}
+            max_ratio = 0.0
+            for hit in result["hits"]["hits"]:
+                #Calculate ratio for label of the entity
+                entity_label = hit["_source"]["label"]
+                entity_origin = hit["_source"]["origin"]
+                bm25_score = hit["_score"]/bm25_max
+                entity_pr_ratio[hit["_source"]["entity"]] = hit["_source"].get("PR", 0.0)
+                entity_bm25_ratio[hit["_source"]["entity"]] = max(entity_bm25_ratio.get(hit["_source"]["entity"], bm25_score), bm25_score)
+                
+                entity_label_lower = entity_label.lower()
+                ## ratio components, token based ratios ignore punctuation (default processors of rapidfuzz 1.x, made explicit)
+                char_based_ratio = 0.9*fuzz.ratio(label_lower, entity_label_lower)/100 + 0.1*fuzz.ratio(new_label, entity_label)/100
+                token_sort_based_ratio = 0.9*fuzz.token_sort_ratio(label_lower, entity_label_lower, processor=default_process)/100 + 0.1*fuzz.token_sort_ratio(new_label, entity_label, processor=default_process)/100
+                if 0.5 < len(label_lower)/len(entity_label_lower) < 2.0: ## token set ratio is noisy, only apply on two labels of similar lengths.
+                    token_set_based_ratio = 0.9*fuzz.token_set_ratio(label_lower, entity_label_lower, processor=default_process)/100 + 0.1*fuzz.token_set_ratio(new_label, entity_label, processor=default_process)/100
+                else:
+                    token_set_based_ratio = 0.0
+                ## find entities that have partial exact matching, we put them directly in output without evaluating levenshtein distances
+                ## since levenshtein does not fit well with partial exact matching.
+                ## to avoid extracting too much irrelevant entities, the entity label should not be too long or too short w.r.t. input label
+                partial_ratio = 0.9*fuzz.partial_ratio(label_lower, entity_label_lower)/100 + 0.1*fuzz.partial_ratio(new_label, entity_label)/100
+                token_diff = abs(len(label_lower.split(" ")) - len(entity_label_lower.split(" "))) ## token difference between 2 labels
+                    ## partial matching ratio and token set ratio are noisy, only apply on two labels of similar lengths.
+                if (partial_ratio > 0.9 and token_diff <= 2) or \
+                        (token_set_based_ratio > 0.9 and 0.5 < len(label_lower)/len(entity_label_lower) < 2.0):                  
+                    entity_partial_matching.add(hit["_source"]["entity"])
+                ## the final ratio is the mean of two maximum ratios among three ratios. 
+                ## to avoid that 2 ratios of same values dominate the other.
+                ## e.g. char_based_ratio("universal", "universal picture") = token_sort_based_ratio("universal", "universal picture") = 0.66
+                ##        so including both ratios in the final ratio will decrease the significance of token_set_based_ratio("universal", "universal picture") which is 1.0
+                ratio = sum(sorted([char_based_ratio, token_sort_based_ratio, token_set_based_ratio], reverse=True)[:2])/2
+
+                #Apply factor according to label origin
+                label_origin = hit["_source"].get("origin")
+                factor = 1
+                if label_origin == "MAIN_ALIAS":
+                    factor = settings.MAIN_ALIAS_FACTOR
+                elif label_origin == "SUB_ALIAS":
+                    factor = settings.SUB_ALIAS_FACTOR
+                ratio *= factor
+
+                #Store max ratio of the queried label
+                max_ratio = max(max_ratio, ratio)
+                #print(hit["_source"]["entity"] + ": " + entity_label + ": " + str(ratio) + " ("+str(hit["_score"])+")")
+                if entity_fuzzy_ratio.get(hit["_source"]["entity"]):
+                    if ratio > entity_fuzzy_ratio[hit["_source"]["entity"]]:
+                        #Store max ratio of the entity
+                        entity_fuzzy_ratio[hit["_source"]["entity"]] = ratio
+                        entity_best_label[hit["_source"]["entity"]] = entity_label
+                else:
+                    #Store ratio of the entity
+                    entity_fuzzy_ratio[hit["_source"]["entity"]] = ratio
+                    entity_best_label[hit["_source"]["entity"]] = entity_label
+
+            ratio_threshold = max(settings.ADAPTATIVE_RATIO_MIN_THRESHOLD, max_ratio-settings.ADAPTATIVE_RATIO_MAX_GAP)
+
+            ## in wikidata, we use pagerank to re-rank relevant candidates.
+            #Filter entities
+            filtered = 0
+            ## in wikidata, we use pagerank to re-rank relevant candidates.
+            ## fist, find the max page rank among candidates.
+            max_page_rank = 0
+            # with self.wikidata_stats_reader.begin() as stat_txn:
+            for entity in entity_fuzzy_ratio:
+                if entity_fuzzy_ratio[entity] >= ratio_threshold or entity in entity_partial_matching:
+                    entities_set.add(entity)
+                    max_page_rank = max(max_page_rank, entity_pr_ratio[entity])
+                    filtered += 1    
+            if max_page_rank == 0.0:
+                max_page_rank = 1.0  
+
+            ## re-rank relevant candidates with locally log-normalized page rank score.
+            for entity in entities_set:
+                # entity_score = (1-settings.PAGE_RANK_FACTOR-settings.BM25_FACTOR)* entity_fuzzy_ratio[entity] + settings.PAGE_RANK_FACTOR*math.log2(list_page_rank[entity]+1)/math.log2(max_page_rank+1) + settings.BM25_FACTOR * entity_bm25_ratio[entity]
+                entity_score = (1-settings.PAGE_RANK_FACTOR-settings.BM25_FACTOR)* entity_fuzzy_ratio[entity] + settings.PAGE_RANK_FACTOR*math.log2(entity_pr_ratio[entity]+1)/math.log2(max_page_rank+1) + settings.BM25_FACTOR * entity_bm25_ratio[entity]
+                entities_result.append({"entity": entity, "label": entity_best_label[entity], "score": entity_score, "origin": entity_origin})
+            entities_result.sort(key=lambda x: x["score"], reverse=True)
+        return {"label": label, "entities": entities_result}
+
     def flat_search(self, index_name, labels):
         """Search candidate entities for labels in flat index"""
+        return self.flat_msearch(index_name, labels)
+
+    def flat_msearch(self, index_name, labels):
+        """Search candidate entities for labels in flat index, one _msearch round trip per batch of labels.
+           Labels found in the lookup cache are not sent again."""
+        result = [self._get_cached_result(index_name, label) for label in labels]
+        missing = [i for i, item in enumerate(result) if item is None]
+        batch_size = max(1, settings.MSEARCH_BATCH_SIZE)
+        for start in range(0, len(missing), batch_size):
+            batch_indexes = missing[start:start+batch_size]
+            batch = [labels[i] for i in batch_indexes]
+            for i, label, item in zip(batch_indexes, batch, self._flat_msearch_batch(index_name, batch)):
+                result[i] = item
+                if "error" not in item: ## errors are not cached, the label is looked up again next time.
+                    self._cache_result(index_name, label, item)
+        return result
+
+    def _flat_msearch_batch(self, index_name, batch):
+        """Search candidate entities for a batch of labels in flat index with a single _msearch request"""
+        prepared = []
+        body = []
+        for label in batch:
+            request, new_label, label_lower = self._build_flat_request(label)
+            prepared.append((new_label, label_lower))
+            body.append({"index": index_name})
+            body.append(request)
+        try:
+            responses = self.es.msearch(body=body, index=index_name)["responses"]
+        except Exception as e:
+            return [{"label": label, "error": str(e)} for label in batch]
         result = []
-        for label in labels:
-            result.append(self.flat_search_item(index_name, label))
+        for label, (new_label, label_lower), response in zip(batch, prepared, responses):
+            if "error" in response:
+                result.append({"label": label, "error": str(response["error"])})
+                continue
+            try:
+                result.append(self._filter_result(label, new_label, label_lower, response))
+            except Exception as e:
+                result.append({"label": label, "error": str(e)})
         return result
 
+    def _get_cached_result(self, index_name, label):
+        """Result of a label looked up by a previous search, None if it is not cached"""
+        key = (index_name, label)
+        with self.cache_lock:
+            item = self.cache.get(key)
+            if item is not None:
+                self.cache.move_to_end(key)
+        return item
+
+    def _cache_result(self, index_name, label, item):
+        """Cache the result of a label, evicting the least recently used results beyond settings.LOOKUP_CACHE_SIZE"""
+        if settings.LOOKUP_CACHE_SIZE <= 0:
+            return
+        key = (index_name, label)
+        with self.cache_lock:
+            self.cache[key] = item
+            self.cache.move_to_end(key)
+            while len(self.cache) > settings.LOOKUP_CACHE_SIZE:
+                self.cache.popitem(last=False)
+
     def flat_search_item(self, index_name, label):
         try:
-            def es_search(request):
-                result = self.es.search(index=index_name, body=request)
-                return result
-
-            def filter_result(label, result):
-                entities_result = []
-                total = result["hits"]["total"]["value"]
-                bm25_max = result["hits"]["max_score"] ## tdidf score max             
-                if (total > 0):
-                    #Calculate max ratio for all entities returned by ES
-                    entities_set = set()
-                    entity_fuzzy_ratio = {} ## store fuzzy matching score
-                    entity_bm25_ratio = {} ## store keyword matching (tfidf) score (retrieved from ES)
-                    entity_pr_ratio = {}
-                    entity_partial_matching = set() ## since partial exact matching sometimes not fit well with levenshtein, 
-                                                    ## we do not use levenshtein distances to evaluate the partial matching entity.
-                                                    ## for e.g. "YANKEES" vs. "NEW YORK YANKEES"
-                    entity_best_label = {}
-                    max_ratio = 0.0
-                    for hit in result["hits"]["hits"]:
-                        #Calculate ratio for label of the entity
-                        entity_label = hit["_source"]["label"]
-                        entity_origin = hit["_source"]["origin"]
-                        bm25_score = hit["_score"]/bm25_max
-                        entity_pr_ratio[hit["_source"]["entity"]] = hit["_source"].get("PR", 0.0)
-                        entity_bm25_ratio[hit["_source"]["entity"]] = max(entity_bm25_ratio.get(hit["_source"]["entity"], bm25_score), bm25_score)
-                        
-                        entity_label_lower = entity_label.lower()
-                        ## ratio components
-                        char_based_ratio = 0.9*fuzz.ratio(label_lower, entity_label_lower)/100 + 0.1*fuzz.ratio(new_label, entity_label)/100
-                        token_sort_based_ratio = 0.9*fuzz.token_sort_ratio(label_lower, entity_label_lower)/100 + 0.1*fuzz.token_sort_ratio(new_label, entity_label)/100
-                        if 0.5 < len(label_lower)/len(entity_label_lower) < 2.0: ## token set ratio is noisy, only apply on two labels of similar lengths.
-                            token_set_based_ratio = 0.9*fuzz.token_set_ratio(label_lower, entity_label_lower)/100 + 0.1*fuzz.token_set_ratio(new_label, entity_label)/100
-                        else:
-                            token_set_based_ratio = 0.0
-                        ## find entities that have partial exact matching, we put them directly in output without evaluating levenshtein distances
-                        ## since levenshtein does not fit well with partial exact matching.
-                        ## to avoid extracting too much irrelevant entities, the entity label should not be too long or too short w.r.t. input label
-                        partial_ratio = 0.9*fuzz.partial_ratio(label_lower, entity_label_lower)/100 + 0.1*fuzz.partial_ratio(new_label, entity_label)/100
-                        token_diff = abs(len(label_lower.split(" ")) - len(entity_label_lower.split(" "))) ## token difference between 2 labels
-                            ## partial matching ratio and token set ratio are noisy, only apply on two labels of similar lengths.
-                        if (partial_ratio > 0.9 and token_diff <= 2) or \
-                                (token_set_based_ratio > 0.9 and 0.5 < len(label_lower)/len(entity_label_lower) < 2.0):                  
-                            entity_partial_matching.add(hit["_source"]["entity"])
-                        ## the final ratio is the mean of two maximum ratios among three ratios. 
-                        ## to avoid that 2 ratios of same values dominate the other.
-                        ## e.g. char_based_ratio("universal", "universal picture") = token_sort_based_ratio("universal", "universal picture") = 0.66
-                        ##        so including both ratios in the final ratio will decrease the significance of token_set_based_ratio("universal", "universal picture") which is 1.0
-                        ratio = sum(sorted([char_based_ratio, token_sort_based_ratio, token_set_based_ratio], reverse=True)[:2])/2
-
-                        #Apply factor according to label origin
-                        label_origin = hit["_source"].get("origin")
-                        factor = 1
-                        if label_origin == "MAIN_ALIAS":
-                            factor = settings.MAIN_ALIAS_FACTOR
-                        elif label_origin == "SUB_ALIAS":
-                            factor = settings.SUB_ALIAS_FACTOR
-                        ratio *= factor
-
-                        #Store max ratio of the queried label
-                        max_ratio = max(max_ratio, ratio)
-                        #print(hit["_source"]["entity"] + ": " + entity_label + ": " + str(ratio) + " ("+str(hit["_score"])+")")
-                        if entity_fuzzy_ratio.get(hit["_source"]["entity"]):
-                            if ratio > entity_fuzzy_ratio[hit["_source"]["entity"]]:
-                                #Store max ratio of the entity
-                                entity_fuzzy_ratio[hit["_source"]["entity"]] = ratio
-                                entity_best_label[hit["_source"]["entity"]] = entity_label
-                        else:
-                            #Store ratio of the entity
-                            entity_fuzzy_ratio[hit["_source"]["entity"]] = ratio
-                            entity_best_label[hit["_source"]["entity"]] = entity_label
-
-                    ratio_threshold = max(settings.ADAPTATIVE_RATIO_MIN_THRESHOLD, max_ratio-settings.ADAPTATIVE_RATIO_MAX_GAP)
-
-                    ## in wikidata, we use pagerank to re-rank relevant candidates.
-                    #Filter entities
-                    filtered = 0
-                    ## in wikidata, we use pagerank to re-rank relevant candidates.
-                    ## fist, find the max page rank among candidates.
-                    max_page_rank = 0
-                    # with self.wikidata_stats_reader.begin() as stat_txn:
-                    for entity in entity_fuzzy_ratio:
-                        if entity_fuzzy_ratio[entity] >= ratio_threshold or entity in entity_partial_matching:
-                            entities_set.add(entity)
-                            max_page_rank = max(max_page_rank, entity_pr_ratio[entity])
-                            filtered += 1    
-                    if max_page_rank == 0.0:
-                        max_page_rank = 1.0  
-
-                    ## re-rank relevant candidates with locally log-normalized page rank score.
-                    for entity in entities_set:
-                        # entity_score = (1-settings.PAGE_RANK_FACTOR-settings.BM25_FACTOR)* entity_fuzzy_ratio[entity] + settings.PAGE_RANK_FACTOR*math.log2(list_page_rank[entity]+1)/math.log2(max_page_rank+1) + settings.BM25_FACTOR * entity_bm25_ratio[entity]
-                        entity_score = (1-settings.PAGE_RANK_FACTOR-settings.BM25_FACTOR)* entity_fuzzy_ratio[entity] + settings.PAGE_RANK_FACTOR*math.log2(entity_pr_ratio[entity]+1)/math.log2(max_page_rank+1) + settings.BM25_FACTOR * entity_bm25_ratio[entity]
-                        entities_result.append({"entity": entity, "label": entity_best_label[entity], "score": entity_score, "origin": entity_origin})
-                    entities_result.sort(key=lambda x: x["score"], reverse=True)
-                return {"label": label, "entities": entities_result}
-
-            request = copy.deepcopy(self.FLAT_QUERY_STRING)
-            new_label = label.replace('"', '').strip() ## only vital preprocessing on input label: replace '"" by '' since ES does not accept double quote and remove last spaces.
-            new_label = " ".join(new_label.split()) # remove multiple space in string
-            label_lower = new_label.lower()
-            request["query"]["function_score"]["query"]["bool"]["should"][0]["bool"]["must"][0]["match"]["label"]["query"] = new_label
-            request["query"]["function_score"]["query"]["bool"]["should"][1]["bool"]["must"][0]["match"]["label.keyword"]["query"] = new_label
-            request["query"]["function_score"]["query"]["bool"]["should"][0]["bool"]["filter"]["range"]["length"]["gte"] = int(len(new_label) * settings.LABEL_LENGTH_MIN_FACTOR)
-            request["query"]["function_score"]["query"]["bool"]["should"][0]["bool"]["filter"]["range"]["length"]["lte"] = int(len(new_label) * settings.LABEL_LENGTH_MAX_FACTOR)
-            request["query"]["function_score"]["query"]["bool"]["should"][1]["bool"]["filter"]["range"]["length"]["gte"] = int(max(0, len(new_label) - settings.LABEL_TOKEN_DIFF))
-            request["query"]["function_score"]["query"]["bool"]["should"][1]["bool"]["filter"]["range"]["length"]["lte"] = int(len(new_label) + settings.LABEL_TOKEN_DIFF)
-
-            result = es_search(request)
-            entities = filter_result(label, result)
-
-            return entities
+            request, new_label, label_lower = self._build_flat_request(label)
+            result = self.es.search(index=index_name, body=request)
+            return self._filter_result(label, new_label, label_lower, result)
         except Exception as e:
             return {"label": label, "error": str(e)}
@@ -33,6 +33,12 @@ ADAPTATIVE_RATIO_MAX_GAP = float(os.getenv('ADAPTATIVE_RATIO_MAX_GAP', 0.25))
 PARALLEL_MODE = os.getenv('PARALLEL_MODE', True)
 PARALLEL_MIN = os.getenv('PARALLEL_MIN', 5)
 
+# Number of labels sent per _msearch request
+MSEARCH_BATCH_SIZE = int(os.getenv('MSEARCH_BATCH_SIZE', 50))
+
+# Number of label lookup results kept in memory across searches (0 disables the cache)
+LOOKUP_CACHE_SIZE = int(os.getenv('LOOKUP_CACHE_SIZE', 100000))
+
 # Lookup score factors
 MAIN_ALIAS_FACTOR = float(os.getenv('MAIN_ALIAS_FACTOR', 0.94))
 SUB_ALIAS_FACTOR = float(os.getenv('SUB_ALIAS_FACTOR', 0.88))
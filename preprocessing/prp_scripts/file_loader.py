@@ -28,12 +28,16 @@ to tables
 '''
 
 import csv
+import io
 import json
 import pandas as pd
 import numpy as np
 from typing import List
 import chardet
 
+## number of first bytes of a text file from which its encoding and delimiter are detected.
+SNIFF_SAMPLE_SIZE = 65536
+
 def txt_to_table(filepath: str):
     """
     Read table from text file (txt, tsv,csv..). Currently, only 1 table/file supported 
@@ -45,27 +49,41 @@ def txt_to_table(filepath: str):
     """
     list_tables = []
     try:
-        f =  open(filepath, 'rb')
-        en_scheme = chardet.detect(f.read())  # detect encoding scheme
-        f.close()
-        f = open(filepath, 'r', encoding=en_scheme['encoding'])
-        possible_sep = [',', '\t', ';', ':']
-        dialect = csv.Sniffer().sniff(f.read(), possible_sep)
-        f.close()
-        f = open(filepath, 'r', encoding=en_scheme['encoding'])
+        f = open(filepath, 'rb')
     except FileNotFoundError:
         print(" File not found !!")
         return []
     except Exception as e:
         print(e)
         return []
-    reader = csv.reader(f, delimiter=dialect.delimiter, skipinitialspace=True)
-    table = []
-    for item in reader:
-        table.append(item)
+    with f:
+        try:
+            ## encoding and delimiter are detected on the first bytes of the file only.
+            sample = f.read(SNIFF_SAMPLE_SIZE)
+            is_truncated = len(sample) == SNIFF_SAMPLE_SIZE
+            en_scheme = chardet.detect(sample)  # detect encoding scheme
+            if is_truncated and en_scheme['encoding'] == 'ascii':
+                ## non-ascii chars may come after the sample, utf-8 decodes the ascii sample the same way.
+                en_scheme['encoding'] = 'utf-8'
+            sample = sample.decode(en_scheme['encoding'] or 'utf-8', errors='ignore')
+            if is_truncated and '\n' in sample:
+                sample = sample[:sample.rindex('\n')] ## do not sniff a truncated last line.
+            possible_sep = [',', '\t', ';', ':']
+            dialect = csv.Sniffer().sniff(sample, possible_sep)
+        except Exception as e:
+            print(e)
+            return []
+        ## the rows are decoded from the same file, read again from its start.
+        ##     bytes after the sample that do not fit the detected encoding are replaced.
+        try:
+            f.seek(0)
+            table = list(csv.reader(io.TextIOWrapper(f, encoding=en_scheme['encoding'], errors='replace', newline=''), 
+                                    delimiter=dialect.delimiter, skipinitialspace=True))
+        except Exception as e:
+            print(e)
+            return []
     if table:
         list_tables.append(table)
-    f.close()
     return list_tables
 
 """
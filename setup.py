@@ -26,6 +26,7 @@ setup(
     author='Orange SA',
     license='TODO',
     packages=['annotation', 'lookup', 'preprocessing'],
+    python_requires='>=3.10',
     install_requires=[
         'ftfy==6.0.3',
         'numpy==1.22.0',
@@ -39,7 +40,7 @@ setup(
         'typing-extensions>=4.6.1',
         'tqdm==4.60.0',
         'lmdb==1.3.0',
-        'rapidfuzz==1.9.1',
+        'rapidfuzz==2.13.7',
         'quantulum3==0.7.9',
         'openpyxl==3.0.9',
         'Pint==0.18',
@@ -0,0 +1,12 @@
+from annotation.annot_scripts import utils
+
+PUNCTUATED_STRINGS = ["St. Louis, MO", "saint louis", "New-York!", "New York", "O'Brien", "o brien", "A.B.C.", "abc", "!!!", ""]
+
+def test_textual_similarities_match_textual_similarity():
+    for s in PUNCTUATED_STRINGS:
+        similarities = utils.textual_similarities(s, PUNCTUATED_STRINGS)
+        for i, choice in enumerate(PUNCTUATED_STRINGS):
+            assert similarities[i] == utils.textual_similarity(s, choice)
+
+def test_token_ratios_ignore_punctuation():
+    assert utils.textual_similarity("St. Louis, MO", "st louis mo") == 1.0